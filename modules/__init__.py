@@ -53,7 +53,18 @@ SETTINGS = {
     'duplicateApiUrl': Setting(None, 'https://[testnet.]toncenter.com/api/v2/sendBoc', 'Toncenter api url for duplicate'),
     'checkAdnl': Setting(None, 'sendTelemetry', 'Check local udp port and adnl connection'),
     'liteclient_timeout': Setting(None, 3, 'Liteclient default timeout'),
+    'liteclient_pool': Setting(None, False, 'Keep persistent lite-client sessions for last, getaccount and runmethod instead of starting a process per query'),
+    'liteclient_pool_size': Setting(None, 4, 'Max number of persistent lite-client sessions'),
+    'liteServersScanWorkers': Setting(None, 8, 'Number of parallel workers for liteservers scan'),
+    'liteServersScanDeadline': Setting(None, 20, 'Total time limit of liteservers scan, seconds'),
+    'liteclient_hedge': Setting(None, False, 'Duplicate slow read-only lite-client queries to a second liteserver'),
+    'liteclient_hedge_percentile': Setting(None, 90, 'Latency percentile after which a hedged query is sent'),
+    'liteclient_backend': Setting(None, 'subprocess', 'Liteserver queries backend: `subprocess` (lite-client) or `native` (in-process ADNL client)'),
+    'native_wallet_messages': Setting(None, False, 'Build and sign wallet messages in Python instead of running fift scripts'),
+    'callTracePath': Setting(None, None, 'Write lite-client, console and fift calls to this JSONL file'),
     'console_timeout': Setting(None, 3, 'Validator console default timeout'),
+    'console_pool': Setting(None, False, 'Keep persistent validator-engine-console sessions for key and signature commands instead of starting a process per command'),
+    'console_pool_size': Setting(None, 2, 'Max number of persistent validator-engine-console sessions'),
     'fift_timeout': Setting(None, 3, 'Fift default timeout'),
     'useDefaultCustomOverlays': Setting(None, True, 'Participate in default custom overlays node eligible to'),
     'defaultCustomOverlaysUrl': Setting(None, 'https://ton-blockchain.github.io/fallback_custom_overlays.json', 'Default custom overlays config url'),
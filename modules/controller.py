@@ -195,7 +195,7 @@ class ControllerModule(MtcModule):
         liquid_pool_addr = self.ton.GetLiquidPoolAddr()
         account = self.ton.GetAccount(liquid_pool_addr)
         history = self.ton.GetAccountHistory(account, 5000)
-        addrs_list = list()
+        addrs_full = dict()
         for message in history:
             if message.srcAddr is None or message.value is None:
                 continue
@@ -205,9 +205,8 @@ class ControllerModule(MtcModule):
                 fromto = dest_add_full
             else:
                 fromto = src_addr_full
-            fromto = self.ton.AddrFull2AddrB64(fromto)
-            if fromto not in addrs_list:
-                addrs_list.append(fromto)
+            addrs_full[fromto] = None
+        addrs_list = self.ton.AddrFull2AddrB64List(addrs_full)
 
         for controllerAddr in addrs_list:
             account = self.ton.GetAccount(controllerAddr)
@@ -16,11 +16,11 @@ class PoolModule(MtcModule):
         if data is None or len(data) == 0:
             print("No data")
             return
-        for pool in data:
-            account = self.ton.GetAccount(pool.addrB64)
+        accounts = [self.ton.GetAccount(pool.addrB64) for pool in data]
+        versions = self.ton.GetVersionsFromCodeHashes([account.codeHash for account in accounts])
+        for pool, account, version in zip(data, accounts, versions):
             if account.status != "active":
                 pool.addrB64 = pool.addrB64_init
-            version = self.ton.GetVersionFromCodeHash(account.codeHash)
             table += [[pool.name, account.status, account.balance, version, pool.addrB64]]
         print_table(table)
 
@@ -26,6 +26,10 @@ METRICS = {
     'stake': Metric('validator_stake', 'Validator stake', 'gauge'),
     'celldb_gc_block': Metric('validator_celldb_gc_block', 'Celldb GC block latency', 'gauge'),
     'celldb_gc_state': Metric('validator_celldb_gc_state', 'Celldb GC queue size', 'gauge'),
+    'lc_calls': Metric('mytonctrl_liteclient_calls_total', 'Read-only lite-client calls', 'counter'),
+    'lc_shared': Metric('mytonctrl_liteclient_shared_calls_total', 'Lite-client calls served by an identical in-flight call', 'counter'),
+    'vc_calls': Metric('mytonctrl_console_calls_total', 'Read-only validator-console calls', 'counter'),
+    'vc_shared': Metric('mytonctrl_console_shared_calls_total', 'Validator-console calls served by an identical in-flight call', 'counter'),
 }
 
 
@@ -67,6 +71,14 @@ class PrometheusModule(MtcModule):
             if stake:
                 result.append(METRICS['stake'].to_format(round(stake, 2)))
 
+    def get_singleflight_metrics(self, result: list):
+        lc_stats = self.ton.liteClient.singleflight.get_stats()
+        result.append(METRICS['lc_calls'].to_format(lc_stats['calls']))
+        result.append(METRICS['lc_shared'].to_format(lc_stats['shared']))
+        vc_stats = self.ton.validatorConsole.singleflight.get_stats()
+        result.append(METRICS['vc_calls'].to_format(vc_stats['calls']))
+        result.append(METRICS['vc_shared'].to_format(vc_stats['shared']))
+
     def push_metrics(self):
         if not self.ton.using_prometheus():
             return
@@ -77,6 +89,7 @@ class PrometheusModule(MtcModule):
         metrics = []
         self.local.try_function(self.get_validator_status_metrics, args=[metrics])
         self.local.try_function(self.get_validator_validation_metrics, args=[metrics])
+        self.local.try_function(self.get_singleflight_metrics, args=[metrics])
         requests.post(url, data='\n'.join(metrics).encode())
 
     def add_console_commands(self, console):
@@ -44,6 +44,7 @@ class UtilitiesModule(MtcModule):
         table = list()
         typeText = color_text("{red}{bold}{endc}")
         table += [["Time", typeText, "Coins", "From/To"]]
+        rows = list()
         for message in history:
             if message.srcAddr is None:
                 continue
@@ -55,10 +56,13 @@ class UtilitiesModule(MtcModule):
             else:
                 type = color_text("{blue}{bold}<<<{endc}")
                 fromto = srcAddrFull
-            fromto = self.ton.AddrFull2AddrB64(fromto)
             # datetime = timestamp2datetime(message.time, "%Y.%m.%d %H:%M:%S")
             datetime = timeago(message.time)
-            table += [[datetime, type, message.value, fromto]]
+            rows.append([datetime, type, message.value, fromto])
+        addrs = self.ton.AddrFull2AddrB64List([row[3] for row in rows])
+        for row, fromto in zip(rows, addrs):
+            row[3] = fromto
+        table += rows
         return table
     # end define
 
@@ -60,12 +60,8 @@ class WalletModule(MtcModule):
 
     def get_wallets(self):
         self.local.add_log("start GetWallets function", "debug")
-        wallets = list()
         wallets_name_list = self.ton.GetWalletsNameList()
-        for walletName in wallets_name_list:
-            wallet = self.ton.GetLocalWallet(walletName)
-            wallets.append(wallet)
-        return wallets
+        return self.ton.GetLocalWallets(wallets_name_list)
     # end define
 
     def print_wallets_list(self, args):
@@ -0,0 +1,143 @@
+import base64
+import collections
+import threading
+
+from fastcrc import crc16
+
+
+def encode_addr_b64(workchain, addr, bounceable=True, testnet=False):
+	# User-friendly url-safe base64 form of workchain:addr
+	b = bytearray(36)
+	b[0] = 0x51 - bounceable * 0x40 + testnet * 0x80
+	b[1] = workchain % 256
+	b[2:34] = bytearray.fromhex(addr)
+	crc = crc16.xmodem(bytes(b[:34]))
+	b[34] = crc >> 8
+	b[35] = crc & 0xff
+	return base64.urlsafe_b64encode(b).decode()
+#end define
+
+def decode_addr_b64(addrB64):
+	# Returns (workchain, addr, bounceable, testnet)
+	b = base64.urlsafe_b64decode(addrB64.replace('+', '-').replace('/', '_').encode())
+	crc = int.from_bytes(b[34:36], "big")
+	if crc != crc16.xmodem(bytes(b[:34])):
+		raise Exception("ParseAddrB64 error: crc do not match")
+	testnet = (b[0] & 0x80) != 0
+	bounceable = (b[0] & 0x40) == 0
+	workchain = int.from_bytes(b[1:2], "big", signed=True)
+	return workchain, b[2:34].hex(), bounceable, testnet
+#end define
+
+
+class AddressCodec:
+	"""
+	Conversions between workchain:addr and base64 addresses for one network.
+	Results are kept in two bounded LRU tables, one per direction.
+	`warn` is called once per decoded address of another network.
+	"""
+
+	def __init__(self, testnet, max_size=8192, warn=None):
+		self.testnet = testnet
+		self.max_size = max_size
+		self.warn = warn
+		self.encoded = collections.OrderedDict() # (addrFull, bounceable) -> addrB64
+		self.decoded = collections.OrderedDict() # addrB64 -> (workchain, addr, bounceable, testnet)
+		self.lock = threading.Lock()
+		self.stats = {"hits": 0, "misses": 0}
+	#end define
+
+	def lookup(self, table, key):
+		with self.lock:
+			value = table.get(key)
+			if value is None:
+				self.stats["misses"] += 1
+				return None
+			table.move_to_end(key)
+			self.stats["hits"] += 1
+			return value
+	#end define
+
+	def store(self, table, key, value):
+		with self.lock:
+			table[key] = value
+			if len(table) > self.max_size:
+				table.popitem(last=False)
+	#end define
+
+	def full_to_b64(self, addrFull, bounceable=True):
+		if addrFull is None or "None" in addrFull:
+			return None
+		key = (addrFull, bounceable)
+		addrB64 = self.lookup(self.encoded, key)
+		if addrB64 is not None:
+			return addrB64
+		return self.encode(addrFull, bounceable)
+	#end define
+
+	def encode(self, addrFull, bounceable):
+		if addrFull is None or "None" in addrFull:
+			return None
+		buff = addrFull.split(':')
+		workchain = int(buff[0])
+		addr = buff[1]
+		if len(addr) != 64:
+			raise Exception("AddrFull2AddrB64 error: Invalid length of hexadecimal address")
+		addrB64 = encode_addr_b64(workchain, addr, bounceable, self.testnet)
+		self.store(self.encoded, (addrFull, bounceable), addrB64)
+		return addrB64
+	#end define
+
+	def parse_b64(self, addrB64):
+		data = self.lookup(self.decoded, addrB64)
+		if data is not None:
+			return data
+		return self.decode(addrB64)
+	#end define
+
+	def decode(self, addrB64):
+		data = decode_addr_b64(addrB64)
+		if data[3] != self.testnet and self.warn is not None:
+			self.warn(f"ParseAddrB64 warning: testnet flag do not match. Addr: {data[3]}, Network: {self.testnet}")
+		self.store(self.decoded, addrB64, data)
+		return data
+	#end define
+
+	def lookup_list(self, table, keys):
+		# One lock for the whole list, None for the misses
+		result = list()
+		with self.lock:
+			get = table.get
+			move_to_end = table.move_to_end
+			for key in keys:
+				value = get(key)
+				if value is not None:
+					move_to_end(key)
+				result.append(value)
+			misses = result.count(None)
+			self.stats["hits"] += len(result) - misses
+			self.stats["misses"] += misses
+		return result
+	#end define
+
+	def full_list_to_b64(self, addrs, bounceable=True):
+		addrs = list(addrs)
+		result = self.lookup_list(self.encoded, [(addrFull, bounceable) for addrFull in addrs])
+		missed = dict() # the same address can be missed several times in one list
+		for i, addrB64 in enumerate(result):
+			if addrB64 is None:
+				addrFull = addrs[i]
+				if addrFull not in missed:
+					missed[addrFull] = self.encode(addrFull, bounceable)
+				result[i] = missed[addrFull]
+		return result
+	#end define
+
+	def get_stats(self):
+		with self.lock:
+			result = dict(self.stats)
+			result["encoded"] = len(self.encoded)
+			result["decoded"] = len(self.decoded)
+		return result
+	#end define
+#end class
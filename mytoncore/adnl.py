@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import os
+import struct
+import zlib
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from nacl.bindings import crypto_scalarmult
+from nacl.signing import SigningKey, VerifyKey
+
+
+def tl_id(schema):
+	return struct.pack("<I", zlib.crc32(schema.encode("utf-8")))
+#end define
+
+PUB_ED25519 = tl_id("pub.ed25519 key:int256 = PublicKey")
+ADNL_MESSAGE_QUERY = tl_id("adnl.message.query query_id:int256 query:bytes = adnl.Message")
+ADNL_MESSAGE_ANSWER = tl_id("adnl.message.answer query_id:int256 answer:bytes = adnl.Message")
+TCP_PING = tl_id("tcp.ping random_id:long = tcp.Pong")
+TCP_PONG = tl_id("tcp.pong random_id:long = tcp.Pong")
+
+
+def tl_pack_bytes(data):
+	length = len(data)
+	if length < 254:
+		result = bytes([length]) + data
+	else:
+		result = b"\xfe" + length.to_bytes(3, "little") + data
+	pad = (4 - len(result) % 4) % 4
+	return result + b"\x00" * pad
+#end define
+
+def tl_unpack_bytes(data, offset):
+	length = data[offset]
+	if length < 254:
+		start = offset + 1
+	else:
+		length = int.from_bytes(data[offset+1:offset+4], "little")
+		start = offset + 4
+	end = start + length
+	pad = (4 - (end - offset) % 4) % 4
+	return data[start:end], end + pad
+#end define
+
+def get_key_id(pubkey):
+	return hashlib.sha256(PUB_ED25519 + pubkey).digest()
+#end define
+
+def create_cipher(key, iv):
+	return Cipher(algorithms.AES(key), modes.CTR(iv)).encryptor()
+#end define
+
+def get_shared_key(signing_key, pubkey):
+	# x25519 over keys converted from ed25519
+	private = signing_key.to_curve25519_private_key().encode()
+	public = VerifyKey(pubkey).to_curve25519_public_key().encode()
+	return crypto_scalarmult(private, public)
+#end define
+
+def get_handshake_cipher(shared, params_hash):
+	key = shared[0:16] + params_hash[16:32]
+	iv = params_hash[0:4] + shared[20:32]
+	return create_cipher(key, iv)
+#end define
+
+def get_session_ciphers(params, server=False):
+	# Returns (rx, tx) from the point of view of the client or the server
+	client_rx = create_cipher(params[0:32], params[64:80])
+	client_tx = create_cipher(params[32:64], params[80:96])
+	if server:
+		return client_tx, client_rx
+	return client_rx, client_tx
+#end define
+
+
+class AdnlTcpConnection:
+	"""
+	Encrypted ADNL TCP stream: framing and checksums
+	"""
+
+	def __init__(self, reader, writer, rx, tx):
+		self.reader = reader
+		self.writer = writer
+		self.rx = rx
+		self.tx = tx
+	#end define
+
+	def send_packet(self, payload):
+		nonce = os.urandom(32)
+		checksum = hashlib.sha256(nonce + payload).digest()
+		data = nonce + payload + checksum
+		packet = struct.pack("<I", len(data)) + data
+		self.writer.write(self.tx.update(packet))
+	#end define
+
+	async def read_packet(self):
+		size = self.rx.update(await self.reader.readexactly(4))
+		size = struct.unpack("<I", size)[0]
+		if size < 64 or size > 1 << 24:
+			raise Exception(f"ADNL error: wrong packet size {size}")
+		data = self.rx.update(await self.reader.readexactly(size))
+		nonce, payload, checksum = data[:32], data[32:-32], data[-32:]
+		if hashlib.sha256(nonce + payload).digest() != checksum:
+			raise Exception("ADNL error: wrong packet checksum")
+		return payload
+	#end define
+
+	def close(self):
+		self.writer.close()
+	#end define
+#end class
+
+
+class AdnlTcpClient:
+	"""
+	ADNL over TCP client. Queries are multiplexed on one connection by query id.
+	"""
+
+	def __init__(self, host, port, pubkey):
+		self.host = host
+		self.port = port
+		self.pubkey = pubkey
+		self.connection = None
+		self.reader_task = None
+		self.connect_lock = None
+		self.queries = dict()
+	#end define
+
+	def is_connected(self):
+		return self.connection is not None and self.reader_task is not None and not self.reader_task.done()
+	#end define
+
+	async def ensure_connected(self, timeout):
+		# Concurrent first queries wait for one connection instead of opening their own
+		if self.connect_lock is None:
+			self.connect_lock = asyncio.Lock()
+		async with self.connect_lock:
+			if not self.is_connected():
+				await self.connect(timeout)
+	#end define
+
+	async def connect(self, timeout):
+		reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout)
+		signing_key = SigningKey.generate()
+		params = os.urandom(160)
+		params_hash = hashlib.sha256(params).digest()
+		shared = get_shared_key(signing_key, self.pubkey)
+		encrypted_params = get_handshake_cipher(shared, params_hash).update(params)
+		handshake = get_key_id(self.pubkey) + bytes(signing_key.verify_key) + params_hash + encrypted_params
+		writer.write(handshake)
+		rx, tx = get_session_ciphers(params)
+		connection = AdnlTcpConnection(reader, writer, rx, tx)
+
+		# Server confirms handshake with an empty packet
+		payload = await asyncio.wait_for(connection.read_packet(), timeout)
+		if len(payload) != 0:
+			connection.close()
+			raise Exception("ADNL error: wrong handshake answer")
+		self.connection = connection
+		self.reader_task = asyncio.ensure_future(self.read_loop(connection))
+	#end define
+
+	async def read_loop(self, connection):
+		try:
+			while True:
+				payload = await connection.read_packet()
+				self.dispatch(payload)
+		except Exception as ex:
+			self.fail_queries(ex)
+		finally:
+			connection.close()
+			if self.connection is connection:
+				self.connection = None
+	#end define
+
+	def dispatch(self, payload):
+		if payload[:4] == ADNL_MESSAGE_ANSWER:
+			query_id = payload[4:36]
+			answer, offset = tl_unpack_bytes(payload, 36)
+			future = self.queries.pop(query_id, None)
+			if future is not None and not future.done():
+				future.set_result(answer)
+		elif payload[:4] == TCP_PONG:
+			query_id = payload[4:12]
+			future = self.queries.pop(query_id, None)
+			if future is not None and not future.done():
+				future.set_result(payload)
+	#end define
+
+	def fail_queries(self, ex):
+		queries = self.queries
+		self.queries = dict()
+		for future in queries.values():
+			if not future.done():
+				future.set_exception(Exception(f"ADNL error: connection lost: {ex}"))
+	#end define
+
+	async def query(self, data, timeout):
+		await self.ensure_connected(timeout)
+		query_id = os.urandom(32)
+		future = asyncio.get_running_loop().create_future()
+		self.queries[query_id] = future
+		payload = ADNL_MESSAGE_QUERY + query_id + tl_pack_bytes(data)
+		self.connection.send_packet(payload)
+		try:
+			return await asyncio.wait_for(future, timeout)
+		finally:
+			self.queries.pop(query_id, None)
+	#end define
+
+	async def ping(self, timeout):
+		await self.ensure_connected(timeout)
+		random_id = os.urandom(8)
+		future = asyncio.get_running_loop().create_future()
+		self.queries[random_id] = future
+		self.connection.send_packet(TCP_PING + random_id)
+		try:
+			await asyncio.wait_for(future, timeout)
+		finally:
+			self.queries.pop(random_id, None)
+	#end define
+
+	def close(self):
+		if self.reader_task is not None:
+			self.reader_task.cancel()
+		if self.connection is not None:
+			self.connection.close()
+		self.connection = None
+	#end define
+#end class
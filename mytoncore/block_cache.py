@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class BlockCache:
+	"""
+	Results of lite-client queries pinned to a block never change, so they
+	are kept on disk across restarts. Entries are keyed by the query verb and
+	a key holding the block root hash (or the seqno for byseqno), values are
+	zlib-compressed json of the parsed result. The least recently used
+	entries are dropped when the stored values grow over `max_size` bytes.
+	Disk errors are counted and treated as misses. MyTonCore keeps its
+	slow-changing chain data in a second, smaller instance.
+	"""
+
+	def __init__(self, path, max_size=64 * 2**20, touch_interval=3600, object_hook=None):
+		self.path = path
+		self.object_hook = object_hook
+		self.max_size = max_size
+		self.touch_interval = touch_interval # seconds between access time updates of an entry
+		self.connection = None
+		self.size = 0
+		self.lock = threading.Lock()
+		self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+	#end define
+
+	def connect(self):
+		if self.connection is not None:
+			return self.connection
+		dir_name = os.path.dirname(self.path)
+		if dir_name:
+			os.makedirs(dir_name, exist_ok=True)
+		connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute("PRAGMA synchronous=NORMAL")
+		connection.execute("CREATE TABLE IF NOT EXISTS blocks (verb TEXT, key TEXT, value BLOB, atime REAL, PRIMARY KEY (verb, key)) WITHOUT ROWID")
+		connection.execute("CREATE INDEX IF NOT EXISTS blocks_atime ON blocks (atime)")
+		self.size = connection.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM blocks").fetchone()[0]
+		self.connection = connection
+		return connection
+	#end define
+
+	def get(self, verb, key):
+		with self.lock:
+			try:
+				connection = self.connect()
+				row = connection.execute("SELECT value, atime FROM blocks WHERE verb = ? AND key = ?", (verb, key)).fetchone()
+				if row is None:
+					self.stats["misses"] += 1
+					return None
+				now = time.time()
+				if now - row[1] > self.touch_interval:
+					connection.execute("UPDATE blocks SET atime = ? WHERE verb = ? AND key = ?", (now, verb, key))
+				value = json.loads(zlib.decompress(row[0]), object_hook=self.object_hook)
+			except (sqlite3.Error, OSError, zlib.error, ValueError):
+				self.stats["errors"] += 1
+				return None
+			self.stats["hits"] += 1
+			return value
+	#end define
+
+	def set(self, verb, key, value):
+		data = zlib.compress(json.dumps(value, separators=(',', ':')).encode("utf-8"))
+		with self.lock:
+			try:
+				connection = self.connect()
+				row = connection.execute("SELECT LENGTH(value) FROM blocks WHERE verb = ? AND key = ?", (verb, key)).fetchone()
+				connection.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?)", (verb, key, data, time.time()))
+				self.size += len(data) - (row[0] if row else 0)
+				self.stats["writes"] += 1
+				if self.size > self.max_size:
+					self.evict(connection)
+			except (sqlite3.Error, OSError):
+				self.stats["errors"] += 1
+	#end define
+
+	def evict(self, connection):
+		# Down to 90% of max_size, so that eviction does not run on every write
+		target = self.max_size * 0.9
+		connection.execute("BEGIN")
+		try:
+			while self.size > target:
+				rows = connection.execute("SELECT verb, key, LENGTH(value) FROM blocks ORDER BY atime LIMIT 256").fetchall()
+				if len(rows) == 0:
+					break
+				for verb, key, size in rows:
+					connection.execute("DELETE FROM blocks WHERE verb = ? AND key = ?", (verb, key))
+					self.size -= size
+					self.stats["evictions"] += 1
+					if self.size <= target:
+						break
+			connection.execute("COMMIT")
+		except sqlite3.Error:
+			connection.execute("ROLLBACK")
+			self.size = connection.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM blocks").fetchone()[0]
+			raise
+	#end define
+
+	def get_stats(self):
+		with self.lock:
+			result = dict(self.stats)
+			result["size"] = self.size
+			result["max_size"] = self.max_size
+		return result
+	#end define
+
+	def close(self):
+		with self.lock:
+			if self.connection is not None:
+				self.connection.close()
+				self.connection = None
+	#end define
+#end class
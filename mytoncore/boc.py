@@ -0,0 +1,608 @@
+import hashlib
+
+
+BOC_MAGIC = b"\xb5\xee\x9c\x72"
+BOC_MAGIC_IDX = b"\x68\xff\x65\xf3"
+BOC_MAGIC_IDX_CRC = b"\xac\xc3\xa7\x28"
+
+CELL_ORDINARY = -1
+CELL_PRUNED_BRANCH = 1
+CELL_LIBRARY = 2
+CELL_MERKLE_PROOF = 3
+CELL_MERKLE_UPDATE = 4
+
+
+class Cell:
+	def __init__(self, data=b'', bits=0, refs=None, special=False):
+		self.data = data
+		self.bits = bits
+		self.refs = refs if refs is not None else list()
+		self.special = special
+		self.depth = None
+		self.hash = None
+	#end define
+
+	def get_depth(self):
+		if self.depth is None:
+			self.depth = 1 + max(ref.get_depth() for ref in self.refs) if self.refs else 0
+		return self.depth
+	#end define
+
+	def get_hash(self):
+		# Representation hash, level 0 ordinary cells only
+		if self.hash is None:
+			if self.special:
+				raise Exception("Cell error: hash of special cells is not supported")
+			data = serialize_cell_header(self)
+			data += b"".join(ref.get_depth().to_bytes(2, "big") for ref in self.refs)
+			data += b"".join(ref.get_hash() for ref in self.refs)
+			self.hash = hashlib.sha256(data).digest()
+		return self.hash
+	#end define
+
+	def get_type(self):
+		if self.special is False:
+			return CELL_ORDINARY
+		return self.data[0]
+	#end define
+
+	def is_pruned(self):
+		return self.special and self.data[0] == CELL_PRUNED_BRANCH
+	#end define
+
+	def begin_parse(self):
+		return Slice(self)
+	#end define
+
+	def to_hex_str(self):
+		# The same representation as lite-client `x{...}` output
+		if self.bits % 4 == 0:
+			return self.data.hex()[:self.bits // 4].upper()
+		value = int.from_bytes(self.data, "big") >> (len(self.data) * 8 - self.bits)
+		pad = 4 - self.bits % 4
+		value = ((value << 1) | 1) << (pad - 1)
+		digits = (self.bits + pad) // 4
+		return format(value, "0{}X".format(digits)) + '_'
+	#end define
+
+	def iter_tree(self):
+		# Pre-order, each cell is yielded as many times as it is referenced
+		stack = [self]
+		while stack:
+			cell = stack.pop()
+			yield cell
+			stack += reversed(cell.refs)
+	#end define
+
+	def __repr__(self):
+		return "x{" + self.to_hex_str() + "}"
+	#end define
+#end class
+
+
+class Slice:
+	def __init__(self, cell):
+		self.cell = cell
+		self.value = int.from_bytes(cell.data, "big")
+		self.value_bits = len(cell.data) * 8
+		self.bits = cell.bits
+		self.pos = 0
+		self.ref_pos = 0
+	#end define
+
+	def bits_left(self):
+		return self.bits - self.pos
+	#end define
+
+	def refs_left(self):
+		return len(self.cell.refs) - self.ref_pos
+	#end define
+
+	def load_uint(self, n):
+		if n == 0:
+			return 0
+		if self.pos + n > self.bits:
+			raise Exception("Slice error: not enough data")
+		result = (self.value >> (self.value_bits - self.pos - n)) & ((1 << n) - 1)
+		self.pos += n
+		return result
+	#end define
+
+	def load_int(self, n):
+		result = self.load_uint(n)
+		if n > 0 and result >> (n - 1):
+			result -= 1 << n
+		return result
+	#end define
+
+	def load_bit(self):
+		return self.load_uint(1)
+	#end define
+
+	def load_bytes(self, length):
+		return self.load_uint(length * 8).to_bytes(length, "big")
+	#end define
+
+	def load_hex(self, n):
+		# Upper case hex of `n` bits, n is a multiple of 4
+		return format(self.load_uint(n), "0{}X".format(n // 4))
+	#end define
+
+	def skip_bits(self, n):
+		if self.pos + n > self.bits:
+			raise Exception("Slice error: not enough data")
+		self.pos += n
+	#end define
+
+	def load_ref(self):
+		if self.ref_pos >= len(self.cell.refs):
+			raise Exception("Slice error: not enough refs")
+		ref = self.cell.refs[self.ref_pos]
+		self.ref_pos += 1
+		return ref
+	#end define
+
+	def load_maybe_ref(self):
+		if self.load_bit():
+			return self.load_ref()
+		return None
+	#end define
+
+	def load_var_uint(self, len_bits):
+		length = self.load_uint(len_bits)
+		return self.load_uint(length * 8)
+	#end define
+
+	def load_grams(self):
+		return self.load_var_uint(4)
+	#end define
+
+	def load_uint_leq(self, m):
+		# `#<= m`
+		return self.load_uint(m.bit_length())
+	#end define
+
+	def load_address(self):
+		# MsgAddressInt, returns (workchain, hex) or None for addr_none
+		tag = self.load_uint(2)
+		if tag == 0:
+			return None
+		if tag == 2:
+			if self.load_bit():
+				depth = self.load_uint(5)
+				self.skip_bits(depth)
+			workchain = self.load_int(8)
+			address = self.load_hex(256)
+			return workchain, address
+		if tag == 3:
+			if self.load_bit():
+				depth = self.load_uint(5)
+				self.skip_bits(depth)
+			addr_len = self.load_uint(9)
+			workchain = self.load_int(32)
+			address = self.load_uint(addr_len)
+			return workchain, format(address, 'X')
+		raise Exception("Slice error: external address is not supported")
+	#end define
+
+	def load_remaining_bits(self):
+		n = self.bits_left()
+		return n, self.load_uint(n)
+	#end define
+#end class
+
+
+class Builder:
+	def __init__(self):
+		self.value = 0
+		self.bits = 0
+		self.refs = list()
+	#end define
+
+	def store_uint(self, value, n):
+		if value < 0 or value >> n:
+			raise Exception(f"Builder error: value {value} does not fit in {n} bits")
+		self.value = (self.value << n) | value
+		self.bits += n
+		if self.bits > 1023:
+			raise Exception("Builder error: cell overflow")
+		return self
+	#end define
+
+	def store_int(self, value, n):
+		if value < -(1 << (n - 1)) or value >= (1 << (n - 1)):
+			raise Exception(f"Builder error: value {value} does not fit in {n} bits")
+		return self.store_uint(value % (1 << n), n)
+	#end define
+
+	def store_bit(self, value):
+		return self.store_uint(1 if value else 0, 1)
+	#end define
+
+	def store_bytes(self, data):
+		return self.store_uint(int.from_bytes(data, "big"), len(data) * 8)
+	#end define
+
+	def store_ref(self, cell):
+		if len(self.refs) >= 4:
+			raise Exception("Builder error: too many refs")
+		self.refs.append(cell)
+		return self
+	#end define
+
+	def store_maybe_ref(self, cell):
+		if cell is None:
+			return self.store_bit(0)
+		self.store_bit(1)
+		return self.store_ref(cell)
+	#end define
+
+	def store_var_uint(self, value, len_bits):
+		length = (value.bit_length() + 7) // 8
+		self.store_uint(length, len_bits)
+		return self.store_uint(value, length * 8)
+	#end define
+
+	def store_grams(self, value):
+		return self.store_var_uint(value, 4)
+	#end define
+
+	def store_address(self, workchain, addr):
+		# addr_std without anycast, addr is hex
+		if workchain is None:
+			return self.store_uint(0, 2)
+		self.store_uint(2, 2)
+		self.store_bit(0)
+		self.store_int(workchain, 8)
+		return self.store_uint(int(addr, 16), 256)
+	#end define
+
+	def end_cell(self):
+		length = (self.bits + 7) // 8
+		value = self.value << (length * 8 - self.bits)
+		data = value.to_bytes(length, "big")
+		return Cell(data, self.bits, list(self.refs))
+	#end define
+#end class
+
+
+def read_int(data, offset, size):
+	return int.from_bytes(data[offset:offset+size], "big")
+#end define
+
+def deserialize_boc(data):
+	"""
+	Parse bag of cells, returns list of root cells
+	"""
+	if isinstance(data, str):
+		data = bytes.fromhex(data)
+	magic = data[:4]
+	if magic == BOC_MAGIC:
+		flags = data[4]
+		has_idx = flags & 0x80
+		has_crc = flags & 0x40
+		size = flags & 0x07
+	elif magic in (BOC_MAGIC_IDX, BOC_MAGIC_IDX_CRC):
+		has_idx = True
+		has_crc = magic == BOC_MAGIC_IDX_CRC
+		size = data[4]
+	else:
+		raise Exception("deserialize_boc error: unknown magic")
+	off_bytes = data[5]
+	offset = 6
+	cells_num = read_int(data, offset, size)
+	offset += size
+	roots_num = read_int(data, offset, size)
+	offset += size
+	offset += size # absent
+	tot_cells_size = read_int(data, offset, off_bytes)
+	offset += off_bytes
+	if magic == BOC_MAGIC:
+		root_list = list()
+		for i in range(roots_num):
+			root_list.append(read_int(data, offset, size))
+			offset += size
+	else:
+		root_list = [0]
+	if has_idx:
+		offset += cells_num * off_bytes
+	end = offset + tot_cells_size
+	if has_crc and len(data) < end + 4:
+		raise Exception("deserialize_boc error: data is too short")
+
+	# Cells refer only to the cells with greater index
+	raw_cells = list()
+	for i in range(cells_num):
+		d1 = data[offset]
+		d2 = data[offset+1]
+		offset += 2
+		refs_num = d1 & 7
+		special = bool(d1 & 8)
+		if d1 & 16:
+			# Hashes are stored along with the cell
+			hashes_num = bin(d1 >> 5).count('1') + 1
+			offset += hashes_num * (32 + 2)
+		data_len = (d2 + 1) // 2
+		cell_data = data[offset:offset+data_len]
+		offset += data_len
+		bits = data_len * 8
+		if d2 % 2 == 1:
+			last = cell_data[-1]
+			trailing = (last & -last).bit_length()
+			bits -= trailing
+		refs = list()
+		for j in range(refs_num):
+			refs.append(read_int(data, offset, size))
+			offset += size
+		raw_cells.append((cell_data, bits, refs, special))
+	#end for
+
+	cells = [None] * cells_num
+	for i in range(cells_num - 1, -1, -1):
+		cell_data, bits, refs, special = raw_cells[i]
+		cells[i] = Cell(cell_data, bits, [cells[j] for j in refs], special)
+	return [cells[i] for i in root_list]
+#end define
+
+def serialize_boc(root, crc=False):
+	"""
+	Serialize one root cell to bag of cells without index.
+	Cells are ordered the same way as vm::BagOfCells does, so the result
+	is byte-for-byte equal to `boc>B` / `2 boc+>B` of Fift.
+	"""
+	cells, refs = import_cells(root)
+	order = reorder_cells(cells, refs)
+	count = len(order)
+	index = {old: count - 1 - new for new, old in enumerate(order)}
+	size = max(1, (count.bit_length() + 7) // 8)
+	payload = bytearray()
+	for old in reversed(order):
+		payload += serialize_cell_header(cells[old])
+		for ref in refs[old]:
+			payload += index[ref].to_bytes(size, "big")
+	off_bytes = max(1, (len(payload).bit_length() + 7) // 8)
+	result = bytearray(BOC_MAGIC)
+	result.append(size | (0x40 if crc else 0))
+	result.append(off_bytes)
+	result += count.to_bytes(size, "big")
+	result += (1).to_bytes(size, "big")
+	result += (0).to_bytes(size, "big")
+	result += len(payload).to_bytes(off_bytes, "big")
+	result += index[len(cells) - 1].to_bytes(size, "big")
+	result += payload
+	if crc:
+		result += crc32c(result).to_bytes(4, "little")
+	return bytes(result)
+#end define
+
+def get_cell_key(cell):
+	# Equal cells are stored once, cells with special descendants are compared by identity
+	try:
+		return cell.get_hash()
+	except Exception:
+		return id(cell)
+#end define
+
+def import_cells(root):
+	# Unique cells in post-order (children first), as vm::BagOfCells::import_cell
+	cells = list()
+	index = dict()
+	stack = [(root, False)]
+	while stack:
+		cell, expanded = stack.pop()
+		key = get_cell_key(cell)
+		if key in index:
+			continue
+		if expanded is False:
+			stack.append((cell, True))
+			for ref in reversed(cell.refs):
+				stack.append((ref, False))
+			continue
+		index[key] = len(cells)
+		cells.append(cell)
+	refs = [[index[get_cell_key(ref)] for ref in cell.refs] for cell in cells]
+	return cells, refs
+#end define
+
+def reorder_cells(cells, refs):
+	# Allocation order of vm::BagOfCells::reorder_cells for one root (the last cell)
+	# -1: new, -2: previsited, -3: visited, >= 0: allocated
+	state = [-1] * len(cells)
+	order = list()
+	def revisit(i, force):
+		if state[i] >= 0:
+			return
+		if force == 0:
+			if state[i] != -1:
+				return
+			for j in reversed(refs[i]):
+				revisit(j, 1 if cells[j].special else 0)
+			state[i] = -2
+		elif force == 1:
+			if state[i] == -3:
+				return
+			if cells[i].special:
+				revisit(i, 0)
+			for j in reversed(refs[i]):
+				revisit(j, 1)
+			for j in reversed(refs[i]):
+				revisit(j, 2)
+			state[i] = -3
+		else:
+			state[i] = len(order)
+			order.append(i)
+	#end define
+
+	root = len(cells) - 1
+	revisit(root, 0)
+	revisit(root, 1)
+	revisit(root, 2)
+	return order
+#end define
+
+def serialize_cell_header(cell):
+	d1 = len(cell.refs) + 8 * cell.special
+	d2 = (cell.bits // 8) + ((cell.bits + 7) // 8)
+	data = bytearray(cell.data[:(cell.bits + 7) // 8])
+	if cell.bits % 8:
+		data[-1] |= 1 << (7 - cell.bits % 8)
+	return bytes([d1, d2]) + bytes(data)
+#end define
+
+def load_proof_root(cell):
+	# Virtualize merkle proof: return the cell under the proof
+	if cell.get_type() == CELL_MERKLE_PROOF:
+		return cell.refs[0]
+	return cell
+#end define
+
+
+def load_label(cs, m):
+	# HmLabel ~n m
+	if cs.load_bit() == 0:
+		# hml_short
+		n = 0
+		while cs.load_bit():
+			n += 1
+		return n, cs.load_uint(n)
+	if cs.load_bit() == 0:
+		# hml_long
+		n = cs.load_uint_leq(m)
+		return n, cs.load_uint(n)
+	# hml_same
+	bit = cs.load_bit()
+	n = cs.load_uint_leq(m)
+	return n, ((1 << n) - 1) if bit else 0
+#end define
+
+def parse_hashmap(root, n):
+	"""
+	Walk `Hashmap n X` (also HashmapAug) rooted in a cell or inline in a slice.
+	Returns dict {key: Slice of leaf}. Pruned branches of proofs are skipped.
+	"""
+	result = dict()
+	if root is None:
+		return result
+	stack = [(root, n, 0)]
+	while stack:
+		node, m, prefix = stack.pop()
+		if isinstance(node, Slice):
+			cs = node
+		elif node.is_pruned():
+			continue
+		else:
+			cs = node.begin_parse()
+		length, label = load_label(cs, m)
+		prefix = (prefix << length) | label
+		m -= length
+		if m == 0:
+			result[prefix] = cs
+			continue
+		left = cs.load_ref()
+		right = cs.load_ref()
+		stack.append((right, m - 1, (prefix << 1) | 1))
+		stack.append((left, m - 1, prefix << 1))
+	#end while
+	return result
+#end define
+
+def store_label(builder, length, label, m):
+	# The shortest HmLabel encoding, as the node does
+	k = m.bit_length()
+	if length == 0:
+		builder.store_uint(0, 2)
+	elif length == 1 or (k < 2 * length - 1 and label in (0, (1 << length) - 1)):
+		builder.store_uint(6 + (label & 1), 3)
+		builder.store_uint(length, k)
+	elif k < length:
+		builder.store_uint(2, 2)
+		builder.store_uint(length, k)
+		builder.store_uint(label, length)
+	else:
+		builder.store_uint(0, 1)
+		builder.store_uint((1 << length) - 1, length)
+		builder.store_uint(0, 1)
+		builder.store_uint(label, length)
+#end define
+
+def build_hashmap(items, n):
+	"""
+	Build `Hashmap n X` from {key: store_func}, where store_func(builder)
+	writes the value. Returns root cell or None for an empty dictionary.
+	"""
+	if len(items) == 0:
+		return None
+	return build_hashmap_node(sorted(items.items()), n)
+#end define
+
+def build_hashmap_node(items, m):
+	builder = Builder()
+	first = items[0][0]
+	last = items[-1][0]
+	length = m - (first ^ last).bit_length()
+	store_label(builder, length, first >> (m - length), m)
+	m -= length
+	if m == 0:
+		store_func = items[0][1]
+		store_func(builder)
+		return builder.end_cell()
+	m -= 1
+	mask = (1 << m) - 1
+	left = [(key & mask, value) for key, value in items if not (key >> m) & 1]
+	right = [(key & mask, value) for key, value in items if (key >> m) & 1]
+	builder.store_ref(build_hashmap_node(left, m))
+	builder.store_ref(build_hashmap_node(right, m))
+	return builder.end_cell()
+#end define
+
+def parse_hashmap_e(cs, n):
+	# HashmapE n X stored in the slice
+	root = cs.load_maybe_ref()
+	return parse_hashmap(root, n)
+#end define
+
+def hashmap_lookup(cell, n, key):
+	# Returns Slice of the leaf for `key` or None
+	m = n
+	while cell is not None and not cell.is_pruned():
+		cs = cell.begin_parse()
+		length, label = load_label(cs, m)
+		if length > 0:
+			if (key >> (m - length)) & ((1 << length) - 1) != label:
+				return None
+			m -= length
+			key &= (1 << m) - 1
+		if m == 0:
+			return cs
+		left = cs.load_ref()
+		right = cs.load_ref()
+		m -= 1
+		cell = right if (key >> m) & 1 else left
+		key &= (1 << m) - 1
+	return None
+#end define
+
+def make_crc32c_table():
+	table = list()
+	for i in range(256):
+		value = i
+		for j in range(8):
+			value = (value >> 1) ^ 0x82F63B78 if value & 1 else value >> 1
+		table.append(value)
+	return table
+#end define
+
+CRC32C_TABLE = make_crc32c_table()
+
+def crc32c(data):
+	value = 0xFFFFFFFF
+	for byte in data:
+		value = CRC32C_TABLE[(value ^ byte) & 0xFF] ^ (value >> 8)
+	return value ^ 0xFFFFFFFF
+#end define
+
+def to_signed(value, n):
+	if value >> (n - 1):
+		return value - (1 << n)
+	return value
+#end define
@@ -0,0 +1,131 @@
+import collections
+import threading
+import time
+
+
+class CacheNamespace:
+	def __init__(self, name, ttl, max_size):
+		self.name = name
+		self.ttl = ttl
+		self.max_size = max_size
+		self.entries = collections.OrderedDict() # key -> (time, tag, data), least recently used first
+		self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+	#end define
+#end class
+
+
+class FunctionCache:
+	"""
+	Results of MyTonCore functions with a TTL and an LRU size limit per
+	namespace. A get may ask for a shorter max age than the namespace TTL,
+	the TTL bounds how long an entry is kept at all. An entry set with a
+	tag, e.g. the seqno of the last key block, is returned only for the
+	same tag and regardless of the timeout. An entry set without a tag
+	is subject to the timeout whatever tag the get asks for.
+	"""
+
+	def __init__(self, ttl=600, max_size=256, clock=time.monotonic):
+		self.ttl = ttl
+		self.max_size = max_size
+		self.clock = clock
+		self.namespaces = dict()
+		self.lock = threading.Lock()
+	#end define
+
+	def add_namespace(self, name, ttl=None, max_size=None):
+		with self.lock:
+			namespace = self.get_namespace(name)
+			if ttl is not None:
+				namespace.ttl = ttl
+			if max_size is not None:
+				namespace.max_size = max_size
+				self.evict(namespace)
+	#end define
+
+	def get_namespace(self, name):
+		namespace = self.namespaces.get(name)
+		if namespace is None:
+			namespace = CacheNamespace(name, self.ttl, self.max_size)
+			self.namespaces[name] = namespace
+		return namespace
+	#end define
+
+	def get(self, key, timeout=None, namespace="default", tag=None):
+		with self.lock:
+			namespace = self.get_namespace(namespace)
+			item = namespace.entries.get(key)
+			if item is None:
+				namespace.stats["misses"] += 1
+				return None
+			age = self.clock() - item[0]
+			if age > namespace.ttl:
+				del namespace.entries[key]
+				namespace.stats["expirations"] += 1
+				namespace.stats["misses"] += 1
+				return None
+			if tag is not None and item[1] is not None and item[1] != tag:
+				del namespace.entries[key]
+				namespace.stats["invalidations"] += 1
+				namespace.stats["misses"] += 1
+				return None
+			if (tag is None or item[1] is None) and timeout is not None and age > timeout:
+				namespace.stats["misses"] += 1
+				return None
+			namespace.entries.move_to_end(key)
+			namespace.stats["hits"] += 1
+			return item[2]
+	#end define
+
+	def set(self, key, data, namespace="default", tag=None):
+		with self.lock:
+			namespace = self.get_namespace(namespace)
+			namespace.entries[key] = (self.clock(), tag, data)
+			namespace.entries.move_to_end(key)
+			self.evict(namespace)
+	#end define
+
+	def evict(self, namespace):
+		entries = namespace.entries
+		while len(entries) > namespace.max_size:
+			entries.popitem(last=False)
+			namespace.stats["evictions"] += 1
+	#end define
+
+	def invalidate(self, key=None, namespace=None):
+		# One key, a whole namespace, or everything
+		with self.lock:
+			if namespace is None:
+				namespaces = list(self.namespaces.values())
+			else:
+				namespaces = [self.get_namespace(namespace)]
+			for item in namespaces:
+				if key is None:
+					item.stats["invalidations"] += len(item.entries)
+					item.entries.clear()
+				elif item.entries.pop(key, None) is not None:
+					item.stats["invalidations"] += 1
+	#end define
+
+	def purge(self):
+		# Drop expired entries, get only notices the ones it is asked for
+		with self.lock:
+			now = self.clock()
+			for namespace in self.namespaces.values():
+				expired = [key for key, item in namespace.entries.items() if now - item[0] > namespace.ttl]
+				for key in expired:
+					del namespace.entries[key]
+				namespace.stats["expirations"] += len(expired)
+	#end define
+
+	def get_stats(self):
+		result = dict()
+		with self.lock:
+			for name, namespace in self.namespaces.items():
+				item = dict(namespace.stats)
+				item["size"] = len(namespace.entries)
+				item["max_size"] = namespace.max_size
+				item["ttl"] = namespace.ttl
+				result[name] = item
+		return result
+	#end define
+#end class
@@ -0,0 +1,158 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+
+# Read-only MyTonCore methods the daemon serves from its caches
+CACHE_SERVER_METHODS = (
+	"GetValidatorStatus",
+	"GetConfig",
+	"GetConfig15",
+	"GetConfig17",
+	"GetConfig32",
+	"GetConfig34",
+	"GetConfig36",
+	"GetFullConfigAddr",
+	"GetFullElectorAddr",
+	"GetActiveElectionId",
+	"GetRootWorkchainEnabledTime",
+	"GetShardsNumber",
+	"GetOnlineValidators",
+	"GetValidatorsList",
+	"GetElectionEntries",
+	"GetOffers",
+	"GetOffersNumber",
+	"GetComplaints",
+	"GetComplaintsNumber",
+	"GetLiteClientStats",
+	"GetPerfStats",
+)
+MAX_REQUEST_SIZE = 64 * 1024
+
+
+class CacheServerError(Exception):
+	pass
+#end class
+
+
+class CacheRequestHandler(socketserver.StreamRequestHandler):
+	def handle(self):
+		line = self.rfile.readline(MAX_REQUEST_SIZE)
+		response = self.server.cache_server.handle_request(line)
+		self.wfile.write(response + b'\n')
+	#end define
+#end class
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+#end class
+
+
+class CacheServer:
+	"""
+	Serves CACHE_SERVER_METHODS of the daemon's MyTonCore over a Unix socket,
+	so that mytonctrl reuses the data the daemon has already fetched.
+	One json request per connection: {"method": ..., "args": [...], "kwargs": {...}}.
+	"""
+
+	def __init__(self, ton, path):
+		self.ton = ton
+		self.path = path
+		self.server = None
+		self.thread = None
+		self.stats = {"requests": 0, "errors": 0}
+	#end define
+
+	def start(self):
+		if os.path.exists(self.path):
+			os.remove(self.path) # left by a previous run
+		self.server = UnixServer(self.path, CacheRequestHandler)
+		os.chmod(self.path, 0o600)
+		self.server.cache_server = self
+		self.thread = threading.Thread(target=self.server.serve_forever, name="CacheServer", daemon=True)
+		self.thread.start()
+	#end define
+
+	def stop(self):
+		if self.server is None:
+			return
+		self.server.shutdown()
+		self.server.server_close()
+		self.server = None
+		if os.path.exists(self.path):
+			os.remove(self.path)
+	#end define
+
+	def handle_request(self, line):
+		self.stats["requests"] += 1
+		try:
+			request = json.loads(line)
+			method = request["method"]
+			if method not in CACHE_SERVER_METHODS:
+				raise CacheServerError(f"method {method} is not served")
+			result = getattr(self.ton, method)(*request.get("args", []), **request.get("kwargs", {}))
+			return json.dumps({"result": result, "time": time.time()}).encode("utf-8")
+		except Exception as ex:
+			self.stats["errors"] += 1
+			return json.dumps({"error": f"{type(ex).__name__}: {ex}"}).encode("utf-8")
+	#end define
+#end class
+
+
+class CacheClient:
+	"""
+	Calls the daemon's CacheServer. A missing or failed server raises
+	CacheServerError and is not tried again for `retry_after` seconds.
+	"""
+
+	def __init__(self, path, timeout=10, retry_after=30, object_hook=None):
+		self.path = path
+		self.timeout = timeout
+		self.retry_after = retry_after
+		self.object_hook = object_hook
+		self.down_since = None
+	#end define
+
+	def call(self, method, args=(), kwargs=None):
+		if self.down_since is not None and time.time() - self.down_since < self.retry_after:
+			raise CacheServerError("cache server is down")
+		request = json.dumps({"method": method, "args": list(args), "kwargs": kwargs or dict()}).encode("utf-8")
+		try:
+			with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+				sock.settimeout(self.timeout)
+				sock.connect(self.path)
+				sock.sendall(request + b'\n')
+				sock.shutdown(socket.SHUT_WR)
+				chunks = list()
+				while True:
+					chunk = sock.recv(65536)
+					if not chunk:
+						break
+					chunks.append(chunk)
+			response = json.loads(b''.join(chunks), object_hook=self.object_hook)
+		except (OSError, ValueError) as ex:
+			self.down_since = time.time()
+			raise CacheServerError(f"cache server is not available: {ex}")
+		self.down_since = None
+		if "error" in response:
+			raise CacheServerError(response["error"])
+		return response["result"]
+	#end define
+
+	def wrap(self, name, func):
+		# `func` with the daemon's result, or its own when the daemon can not answer
+		def method(*args, **kwargs):
+			try:
+				return self.call(name, args, kwargs)
+			except CacheServerError:
+				return func(*args, **kwargs)
+		#end define
+
+		method.__name__ = name
+		return method
+	#end define
+#end class
@@ -0,0 +1,181 @@
+import collections
+import concurrent.futures
+import json
+import subprocess
+import sys
+import threading
+import time
+
+
+RUNNER_FILES = ("liteclient.py", "validator_console.py", "fift.py", "singleflight.py", "call_stats.py", "contextlib.py")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10) # seconds
+
+
+class Histogram:
+	def __init__(self, window=500):
+		self.counts = [0] * (len(BUCKETS) + 1)
+		self.window = collections.deque(maxlen=window)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.errors = 0
+		self.timeouts = 0
+		self.bytes = 0
+	#end define
+
+	def add(self, duration, output_bytes, status):
+		i = 0
+		while i < len(BUCKETS) and duration > BUCKETS[i]:
+			i += 1
+		self.counts[i] += 1
+		self.window.append(duration)
+		self.count += 1
+		self.total += duration
+		self.max = max(self.max, duration)
+		self.bytes += output_bytes
+		if status == "error":
+			self.errors += 1
+		elif status == "timeout":
+			self.timeouts += 1
+	#end define
+
+	def get_percentile(self, percentile):
+		# Over the last `window` calls
+		values = sorted(self.window)
+		if len(values) == 0:
+			return None
+		return round(values[min(len(values) - 1, int(len(values) * percentile / 100))], 4)
+	#end define
+
+	def to_dict(self):
+		return {
+			"count": self.count,
+			"errors": self.errors,
+			"timeouts": self.timeouts,
+			"bytes": self.bytes,
+			"total": round(self.total, 3),
+			"max": round(self.max, 3),
+			"p50": self.get_percentile(50),
+			"p95": self.get_percentile(95),
+			"buckets": list(self.counts),
+		}
+	#end define
+#end class
+
+
+class TracedCall:
+	def __init__(self, stats, tool, cmd, index):
+		self.stats = stats
+		self.tool = tool
+		self.cmd = cmd
+		self.index = index
+		self.output = None
+		self.output_bytes = None # set by streaming calls instead of output
+		self.caller = get_caller()
+		self.start = None
+	#end define
+
+	def __enter__(self):
+		self.start = time.time()
+		return self
+	#end define
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		if exc_type is None:
+			status = "ok"
+		elif issubclass(exc_type, (subprocess.TimeoutExpired, TimeoutError, concurrent.futures.TimeoutError)):
+			status = "timeout"
+		else:
+			status = "error"
+		output_bytes = self.output_bytes
+		if output_bytes is None:
+			output_bytes = len(self.output) if self.output else 0
+		self.stats.record(self.tool, self.cmd, time.time() - self.start, output_bytes, status, self.index, self.caller)
+		return False
+	#end define
+#end class
+
+
+class CallStats:
+	"""
+	Rolling statistics of lite-client, validator-engine-console and fift
+	calls by command verb and by the MyTonCore method that made the call.
+	"""
+
+	def __init__(self, local):
+		self.local = local
+		self.verbs = dict()
+		self.callers = dict()
+		self.started = time.time()
+		self.lock = threading.Lock()
+	#end define
+
+	def trace(self, tool, cmd, index=None):
+		return TracedCall(self, tool, cmd, index)
+	#end define
+
+	def record(self, tool, cmd, duration, output_bytes=0, status="ok", index=None, caller=None):
+		verb = get_verb(cmd)
+		with self.lock:
+			self.get_histogram(self.verbs, (tool, verb)).add(duration, output_bytes, status)
+			self.get_histogram(self.callers, (tool, caller)).add(duration, output_bytes, status)
+		trace_path = self.local.db.get("callTracePath")
+		if trace_path:
+			self.write_trace(trace_path, tool, verb, duration, output_bytes, status, index, caller)
+	#end define
+
+	def get_histogram(self, data, key):
+		histogram = data.get(key)
+		if histogram is None:
+			histogram = Histogram()
+			data[key] = histogram
+		return histogram
+	#end define
+
+	def write_trace(self, trace_path, tool, verb, duration, output_bytes, status, index, caller):
+		item = {
+			"timestamp": round(time.time(), 3),
+			"tool": tool,
+			"verb": verb,
+			"index": index,
+			"duration": round(duration, 4),
+			"bytes": output_bytes,
+			"status": status,
+			"caller": caller,
+		}
+		line = json.dumps(item) + '\n'
+		with self.lock:
+			with open(trace_path, 'a') as file:
+				file.write(line)
+	#end define
+
+	def get_snapshot(self):
+		with self.lock:
+			verbs = [dict(tool=tool, verb=verb, **histogram.to_dict()) for (tool, verb), histogram in self.verbs.items()]
+			callers = [dict(tool=tool, caller=caller, **histogram.to_dict()) for (tool, caller), histogram in self.callers.items()]
+		verbs.sort(key=lambda item: item["total"], reverse=True)
+		callers.sort(key=lambda item: item["total"], reverse=True)
+		return {"started": int(self.started), "verbs": verbs, "callers": callers}
+	#end define
+#end class
+
+
+def get_verb(cmd):
+	if isinstance(cmd, list):
+		cmd = cmd[0] if cmd else ''
+	return str(cmd).split(' ')[0]
+#end define
+
+def get_caller():
+	# The nearest MyTonCore method on the stack, otherwise the nearest function outside the runners
+	fallback = None
+	frame = sys._getframe(2)
+	while frame is not None:
+		filename = frame.f_code.co_filename
+		if filename.endswith("mytoncore.py"):
+			return frame.f_code.co_name
+		if fallback is None and not filename.endswith(RUNNER_FILES):
+			fallback = frame.f_code.co_name
+		frame = frame.f_back
+	return fallback
+#end define
@@ -0,0 +1,76 @@
+import json
+import threading
+import types
+
+
+# Code hashes of the wallet, pool and controller contracts mytonctrl knows
+CODE_HASHES = types.MappingProxyType({
+	"v1r1": "d670136510daff4fee1889b8872c4c1e89872ffa1fe58a23a5f5d99cef8edf32",
+	"v1r2": "2705a31a7ac162295c8aed0761cc6e031ab65521dd7b4a14631099e02de99e18",
+	"v1r3": "c3b9bb03936742cfbb9dcdd3a5e1f3204837f613ef141f273952aa41235d289e",
+	"v2r1": "fa44386e2c445f1edf64702e893e78c3f9a687a5a01397ad9e3994ee3d0efdbf",
+	"v2r2": "d5e63eff6fa268d612c0cf5b343c6674b7312c58dfd9ffa1b536f2014a919164",
+	"v3r1": "4505c335cb60f221e58448c71595bb6d7c980c01a798b392ebb53d86cb6061dc",
+	"v3r2": "8a6d73bdd8704894f17d8c76ce6139034b8a51b1802907ca36283417798a219b",
+	"v4": "7ae380664c513769eaa5c94f9cd5767356e3f7676163baab66a4b73d5edab0e5",
+	"hv1": "fc8e48ed7f9654ba76757f52cc6031b2214c02fab9e429ffa0340f5575f9f29c",
+	"pool": "399838da9489139680e90fd237382e96ba771fdf6ea27eb7d513965b355038b4",
+	"spool": "fc2ae44bcaedfa357d0091769aabbac824e1c28f14cc180c0b52a57d83d29054",
+	"spool_r2": "42bea8fea43bf803c652411976eb2981b9bdb10da84eb788a63ea7a01f2a044d",
+	"liquid_pool_r1": "82bc5760719c34395f80df76c42dc5d287f08f6562c643601ebed6944302dcc2",
+	"liquid_pool_r2": "95abec0a66ac63b0fbcf28466eb8240ddcd88f97300691511d9c9975d5521e4a",
+	"liquid_pool_r3": "22a023bc75b649ff2b5b183cd0d34cd413e6e27ee6d6ad0787f75ad39787ed4e",
+	"liquid_pool_r4": "77282b45fd7cfc72ca68fe97af33ad10078730ceaf55e20534c9526c48d602d2",
+	"controller_r1": "0949cf92963dd27bb1e6bf76487807f20409131b6110acbc18b7fbb90280ccf0",
+	"controller_r2": "01118b9553151fb9bc81704a4b3e0fc7b899871a527d44435a51574806863e2c",
+	"controller_r3": "e4d8ce8ff7b4b60c76b135eb8702ce3c86dc133fcee7d19c7aa18f71d9d91438",
+	"controller_r4": "dec125a4850c4ba24668d84252b04c6ad40abf5c9d413a429b56bfff09ea25d4",
+})
+
+
+class CodeHashRegistry:
+	"""
+	Version of a contract by its code hash. Lookups read an immutable map
+	without a lock, register() replaces the map as a whole.
+	"""
+
+	def __init__(self, code_hashes):
+		self.lock = threading.Lock()
+		self.versions = types.MappingProxyType(dict())
+		self.register(code_hashes)
+	#end define
+
+	def register(self, code_hashes):
+		# {version: code hash}, the same hash can not be registered under another version
+		with self.lock:
+			versions = dict(self.versions)
+			for version, code_hash in code_hashes.items():
+				code_hash = code_hash.lower()
+				known = versions.get(code_hash)
+				if known is not None and known != version:
+					raise ValueError(f"code hash {code_hash} is already registered as {known}, not {version}")
+				versions[code_hash] = version
+			self.versions = types.MappingProxyType(versions)
+	#end define
+
+	def register_file(self, path):
+		# json file of {version: code hash}
+		with open(path) as file:
+			self.register(json.load(file))
+	#end define
+
+	def get_version(self, code_hash):
+		if code_hash is None:
+			return None
+		return self.versions.get(code_hash.lower())
+	#end define
+
+	def get_versions(self, code_hashes):
+		# One lookup table for a whole wallet or pool list
+		versions = self.versions
+		return [versions.get(item.lower()) if item is not None else None for item in code_hashes]
+	#end define
+#end class
+
+
+code_hash_registry = CodeHashRegistry(CODE_HASHES)
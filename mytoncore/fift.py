@@ -1,5 +1,7 @@
 import subprocess
 
+from mytoncore.call_stats import CallStats
+
 
 class Fift:
 	def __init__(self, local):
@@ -7,6 +9,7 @@ class Fift:
 		self.appPath = None
 		self.libsPath = None
 		self.smartcontsPath = None
+		self.stats = CallStats(local)
 	#end define
 
 	def Run(self, args, **kwargs):
@@ -15,13 +18,16 @@ class Fift:
 		for i in range(len(args)):
 			args[i] = str(args[i])
 		includePath = self.libsPath + ':' + self.smartcontsPath
+		script = args[0] if args else ''
 		args = [self.appPath, "-I", includePath, "-s"] + args
-		process = subprocess.run(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
-		output = process.stdout.decode("utf-8")
-		err = process.stderr.decode("utf-8")
-		if len(err) > 0:
-			self.local.add_log("args: {args}".format(args=args), "error")
-			raise Exception("Fift error: {err}".format(err=err))
+		with self.stats.trace("fift", script) as call:
+			process = subprocess.run(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+			output = process.stdout.decode("utf-8")
+			err = process.stderr.decode("utf-8")
+			call.output = output
+			if len(err) > 0:
+				self.local.add_log("args: {args}".format(args=args), "error")
+				raise Exception("Fift error: {err}".format(err=err))
 		return output
 	#end define
 #end class
@@ -8,8 +8,11 @@ import json
 import base64
 import requests
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait
 
 from mytoncore.mytoncore import MyTonCore
+from mytoncore.liteserver_router import parse_last_seqno
+from mytoncore.cache_server import CacheServer
 from mytonctrl.utils import fix_git_config
 from mytoninstaller.config import GetConfig
 from mypylib.mypylib import (
@@ -520,6 +523,15 @@ def save_past_events(local, ton):
     local.try_function(ton.GetValidatorsList, args=[True])  # cache past vl
 
 
+def ScanLiteServer(ton, index, timeout):
+    start = time.time()
+    result = ton.liteClient.Run("last", index=index, pooled=False, timeout=timeout)
+    rtt = time.time() - start
+    seqno = parse_last_seqno(result)
+    return rtt, seqno
+# end define
+
+
 def ScanLiteServers(local, ton):
     # Считать список серверов
     filePath = ton.liteClient.configPath
@@ -528,28 +540,65 @@ def ScanLiteServers(local, ton):
     file.close()
     data = json.loads(text)
 
-    # Пройтись по серверам
-    result = list()
+    # Опросить серверы параллельно, общее время ограничено
     liteservers = data.get("liteservers")
+    workers = local.db.get("liteServersScanWorkers", 8)
+    deadline = local.db.get("liteServersScanDeadline", 20)
+    timeout = local.db.liteclient_timeout if local.db.liteclient_timeout else 3
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = dict()
     for index in range(len(liteservers)):
-        try:
-            ton.liteClient.Run("last", index=index)
-            result.append(index)
-        except:
-            pass
+        future = executor.submit(ScanLiteServer, ton, index, timeout)
+        futures[future] = index
+    done, not_done = wait(futures, timeout=deadline)
+    for future in not_done:
+        future.cancel()
+    executor.shutdown(wait=False)
+
+    scan = list()
+    for future, index in futures.items():
+        item = {"index": index, "ok": False, "rtt": None, "seqno": None}
+        if future in done and future.exception() is None:
+            item["ok"] = True
+            item["rtt"], item["seqno"] = future.result()
+        scan.append(item)
     # end for
 
-    # Записать данные в базу
+    # Отсортировать: отстающие по seqno и недоступные в конце
+    seqnos = [item["seqno"] for item in scan if item["seqno"] is not None]
+    max_seqno = max(seqnos) if seqnos else None
+    for item in scan:
+        item["lag"] = max_seqno - item["seqno"] if item["seqno"] is not None else None
+    scan.sort(key=lambda item: (not item["ok"], (item["lag"] or 0) > 10, item["rtt"] or 0))
+    result = [item["index"] for item in scan if item["ok"] and (item["lag"] or 0) <= 10]
+
+    # Записать данные в базу, статистика отдается через cache server
     local.db["liteServers"] = result
+    ton.liteClient.scan = scan
+    for key in ("liteServersScan", "liteServersRouter", "liteClientHedge", "liteClientSingleflight"):
+        local.db.pop(key, None) # written by older versions
+# end define
+
+
+def PurgeFunctionCache(local, ton):
+    # Статистика для команды perf в mytonctrl отдается через cache server
+    ton.cache.purge()
+    for key in ("callStats", "functionCache", "blockCache", "localStore"):
+        local.db.pop(key, None) # written by older versions
 # end define
 
 
 def General(local):
     local.add_log("start General function", "debug")
     ton = MyTonCore(local)
+    ton.syncState.start()
     # scanner = Dict()
     # scanner.Run()
 
+    # Answer mytonctrl from the daemon caches
+    if local.db.get("useCacheServer") is not False:
+        CacheServer(ton, ton.GetCacheServerPath()).start()
+
     # Start threads
     local.start_cycle(Statistics, sec=10, args=(local, ))
     local.start_cycle(Telemetry, sec=60, args=(local, ton, ))
@@ -569,6 +618,7 @@ def General(local):
     local.start_cycle(Slashing, sec=t, args=(local, ton, ))
 
     local.start_cycle(ScanLiteServers, sec=60, args=(local, ton,))
+    local.start_cycle(PurgeFunctionCache, sec=60, args=(local, ton,))
 
     from modules.custom_overlays import CustomOverlayModule
     local.start_cycle(CustomOverlayModule(ton, local).custom_overlays, sec=60, args=())
@@ -0,0 +1,505 @@
+import asyncio
+import hashlib
+import struct
+import threading
+import time
+
+from mytoncore.adnl import AdnlTcpClient, tl_id, tl_pack_bytes, tl_unpack_bytes
+from mytoncore.boc import (
+	Builder,
+	deserialize_boc,
+	serialize_boc,
+	load_proof_root,
+	parse_hashmap,
+	parse_hashmap_e,
+	hashmap_lookup,
+)
+
+
+LITE_SERVER_QUERY = tl_id("liteServer.query data:bytes = Object")
+LITE_SERVER_ERROR = tl_id("liteServer.error code:int message:string = liteServer.Error")
+GET_MASTERCHAIN_INFO = tl_id("liteServer.getMasterchainInfo = liteServer.MasterchainInfo")
+GET_ACCOUNT_STATE = tl_id("liteServer.getAccountState id:tonNode.blockIdExt account:liteServer.accountId = liteServer.AccountState")
+RUN_SMC_METHOD = tl_id("liteServer.runSmcMethod mode:# id:tonNode.blockIdExt account:liteServer.accountId method_id:long params:bytes = liteServer.RunMethodResult")
+GET_ALL_SHARDS_INFO = tl_id("liteServer.getAllShardsInfo id:tonNode.blockIdExt = liteServer.AllShardsInfo")
+LOOKUP_BLOCK = tl_id("liteServer.lookupBlock mode:# id:tonNode.blockId lt:mode.1?long utime:mode.2?int = liteServer.BlockHeader")
+LIST_BLOCK_TRANSACTIONS = tl_id("liteServer.listBlockTransactions id:tonNode.blockIdExt mode:# count:# after:mode.7?liteServer.transactionId3 reverse_order:mode.6?true want_proof:mode.5?true = liteServer.BlockTransactions")
+GET_CONFIG_PARAMS = tl_id("liteServer.getConfigParams mode:# id:tonNode.blockIdExt param_list:vector int = liteServer.ConfigInfo")
+BOOL_TRUE = tl_id("boolTrue = Bool")
+
+MAX_TRANSACTIONS_PER_QUERY = 256
+LAST_BLOCK_TTL = 3
+
+
+class BlockIdExt:
+	def __init__(self, workchain, shard, seqno, root_hash=b'', file_hash=b''):
+		self.workchain = workchain
+		self.shard = shard % (1 << 64)
+		self.seqno = seqno
+		self.root_hash = root_hash
+		self.file_hash = file_hash
+	#end define
+
+	def pack(self):
+		return struct.pack("<iqi", self.workchain, to_signed64(self.shard), self.seqno) + self.root_hash + self.file_hash
+	#end define
+
+	def pack_short(self):
+		return struct.pack("<iqi", self.workchain, to_signed64(self.shard), self.seqno)
+	#end define
+
+	@classmethod
+	def unpack(cls, data, offset):
+		workchain, shard, seqno = struct.unpack_from("<iqi", data, offset)
+		offset += 16
+		root_hash = data[offset:offset+32]
+		file_hash = data[offset+32:offset+64]
+		return cls(workchain, shard, seqno, root_hash, file_hash), offset + 64
+	#end define
+
+	def __str__(self):
+		# The same format as lite-client prints
+		shard = format(self.shard, "016X")
+		root_hash = self.root_hash.hex().upper()
+		file_hash = self.file_hash.hex().upper()
+		return f"({self.workchain},{shard},{self.seqno}):{root_hash}:{file_hash}"
+	#end define
+#end class
+
+
+def to_signed64(value):
+	if value >= 1 << 63:
+		value -= 1 << 64
+	return value
+#end define
+
+def pack_account_id(workchain, addr):
+	return struct.pack("<i", workchain) + bytes.fromhex(addr)
+#end define
+
+def get_method_id(method):
+	if isinstance(method, int):
+		return method
+	crc = 0
+	for byte in method.encode("utf-8"):
+		# crc16 xmodem
+		crc ^= byte << 8
+		for i in range(8):
+			crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+			crc &= 0xffff
+	return crc | 0x10000
+#end define
+
+
+class LiteServerError(Exception):
+	def __init__(self, code, message):
+		self.code = code
+		super().__init__(f"LiteServer error: {code} {message}")
+	#end define
+#end class
+
+
+class LiteServerClient:
+	"""
+	In-process lite protocol client. All queries of one process go through
+	one multiplexed ADNL connection per liteserver, driven by its own event loop.
+	"""
+
+	def __init__(self):
+		self.loop = None
+		self.thread = None
+		self.clients = dict()
+		self.lock = threading.Lock()
+		self.last_block = dict()
+	#end define
+
+	def start(self):
+		with self.lock:
+			if self.thread is not None:
+				return
+			self.loop = asyncio.new_event_loop()
+			self.thread = threading.Thread(target=self.loop.run_forever, name="LiteServerClient", daemon=True)
+			self.thread.start()
+	#end define
+
+	def run(self, coro, timeout):
+		self.start()
+		future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+		return future.result(timeout + 1)
+	#end define
+
+	def get_client(self, host, port, pubkey):
+		key = (host, port)
+		client = self.clients.get(key)
+		if client is None:
+			client = AdnlTcpClient(host, port, pubkey)
+			self.clients[key] = client
+		return client
+	#end define
+
+	async def query(self, server, data, timeout):
+		client = self.get_client(*server)
+		answer = await client.query(LITE_SERVER_QUERY + tl_pack_bytes(data), timeout)
+		if answer[:4] == LITE_SERVER_ERROR:
+			code = struct.unpack_from("<i", answer, 4)[0]
+			message, offset = tl_unpack_bytes(answer, 8)
+			raise LiteServerError(code, message.decode("utf-8", errors="replace"))
+		return answer
+	#end define
+
+	async def get_masterchain_info(self, server, timeout):
+		answer = await self.query(server, GET_MASTERCHAIN_INFO, timeout)
+		block, offset = BlockIdExt.unpack(answer, 4)
+		self.last_block[server[:2]] = (block, time.time())
+		return block
+	#end define
+
+	async def get_last_block(self, server, timeout):
+		# As lite-client, use the last masterchain block known to this client
+		buff = self.last_block.get(server[:2])
+		if buff is None or time.time() - buff[1] > LAST_BLOCK_TTL:
+			return await self.get_masterchain_info(server, timeout)
+		return buff[0]
+	#end define
+
+	async def get_account_state(self, server, workchain, addr, timeout):
+		block = await self.get_last_block(server, timeout)
+		data = GET_ACCOUNT_STATE + block.pack() + pack_account_id(workchain, addr)
+		answer = await self.query(server, data, timeout)
+		offset = 4
+		block, offset = BlockIdExt.unpack(answer, offset)
+		shard_block, offset = BlockIdExt.unpack(answer, offset)
+		shard_proof, offset = tl_unpack_bytes(answer, offset)
+		proof, offset = tl_unpack_bytes(answer, offset)
+		state, offset = tl_unpack_bytes(answer, offset)
+		return parse_account_state(state, proof, workchain, addr)
+	#end define
+
+	async def run_smc_method(self, server, workchain, addr, method, params, timeout):
+		block = await self.get_last_block(server, timeout)
+		mode = 0x4 # result only
+		data = RUN_SMC_METHOD + struct.pack("<I", mode) + block.pack() + pack_account_id(workchain, addr)
+		data += struct.pack("<q", get_method_id(method)) + tl_pack_bytes(serialize_vm_stack(params))
+		answer = await self.query(server, data, timeout)
+		offset = 4
+		mode = struct.unpack_from("<I", answer, offset)[0]
+		offset += 4
+		block, offset = BlockIdExt.unpack(answer, offset)
+		shard_block, offset = BlockIdExt.unpack(answer, offset)
+		for flag in (0, 0, 1, 3, 4):
+			if mode & (1 << flag):
+				buff, offset = tl_unpack_bytes(answer, offset)
+		exit_code = struct.unpack_from("<i", answer, offset)[0]
+		offset += 4
+		result = None
+		if mode & 0x4:
+			buff, offset = tl_unpack_bytes(answer, offset)
+			result = parse_vm_stack(buff)
+		return {"exit_code": exit_code, "result": result}
+	#end define
+
+	async def get_config_params(self, server, params, timeout):
+		# Returns the block the params were read at and the params by id
+		block = await self.get_last_block(server, timeout)
+		data = GET_CONFIG_PARAMS + struct.pack("<I", 0) + block.pack()
+		data += struct.pack("<I", len(params)) + b''.join(struct.pack("<i", item) for item in params)
+		answer = await self.query(server, data, timeout)
+		offset = 8
+		block, offset = BlockIdExt.unpack(answer, offset)
+		state_proof, offset = tl_unpack_bytes(answer, offset)
+		config_proof, offset = tl_unpack_bytes(answer, offset)
+		return block, parse_config_proof(config_proof, params)
+	#end define
+
+	async def get_all_shards_info(self, server, block, timeout):
+		if block is None:
+			block = await self.get_masterchain_info(server, timeout)
+		answer = await self.query(server, GET_ALL_SHARDS_INFO + block.pack(), timeout)
+		offset = 4
+		block, offset = BlockIdExt.unpack(answer, offset)
+		proof, offset = tl_unpack_bytes(answer, offset)
+		data, offset = tl_unpack_bytes(answer, offset)
+		return parse_shard_hashes(data)
+	#end define
+
+	async def lookup_block(self, server, workchain, shard, seqno, timeout):
+		block = BlockIdExt(workchain, shard, seqno)
+		data = LOOKUP_BLOCK + struct.pack("<I", 1) + block.pack_short()
+		answer = await self.query(server, data, timeout)
+		block, offset = BlockIdExt.unpack(answer, 4)
+		return block
+	#end define
+
+	async def list_block_transactions(self, server, block, count, timeout):
+		result = list()
+		after = None
+		while len(result) < count:
+			mode = 0x7
+			req_count = min(count - len(result), MAX_TRANSACTIONS_PER_QUERY)
+			data = LIST_BLOCK_TRANSACTIONS + block.pack()
+			if after is not None:
+				mode |= 0x80
+				data += struct.pack("<I", mode) + struct.pack("<I", req_count) + bytes.fromhex(after["account"]) + struct.pack("<q", after["lt"])
+			else:
+				data += struct.pack("<I", mode) + struct.pack("<I", req_count)
+			answer = await self.query(server, data, timeout)
+			offset = 4
+			answer_block, offset = BlockIdExt.unpack(answer, offset)
+			offset += 4 # req_count
+			incomplete = answer[offset:offset+4] == BOOL_TRUE
+			offset += 4
+			ids_num = struct.unpack_from("<I", answer, offset)[0]
+			offset += 4
+			for i in range(ids_num):
+				id_mode = struct.unpack_from("<I", answer, offset)[0]
+				offset += 4
+				item = dict()
+				if id_mode & 0x1:
+					item["account"] = answer[offset:offset+32].hex().upper()
+					offset += 32
+				if id_mode & 0x2:
+					item["lt"] = struct.unpack_from("<q", answer, offset)[0]
+					offset += 8
+				if id_mode & 0x4:
+					item["hash"] = answer[offset:offset+32].hex().upper()
+					offset += 32
+				result.append(item)
+			if not incomplete or ids_num == 0:
+				break
+			after = result[-1]
+		#end while
+		return result
+	#end define
+
+	def close(self):
+		for client in self.clients.values():
+			if self.loop is not None:
+				self.loop.call_soon_threadsafe(client.close)
+		self.clients.clear()
+	#end define
+#end class
+
+
+def parse_account_state(state, proof, workchain, addr):
+	if len(state) == 0:
+		return None
+	root = deserialize_boc(state)[0]
+	cs = root.begin_parse()
+	if cs.load_bit() == 0:
+		# account_none
+		return None
+	account = dict()
+	account_workchain, address = cs.load_address()
+	account["workchain"] = account_workchain
+	account["address"] = address
+
+	# storage_stat:StorageInfo
+	cs.load_var_uint(3) # cells
+	cs.load_var_uint(3) # bits
+	extra = cs.load_uint(3)
+	if extra == 1:
+		cs.skip_bits(256) # storage_extra_info
+	elif extra > 1:
+		cs.skip_bits(extra * 8) # old public_cells
+	cs.skip_bits(32) # last_paid
+	if cs.load_bit():
+		cs.load_grams() # due_payment
+
+	# storage:AccountStorage
+	cs.skip_bits(64) # last_trans_lt
+	account["balance"] = cs.load_grams()
+	cs.load_maybe_ref() # extra currencies
+	code = None
+	if cs.load_bit():
+		account["status"] = "active"
+		if cs.load_bit():
+			cs.skip_bits(5) # split_depth
+		if cs.load_bit():
+			cs.skip_bits(2) # special
+		code = cs.load_maybe_ref()
+		account["data"] = cs.load_maybe_ref()
+	elif cs.load_bit():
+		account["status"] = "frozen"
+	else:
+		account["status"] = "uninit"
+	account["code"] = code
+	account["code_hash"] = get_printed_code_hash(code)
+	account["lt"], account["hash"] = parse_account_proof(proof, addr)
+	return account
+#end define
+
+def get_printed_code_hash(code):
+	# Hash of concatenated `x{...}` lines as lite-client prints the code
+	if code is None:
+		return None
+	body = ""
+	for cell in code.iter_tree():
+		buff = cell.to_hex_str().replace('_', '')
+		if len(buff) % 2 == 1:
+			buff = "0" + buff
+		body += buff
+	return hashlib.sha256(bytes.fromhex(body)).hexdigest()
+#end define
+
+def parse_account_proof(proof, addr):
+	# Last transaction lt and hash from ShardAccount in the state proof
+	try:
+		roots = deserialize_boc(proof)
+		state = load_proof_root(roots[-1])
+		accounts = state.refs[1].begin_parse()
+		root = accounts.load_maybe_ref()
+		cs = hashmap_lookup(root, 256, int(addr, 16))
+		if cs is None:
+			return None, None
+		cs.load_uint(5) # split_depth
+		cs.load_grams()
+		cs.load_maybe_ref()
+		cs.load_ref() # account
+		trans_hash = cs.load_hex(256)
+		trans_lt = cs.load_uint(64)
+		return str(trans_lt), trans_hash
+	except Exception:
+		return None, None
+#end define
+
+def parse_config_proof(config_proof, params):
+	result = dict()
+	state = load_proof_root(deserialize_boc(config_proof)[0])
+	cs = state.refs[3].begin_parse() # McStateExtra
+	cs.skip_bits(16)
+	cs.load_maybe_ref() # shard_hashes
+	cs.skip_bits(256) # config_addr
+	config = cs.load_ref()
+	for param in params:
+		leaf = hashmap_lookup(config, 32, param)
+		result[param] = leaf.load_ref() if leaf is not None else None
+	return result
+#end define
+
+def parse_shard_hashes(data):
+	shards = list()
+	root = deserialize_boc(data)[0]
+	workchains = parse_hashmap_e(root.begin_parse(), 32)
+	for workchain, cs in sorted(workchains.items()):
+		workchain = workchain - (1 << 32) if workchain >> 31 else workchain
+		# BinTree ShardDescr, left to right
+		stack = [(cs.load_ref(), 0, 0)]
+		while stack:
+			cell, prefix, depth = stack.pop()
+			leaf = cell.begin_parse()
+			if leaf.load_bit():
+				stack.append((cell.refs[1], (prefix << 1) | 1, depth + 1))
+				stack.append((cell.refs[0], prefix << 1, depth + 1))
+				continue
+			shard = (prefix << (64 - depth)) | (1 << (63 - depth))
+			leaf.skip_bits(4)
+			seqno = leaf.load_uint(32)
+			leaf.skip_bits(32 + 64 + 64)
+			root_hash = leaf.load_bytes(32)
+			file_hash = leaf.load_bytes(32)
+			shards.append(BlockIdExt(workchain, shard, seqno, root_hash, file_hash))
+	return shards
+#end define
+
+def parse_validator_set(cell):
+	cs = cell.begin_parse()
+	tag = cs.load_uint(8)
+	result = dict()
+	result["startWorkTime"] = cs.load_uint(32)
+	result["endWorkTime"] = cs.load_uint(32)
+	result["totalValidators"] = cs.load_uint(16)
+	result["mainValidators"] = cs.load_uint(16)
+	if tag == 0x12:
+		result["totalWeight"] = cs.load_uint(64)
+		items = parse_hashmap_e(cs, 16)
+	else:
+		items = parse_hashmap(cs, 16)
+	validators = list()
+	for index, item in sorted(items.items()):
+		descr_tag = item.load_uint(8)
+		item.skip_bits(32) # ed25519_pubkey
+		validator = dict()
+		validator["adnlAddr"] = None
+		validator["pubkey"] = item.load_hex(256)
+		validator["weight"] = item.load_uint(64)
+		if descr_tag == 0x73:
+			validator["adnlAddr"] = item.load_hex(256)
+		validators.append(validator)
+	result["validators"] = validators
+	if "totalWeight" not in result:
+		result["totalWeight"] = sum(item["weight"] for item in validators)
+	return result
+#end define
+
+def parse_vm_stack(data):
+	root = deserialize_boc(data)[0]
+	cs = root.begin_parse()
+	depth = cs.load_uint(24)
+	result = list()
+	for i in range(depth):
+		rest = cs.load_ref()
+		result.append(parse_vm_value(cs))
+		cs = rest.begin_parse()
+	result.reverse()
+	return result
+#end define
+
+def parse_vm_value(cs):
+	tag = cs.load_uint(8)
+	if tag == 0x00:
+		return None
+	if tag == 0x01:
+		return cs.load_int(64)
+	if tag == 0x02:
+		if cs.load_uint(7) == 0x7f:
+			cs.skip_bits(1)
+			return "NaN"
+		return cs.load_int(257)
+	if tag in (0x03, 0x05):
+		return cs.load_ref()
+	if tag == 0x04:
+		cell = cs.load_ref()
+		cs.skip_bits(10 + 10 + 3 + 3)
+		return cell
+	if tag == 0x07:
+		length = cs.load_uint(16)
+		return parse_vm_tuple(cs, length)
+	raise Exception(f"parse_vm_value error: unsupported tag {tag}")
+#end define
+
+def parse_vm_tuple(cs, length):
+	if length == 0:
+		return list()
+	head = parse_vm_tuple_ref(cs, length - 1)
+	tail = parse_vm_value(cs.load_ref().begin_parse())
+	return head + [tail]
+#end define
+
+def parse_vm_tuple_ref(cs, length):
+	if length == 0:
+		return list()
+	if length == 1:
+		return [parse_vm_value(cs.load_ref().begin_parse())]
+	return parse_vm_tuple(cs.load_ref().begin_parse(), length)
+#end define
+
+def serialize_vm_stack(params):
+	# Only integer arguments are supported, as in `runmethodfull` command line
+	rest = Builder().end_cell()
+	for item in params[:-1]:
+		builder = Builder().store_ref(rest)
+		store_vm_int(builder, item)
+		rest = builder.end_cell()
+	root = Builder().store_uint(len(params), 24)
+	if len(params) > 0:
+		root.store_ref(rest)
+		store_vm_int(root, params[-1])
+	return serialize_boc(root.end_cell())
+#end define
+
+def store_vm_int(builder, value):
+	if -(1 << 63) <= value < (1 << 63):
+		builder.store_uint(0x01, 8).store_int(value, 64)
+	else:
+		builder.store_uint(0x0100, 15).store_int(value, 257)
+#end define
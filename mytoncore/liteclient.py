@@ -1,5 +1,29 @@
-import random
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import json
+import queue
+import re
 import subprocess
+import threading
+import time
+
+from mytoncore.call_stats import CallStats
+from mytoncore.liteserver_router import LiteServerRouter, parse_last_seqno
+from mytoncore.session_pool import SessionPool
+from mytoncore.singleflight import SingleFlight
+
+
+HEDGE_VERBS = ("getaccount", "runmethodfull", "getconfig", "last")
+READ_ONLY_VERBS = ("getaccount", "runmethodfull", "runmethod", "getconfig", "last", "allshards", "byseqno", "listblocktrans", "dumptrans")
+# Last line of the answer, only these verbs can run in a persistent session
+RESPONSE_END = {
+	"last": re.compile("^latest masterchain block known to server is "),
+	"getaccount": re.compile("^account balance is |^account state is empty"),
+	"runmethod": re.compile(r"^remote result \(not to be trusted\):"),
+	"runmethodfull": re.compile(r"^remote result \(not to be trusted\):"),
+}
 
 
 class LiteClient:
@@ -10,34 +34,359 @@ class LiteClient:
 		self.pubkeyPath = None
 		self.addr = None
 		self.ton = None # magic
+		self.pool = None
+		self.native = None
+		self.native_config = None
+		self.router = None
+		self.scan = None
+		self.latencies = collections.deque(maxlen=200)
+		self.hedge_stats = {"requests": 0, "fired": 0, "won": 0}
+		self.hedge_lock = threading.Lock()
+		self.singleflight = SingleFlight()
+		self.stats = CallStats(local)
+	#end define
+
+	def get_router(self):
+		if self.router is None:
+			self.router = LiteServerRouter()
+		return self.router
+	#end define
+
+	def choose_index(self, indexes=None):
+		if indexes is None:
+			indexes = self.local.db.get("liteServers")
+		if indexes is None or len(indexes) == 0:
+			return None
+		return self.get_router().choose(indexes)
+	#end define
+
+	def IsNative(self):
+		return self.local.db.get("liteclient_backend") == "native"
+	#end define
+
+	def get_native(self):
+		if self.native is None:
+			from mytoncore.lite_api import LiteServerClient
+			self.native = LiteServerClient()
+		return self.native
+	#end define
+
+	def get_native_server(self, index=None, useLocalLiteServer=True):
+		if index is None and useLocalLiteServer and self.pubkeyPath and self.is_local_synced():
+			with open(self.pubkeyPath, 'rb') as file:
+				pubkey = file.read()[4:]
+			host, port = self.addr.split(':')
+			return (host, int(port), pubkey), None
+		liteservers = self.get_config_liteservers()
+		if index is None:
+			index = self.choose_index()
+		if index is None:
+			index = self.choose_index(list(range(len(liteservers))))
+		liteserver = liteservers[int(index)]
+		ip = liteserver["ip"] % (1 << 32)
+		host = ".".join(str((ip >> shift) & 0xff) for shift in (24, 16, 8, 0))
+		pubkey = base64.b64decode(liteserver["id"]["key"])
+		return (host, liteserver["port"], pubkey), index
+	#end define
+
+	def get_config_liteservers(self):
+		if self.native_config is None or self.native_config[0] != self.configPath:
+			with open(self.configPath) as file:
+				config = json.loads(file.read())
+			self.native_config = (self.configPath, config["liteservers"])
+		return self.native_config[1]
+	#end define
+
+	def RunNative(self, method, *args, **kwargs):
+		"""
+		Run query of the native backend, returns structured result.
+		method: LiteServerClient coroutine name, e.g. `get_account_state`
+		"""
+		index = kwargs.get("index")
+		liteclient_timeout = self.local.db.liteclient_timeout if self.local.db.liteclient_timeout else 3
+		timeout = kwargs.get("timeout", liteclient_timeout)
+		useLocalLiteServer = kwargs.get("useLocalLiteServer", True)
+		native = self.get_native()
+		server, index = self.get_native_server(index, useLocalLiteServer)
+		coro = getattr(native, method)(server, *args, timeout=timeout)
+		start = time.time()
+		try:
+			with self.stats.trace("native", method, index):
+				result = native.run(coro, timeout)
+			if index is not None:
+				seqno = result.seqno if method == "get_masterchain_info" else None
+				self.get_router().record_success(index, time.time() - start, seqno)
+			return result
+		except Exception as ex:
+			if index is not None:
+				timeout_error = isinstance(ex, (asyncio.TimeoutError, concurrent.futures.TimeoutError))
+				self.get_router().record_failure(index, timeout=timeout_error)
+			self.local.add_log(f"RunNative {method} {args} error: {ex}", "error")
+			raise Exception(f"LiteClient error: {ex}")
+	#end define
+
+	def get_pool(self):
+		if self.pool is None:
+			max_size = self.local.db.get("liteclient_pool_size", 4)
+			self.pool = SessionPool(max_size=max_size)
+		return self.pool
+	#end define
+
+	def is_local_synced(self):
+		syncState = self.ton.syncState
+		if syncState.is_running():
+			# Non-blocking, a missing or stale snapshot means the local liteserver is not used
+			snapshot = syncState.get_snapshot()
+			if snapshot is None or snapshot.is_stale(syncState.stale_after):
+				return False
+			status = snapshot.status
+		else:
+			# mytonctrl: the daemon's state through the cache server, or one getstats buffered for 10 seconds
+			try:
+				status = self.ton.GetValidatorStatus()
+			except Exception:
+				return False
+		out_of_sync = status.get("out_of_sync")
+		return out_of_sync is not None and out_of_sync < 20
 	#end define
 
 	def Run(self, cmd, **kwargs):
+		# Identical concurrent read-only commands share one lite-client call
+		if cmd.split(' ')[0] not in READ_ONLY_VERBS:
+			return self.run_cmd(cmd, **kwargs)
+		# Only calls with the same deadline and hedging join, a short timeout must not fail a longer one
+		key = (cmd, kwargs.get("index"), kwargs.get("useLocalLiteServer", True), kwargs.get("timeout"), kwargs.get("hedge"))
+		return self.singleflight.do(key, lambda: self.run_cmd(cmd, **kwargs))
+	#end define
+
+	def run_cmd(self, cmd, **kwargs):
 		index = kwargs.get("index")
 		liteclient_timeout = self.local.db.liteclient_timeout if self.local.db.liteclient_timeout else 3
 		timeout = kwargs.get("timeout", liteclient_timeout)
 		useLocalLiteServer = kwargs.get("useLocalLiteServer", True)
-		validator_status = self.ton.GetValidatorStatus()
-		args = [self.appPath, "--global-config", self.configPath, "--verbosity", "0", "--cmd", cmd]
+		pooled = kwargs.get("pooled", self.local.db.get("liteclient_pool", False))
+		pooled = pooled and cmd.split(' ')[0] in RESPONSE_END
+		hedge = kwargs.get("hedge")
+		if hedge is None:
+			hedge = self.local.db.get("liteclient_hedge", False)
+		args, index, routed = self.get_args(index, useLocalLiteServer)
+		with self.stats.trace("lite-client", cmd, index) as call:
+			if hedge and routed and cmd.split(' ')[0] in HEDGE_VERBS:
+				call.output = self.run_hedged(args, index, cmd, timeout, pooled)
+			else:
+				call.output = self.run_args(args, index, cmd, timeout, pooled)
+		return call.output
+	#end define
+
+	def get_args(self, index, useLocalLiteServer):
+		# Returns (args, index, routed), routed is True if the router chose the liteserver
+		routed = False
+		args = [self.appPath, "--global-config", self.configPath, "--verbosity", "0"]
 		if index is not None:
 			index = str(index)
 			args += ["-i", index]
-		elif useLocalLiteServer and self.pubkeyPath and validator_status.out_of_sync and validator_status.out_of_sync < 20:
-			args = [self.appPath, "--addr", self.addr, "--pub", self.pubkeyPath, "--verbosity", "0", "--cmd", cmd]
+		elif useLocalLiteServer and self.pubkeyPath and self.is_local_synced():
+			args = [self.appPath, "--addr", self.addr, "--pub", self.pubkeyPath, "--verbosity", "0"]
 		else:
-			liteServers = self.local.db.get("liteServers")
-			if liteServers is not None and len(liteServers):
-				index = random.choice(liteServers)
+			index = self.choose_index()
+			if index is not None:
+				routed = True
 				index = str(index)
 				args += ["-i", index]
 		#end if
+		return args, index, routed
+	#end define
+
+	def RunLines(self, cmd, **kwargs):
+		"""
+		Run `cmd` in a one-shot lite-client and yield the lines of stdout
+		as they are printed, so long outputs like `checkloadall` are parsed
+		while the process runs instead of after it
+		"""
+		liteclient_timeout = self.local.db.liteclient_timeout if self.local.db.liteclient_timeout else 3
+		timeout = kwargs.get("timeout", liteclient_timeout)
+		args, index, routed = self.get_args(kwargs.get("index"), kwargs.get("useLocalLiteServer", True))
+		args = args + ["--cmd", cmd]
+		expired = threading.Event()
+		def kill():
+			expired.set()
+			process.kill()
+		#end define
+
+		with self.stats.trace("lite-client", cmd, index) as call:
+			start = time.time()
+			call.output_bytes = 0
+			process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+			timer = threading.Timer(timeout, kill)
+			timer.start()
+
+			# stderr is read alongside, a full stderr pipe would block lite-client
+			err_chunks = list()
+			err_reader = threading.Thread(target=lambda: err_chunks.append(process.stderr.read()), daemon=True)
+			err_reader.start()
+			try:
+				for line in process.stdout:
+					call.output_bytes += len(line)
+					yield line.decode("utf-8").rstrip('\n')
+				process.wait()
+			finally:
+				timer.cancel()
+				if process.poll() is None:
+					process.kill()
+				process.wait()
+				err_reader.join()
+				process.stdout.close()
+				process.stderr.close()
+			#end try
+			err = b"".join(err_chunks).decode("utf-8")
+
+			if expired.is_set():
+				if index is not None:
+					self.get_router().record_failure(index, timeout=True)
+				raise subprocess.TimeoutExpired(args, timeout)
+			if len(err) > 0:
+				if index is not None:
+					self.get_router().record_failure(index)
+				self.local.add_log("args: {args}".format(args=args), "error")
+				raise Exception("LiteClient error: {err}".format(err=err))
+			if index is not None:
+				self.get_router().record_success(index, time.time() - start)
+		#end with
+	#end define
 
-		process = subprocess.run(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
-		output = process.stdout.decode("utf-8")
-		err = process.stderr.decode("utf-8")
+	def run_args(self, args, index, cmd, timeout, pooled, cancel=None):
+		start = time.time()
+		try:
+			if pooled:
+				is_complete = RESPONSE_END[cmd.split(' ')[0]].search
+				output, err = self.get_pool().Run(args, cmd, timeout, init_cmd="last", cancel=cancel, is_complete=is_complete)
+			elif cancel is not None:
+				output, err = self.run_process(args + ["--cmd", cmd], timeout, cancel)
+			else:
+				process = subprocess.run(args + ["--cmd", cmd], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+				output = process.stdout.decode("utf-8")
+				err = process.stderr.decode("utf-8")
+		except subprocess.TimeoutExpired:
+			if index is not None:
+				self.get_router().record_failure(index, timeout=True)
+			raise
+		if cancel is not None and cancel.is_set():
+			raise Exception("LiteClient error: command was cancelled")
 		if len(err) > 0:
+			if index is not None:
+				self.get_router().record_failure(index)
+			args = args + ["--cmd", cmd]
 			self.local.add_log("args: {args}".format(args=args), "error")
 			raise Exception("LiteClient error: {err}".format(err=err))
+		latency = time.time() - start
+		self.latencies.append(latency)
+		if index is not None:
+			self.get_router().record_success(index, latency, parse_last_seqno(output))
 		return output
 	#end define
+
+	def run_process(self, args, timeout, cancel):
+		# One-shot process that can be killed from another thread
+		process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+		deadline = time.time() + timeout
+		while True:
+			try:
+				stdout, stderr = process.communicate(timeout=0.1)
+				return stdout.decode("utf-8"), stderr.decode("utf-8")
+			except subprocess.TimeoutExpired:
+				pass
+			if cancel.is_set() or time.time() > deadline:
+				process.kill()
+				process.communicate()
+				if cancel.is_set():
+					raise Exception("LiteClient error: command was cancelled")
+				raise subprocess.TimeoutExpired(args, timeout)
+	#end define
+
+	def get_hedge_delay(self, timeout):
+		latencies = sorted(self.latencies)
+		if len(latencies) < 20:
+			return timeout / 3
+		percentile = self.local.db.get("liteclient_hedge_percentile", 90)
+		position = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+		return max(latencies[position], 0.05)
+	#end define
+
+	def run_hedged(self, args, index, cmd, timeout, pooled):
+		"""
+		Send the command to the second liteserver if the first one has not
+		answered within the latency percentile. The first good answer wins,
+		the other request is cancelled.
+		"""
+		results = queue.Queue()
+		attempts = list()
+		def start_attempt(attempt_args, attempt_index):
+			cancel = threading.Event()
+			def target():
+				try:
+					output = self.run_args(attempt_args, attempt_index, cmd, timeout, pooled, cancel=cancel)
+					results.put((attempt_num, True, output))
+				except Exception as ex:
+					results.put((attempt_num, False, ex))
+			attempt_num = len(attempts)
+			attempts.append(cancel)
+			threading.Thread(target=target, name="LiteClientHedge", daemon=True).start()
+		#end define
+
+		self.count_hedge("requests")
+		start_attempt(args, index)
+		deadline = time.time() + timeout
+		wait = self.get_hedge_delay(timeout)
+		error = None
+		pending = 1
+		hedged = False
+		while pending > 0:
+			try:
+				attempt_num, ok, value = results.get(timeout=max(0, min(wait, deadline - time.time())))
+			except queue.Empty:
+				attempt_num, ok, value = None, None, None
+			if ok:
+				for cancel in attempts:
+					cancel.set()
+				if attempt_num > 0:
+					self.count_hedge("won")
+				return value
+			if ok is False:
+				pending -= 1
+				error = value
+			if hedged is False:
+				# Hedge on slow or failed first request
+				hedged = True
+				secondary = self.get_secondary_index(index)
+				if secondary is not None:
+					self.count_hedge("fired")
+					deadline = max(deadline, time.time() + timeout)
+					secondary_args = args[:args.index("-i")] + ["-i", str(secondary)]
+					start_attempt(secondary_args, str(secondary))
+					pending += 1
+				wait = timeout
+			elif time.time() >= deadline:
+				break
+		#end while
+		for cancel in attempts:
+			cancel.set()
+		if error is not None:
+			raise error
+		raise subprocess.TimeoutExpired(args + ["--cmd", cmd], timeout)
+	#end define
+
+	def count_hedge(self, name):
+		with self.hedge_lock:
+			self.hedge_stats[name] += 1
+	#end define
+
+	def get_secondary_index(self, index):
+		liteServers = self.local.db.get("liteServers")
+		if liteServers is None:
+			return None
+		indexes = [item for item in liteServers if str(item) != str(index)]
+		if len(indexes) == 0:
+			return None
+		return self.get_router().choose(indexes)
+	#end define
 #end class
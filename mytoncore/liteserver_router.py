@@ -0,0 +1,181 @@
+import random
+import threading
+import time
+
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class ServerStats:
+	def __init__(self, index):
+		self.index = index
+		self.latency = None # EWMA, seconds
+		self.error_rate = 0.0 # EWMA of failures
+		self.last_seqno = None
+		self.last_seen = None
+		self.requests = 0
+		self.errors = 0
+		self.timeouts = 0
+		self.failures_in_row = 0
+		self.breaker = BREAKER_CLOSED
+		self.opened_at = None
+	#end define
+
+	def to_dict(self):
+		return dict(self.__dict__)
+	#end define
+
+	@classmethod
+	def from_dict(cls, data):
+		stats = cls(data["index"])
+		stats.__dict__.update({key: value for key, value in data.items() if key in stats.__dict__}) # fields of older versions are dropped
+		return stats
+	#end define
+#end class
+
+
+class LiteServerRouter:
+	"""
+	Chooses public liteserver by latency EWMA, error rate and masterchain lag.
+	Servers that keep failing are cut off by a circuit breaker and
+	get one probe request after `breaker_cooldown` seconds.
+	"""
+
+	def __init__(self, alpha=0.3, breaker_threshold=3, breaker_cooldown=60, max_lag=10, default_latency=1.0):
+		self.alpha = alpha
+		self.default_latency = default_latency # seconds, for a server that has only failed so far
+		self.breaker_threshold = breaker_threshold
+		self.breaker_cooldown = breaker_cooldown
+		self.max_lag = max_lag
+		self.servers = dict()
+		self.lock = threading.Lock()
+	#end define
+
+	def get_stats(self, index):
+		index = int(index)
+		stats = self.servers.get(index)
+		if stats is None:
+			stats = ServerStats(index)
+			self.servers[index] = stats
+		return stats
+	#end define
+
+	def record_success(self, index, latency, seqno=None):
+		with self.lock:
+			stats = self.get_stats(index)
+			stats.requests += 1
+			stats.latency = latency if stats.latency is None else self.ewma(stats.latency, latency)
+			stats.error_rate = self.ewma(stats.error_rate, 0.0)
+			stats.failures_in_row = 0
+			stats.breaker = BREAKER_CLOSED
+			stats.opened_at = None
+			stats.last_seen = time.time()
+			if seqno is not None:
+				stats.last_seqno = seqno
+	#end define
+
+	def record_failure(self, index, timeout=False):
+		with self.lock:
+			stats = self.get_stats(index)
+			stats.requests += 1
+			stats.errors += 1
+			stats.error_rate = self.ewma(stats.error_rate, 1.0)
+			stats.failures_in_row += 1
+			if timeout:
+				stats.timeouts += 1
+			if stats.breaker == BREAKER_HALF_OPEN or stats.failures_in_row >= self.breaker_threshold:
+				stats.breaker = BREAKER_OPEN
+				stats.opened_at = time.time()
+	#end define
+
+	def ewma(self, old, new):
+		return old + self.alpha * (new - old)
+	#end define
+
+	def is_available(self, stats):
+		if stats.breaker == BREAKER_CLOSED:
+			return True
+		return time.time() - stats.opened_at > self.breaker_cooldown
+	#end define
+
+	def get_max_seqno(self):
+		seqnos = [stats.last_seqno for stats in self.servers.values() if stats.last_seqno is not None]
+		return max(seqnos) if seqnos else None
+	#end define
+
+	def is_lagging(self, stats, max_seqno):
+		if max_seqno is None or stats.last_seqno is None:
+			return False
+		return max_seqno - stats.last_seqno > self.max_lag
+	#end define
+
+	def get_score(self, stats):
+		# Unknown servers go first, so that every server gets measured
+		if stats.latency is None and stats.errors == 0:
+			return 0.0
+		latency = self.default_latency if stats.latency is None else stats.latency
+		return latency * (1 + 4 * stats.error_rate)
+	#end define
+
+	def choose(self, indexes):
+		with self.lock:
+			max_seqno = self.get_max_seqno()
+			candidates = list()
+			for index in indexes:
+				stats = self.get_stats(index)
+				if not self.is_available(stats):
+					continue
+				if self.is_lagging(stats, max_seqno):
+					continue
+				candidates.append(stats)
+			if len(candidates) == 0:
+				return random.choice(indexes)
+			best = min(self.get_score(stats) for stats in candidates)
+			best_list = [stats for stats in candidates if self.get_score(stats) == best]
+			stats = random.choice(best_list)
+			if stats.breaker != BREAKER_CLOSED:
+				# Let one probe request through, the next one after another cooldown
+				stats.breaker = BREAKER_HALF_OPEN
+				stats.opened_at = time.time()
+			return stats.index
+	#end define
+
+	def get_ranked(self, indexes=None):
+		with self.lock:
+			if indexes is None:
+				indexes = list(self.servers.keys())
+			max_seqno = self.get_max_seqno()
+			ranked = [self.get_stats(index) for index in indexes]
+			ranked.sort(key=lambda stats: (stats.breaker == BREAKER_OPEN, self.is_lagging(stats, max_seqno), stats.latency is None, self.get_score(stats)))
+			return [stats.index for stats in ranked]
+	#end define
+
+	def get_snapshot(self):
+		with self.lock:
+			result = [stats.to_dict() for stats in self.servers.values()]
+		result.sort(key=lambda item: item["index"])
+		return result
+	#end define
+
+	def load_snapshot(self, data):
+		with self.lock:
+			for item in data or list():
+				stats = ServerStats.from_dict(item)
+				self.servers[stats.index] = stats
+	#end define
+#end class
+
+
+def parse_last_seqno(output):
+	# latest masterchain block known to server is (-1,8000000000000000,123):...
+	start = output.find("latest masterchain block known to server is (")
+	if start < 0:
+		return None
+	buff = output[start:].split(' ')[7]
+	try:
+		return int(buff.split(',')[2].split(')')[0])
+	except (IndexError, ValueError):
+		return None
+#end define
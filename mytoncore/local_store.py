@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class LocalStore:
+	"""
+	local.db kept in SQLite with one row per top-level key. save() writes
+	only the keys whose json changed since the last load or save, in one
+	transaction, so a crash mid-write leaves the previous state intact.
+	mytonctrl and mytoncore share the db: keys written by the other process
+	are merged into the dict on save, a key changed by both keeps ours.
+	The json file is still written every `snapshot_interval` seconds for
+	the installer, backups and older versions. When someone else changes
+	it, the keys that differ from our last snapshot are imported back on
+	the next load or save, before the file is written again.
+	"""
+
+	def __init__(self, path, json_path=None, snapshot_interval=300, object_hook=None):
+		self.path = path
+		self.json_path = json_path
+		self.snapshot_interval = snapshot_interval
+		self.object_hook = object_hook
+		self.connection = None
+		self.values = dict() # key -> json of the last loaded or saved value
+		self.version = 0 # last version seen in the store
+		self.snapshot_time = 0
+		self.lock = threading.Lock()
+		self.stats = {"saves": 0, "writes": 0, "deletes": 0, "merges": 0, "snapshots": 0, "imports": 0, "errors": 0}
+	#end define
+
+	def connect(self):
+		if self.connection is not None:
+			return self.connection
+		dir_name = os.path.dirname(self.path)
+		if dir_name:
+			os.makedirs(dir_name, exist_ok=True)
+		connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute("PRAGMA synchronous=FULL")
+		connection.execute("CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, value TEXT, version INTEGER)") # value NULL is a deleted key
+		connection.execute("CREATE INDEX IF NOT EXISTS items_version ON items (version)")
+		connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+		connection.execute("CREATE TABLE IF NOT EXISTS snapshot (key TEXT PRIMARY KEY, hash TEXT)") # keys of the last json snapshot
+		self.connection = connection
+		return connection
+	#end define
+
+	def load(self, db):
+		# Replaces the content of `db` with the store
+		with self.lock:
+			connection = self.connect()
+			connection.execute("BEGIN IMMEDIATE")
+			try:
+				self.import_json(connection)
+				rows = connection.execute("SELECT key, value FROM items WHERE value IS NOT NULL").fetchall()
+				self.version = self.get_version(connection)
+				connection.execute("COMMIT")
+			except:
+				connection.execute("ROLLBACK")
+				raise
+			self.values = dict(rows)
+			data = {key: json.loads(value, object_hook=self.object_hook) for key, value in rows}
+			db.clear()
+			db.update(data)
+	#end define
+
+	def save(self, db, snapshot=False):
+		with self.lock:
+			texts = self.dump(db)
+			changed = [(key, text) for key, text in texts.items() if self.values.get(key) != text]
+			deleted = [key for key in self.values if key not in texts]
+			version = self.version
+			connection = self.connect()
+			connection.execute("BEGIN IMMEDIATE")
+			try:
+				self.import_json(connection)
+				self.merge(connection, db, texts, deleted)
+				if changed or deleted:
+					self.version = self.get_version(connection) + 1
+					connection.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?)", [(key, text, self.version) for key, text in changed])
+					connection.executemany("UPDATE items SET value = NULL, version = ? WHERE key = ?", [(self.version, key) for key in deleted])
+				values = dict(self.values)
+				values.update(changed)
+				for key in deleted:
+					del values[key]
+				if snapshot or time.time() - self.snapshot_time > self.snapshot_interval:
+					self.write_json(connection, values)
+				connection.execute("COMMIT")
+			except:
+				connection.execute("ROLLBACK")
+				self.version = version
+				self.stats["errors"] += 1
+				raise
+			self.values = values
+			self.stats["saves"] += 1
+			self.stats["writes"] += len(changed)
+			self.stats["deletes"] += len(deleted)
+	#end define
+
+	def dump(self, db):
+		# Other threads may change the dict while we serialize it
+		for i in range(3):
+			try:
+				return {key: json.dumps(value, separators=(',', ':')) for key, value in list(db.items())}
+			except RuntimeError:
+				if i == 2:
+					raise
+	#end define
+
+	def merge(self, connection, db, texts, deleted):
+		# Keys written by another process since our last load or save
+		rows = connection.execute("SELECT key, value FROM items WHERE version > ?", (self.version,)).fetchall()
+		for key, value in rows:
+			if key in deleted or (key in texts and texts[key] != self.values.get(key)):
+				continue # changed here as well, ours wins
+			if value is None:
+				db.pop(key, None)
+				self.values.pop(key, None)
+			else:
+				db[key] = json.loads(value, object_hook=self.object_hook)
+				self.values[key] = value
+			self.stats["merges"] += 1
+		self.version = self.get_version(connection)
+	#end define
+
+	def get_version(self, connection):
+		return connection.execute("SELECT COALESCE(MAX(version), 0) FROM items").fetchone()[0]
+	#end define
+
+	def get_json_stat(self):
+		try:
+			stat = os.stat(self.json_path)
+		except OSError:
+			return None
+		return f"{stat.st_mtime_ns}:{stat.st_size}"
+	#end define
+
+	def import_json(self, connection):
+		# Keys of a json file written by someone else that differ from our last snapshot
+		if self.json_path is None:
+			return
+		json_stat = self.get_json_stat()
+		row = connection.execute("SELECT value FROM meta WHERE name = 'json_stat'").fetchone()
+		if json_stat is None or (row is not None and row[0] == json_stat):
+			return
+		try:
+			with open(self.json_path) as file:
+				data = json.load(file)
+		except (OSError, ValueError):
+			self.stats["errors"] += 1 # e.g. cut by a crash of the old writer, the store is kept
+			return
+		hashes = dict(connection.execute("SELECT key, hash FROM snapshot").fetchall())
+		texts = {key: json.dumps(value, separators=(',', ':')) for key, value in data.items()}
+		changed = [(key, text) for key, text in texts.items() if hashes.get(key) != get_hash(text)]
+		deleted = [key for key in hashes if key not in texts]
+		version = self.get_version(connection) + 1
+		connection.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?)", [(key, text, version) for key, text in changed])
+		connection.executemany("UPDATE items SET value = NULL, version = ? WHERE key = ?", [(version, key) for key in deleted])
+		self.write_snapshot(connection, texts, json_stat)
+		self.stats["imports"] += 1
+	#end define
+
+	def write_json(self, connection, values):
+		# Under the store's write lock, so that another process does not take our snapshot for a foreign one
+		if self.json_path is None:
+			return
+		text = '{' + ','.join(json.dumps(key) + ':' + value for key, value in values.items()) + '}'
+		temp_path = self.json_path + ".tmp"
+		with open(temp_path, 'w') as file:
+			file.write(text)
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(temp_path, self.json_path)
+		self.write_snapshot(connection, values, self.get_json_stat())
+		self.snapshot_time = time.time()
+		self.stats["snapshots"] += 1
+	#end define
+
+	def write_snapshot(self, connection, texts, json_stat):
+		connection.execute("DELETE FROM snapshot")
+		connection.executemany("INSERT INTO snapshot VALUES (?, ?)", [(key, get_hash(text)) for key, text in texts.items()])
+		connection.execute("INSERT OR REPLACE INTO meta VALUES ('json_stat', ?)", (json_stat,))
+	#end define
+
+	def get_stats(self):
+		with self.lock:
+			result = dict(self.stats)
+			result["keys"] = len(self.values)
+			result["version"] = self.version
+		return result
+	#end define
+
+	def close(self):
+		with self.lock:
+			if self.connection is not None:
+				self.connection.close()
+				self.connection = None
+	#end define
+#end class
+
+
+def get_hash(text):
+	return hashlib.sha1(text.encode("utf-8")).hexdigest()
+#end define
+
+def attach_local_store(local, object_hook=None):
+	# local.save() and local.load_db() of a MyPyClass go through the store
+	store = local.buffer.get("localStore")
+	if store is not None:
+		return store
+	json_path = local.buffer.db_path
+	store = LocalStore(os.path.splitext(json_path)[0] + ".sqlite", json_path, object_hook=object_hook)
+	defaults = dict(local.db) # what MyPyClass has loaded and set up, for the keys the store does not have
+	store.load(local.db)
+	for key, value in defaults.items():
+		local.db.setdefault(key, value)
+	load_db = local.load_db
+
+	def store_load_db(db_path=None):
+		if db_path and db_path != json_path:
+			return load_db(db_path)
+		store.load(local.db)
+		return True
+	#end define
+
+	def store_save_db():
+		store.save(local.db)
+	#end define
+
+	local.load_db = store_load_db
+	local.save_db = store_save_db
+	local.buffer.localStore = store
+	return store
+#end define
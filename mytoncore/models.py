@@ -1,4 +1,5 @@
 import os
+import types
 
 
 class Wallet:
@@ -41,6 +42,36 @@ class Account:
 #end class
 
 
+class ValidatorSet:
+	"""
+	Read-only validator set of config param 32, 34 or 36 with lookup
+	indexes: pubkey -> adnl, adnl -> index, index -> weight
+	"""
+
+	def __init__(self, config_id, config):
+		self.config_id = config_id
+		self.start_work_time = config.get("startWorkTime")
+		self.end_work_time = config.get("endWorkTime")
+		self.total_validators = config.get("totalValidators")
+		self.main_validators = config.get("mainValidators")
+		self.total_weight = config.get("totalWeight")
+		self.validators = tuple(types.MappingProxyType(dict(item)) for item in config.get("validators", list()))
+		adnl_by_pubkey = dict()
+		index_by_adnl = dict()
+		for index, validator in enumerate(self.validators):
+			adnl_by_pubkey.setdefault(validator["pubkey"], validator["adnlAddr"])
+			index_by_adnl.setdefault(validator["adnlAddr"], index)
+		self.adnl_by_pubkey = types.MappingProxyType(adnl_by_pubkey)
+		self.index_by_adnl = types.MappingProxyType(index_by_adnl)
+		self.weights = tuple(validator["weight"] for validator in self.validators)
+	#end define
+
+	def __len__(self):
+		return len(self.validators)
+	#end define
+#end class
+
+
 class Block():
 	def __init__(self, str=None):
 		self.workchain = None
@@ -9,13 +9,45 @@ import psutil
 import subprocess
 import pkg_resources
 import requests
-from fastcrc import crc16
 
 from modules import MODES
 from mytoncore.utils import xhex2hex, ng2g
 from mytoncore.liteclient import LiteClient
+from mytoncore.liteserver_router import parse_last_seqno
 from mytoncore.validator_console import ValidatorConsole
 from mytoncore.fift import Fift
+from mytoncore.sync_state import SyncStateTracker
+from mytoncore.call_stats import CallStats
+from mytoncore.cache import FunctionCache
+from mytoncore.block_cache import BlockCache
+from mytoncore.cache_server import CACHE_SERVER_METHODS, CacheClient, CacheServerError
+from mytoncore.code_hashes import code_hash_registry
+from mytoncore.address_codec import AddressCodec
+from mytoncore.local_store import attach_local_store
+from mytoncore.parsers import (
+	tlb2json,
+	parse_stack,
+	parse_result_tree,
+	parse_account,
+	parse_checkloadall,
+	parse_validator_set,
+	get_worker_var,
+	parse_block_transactions,
+	parse_shards,
+	parse_block_seqno,
+	parse_fift_request,
+)
+from mytoncore.boc import serialize_boc
+from mytoncore.wallet_messages import (
+	build_wallet_transfer,
+	build_highload_transfer,
+	build_recover_stake_body,
+	get_wallet_family,
+	load_boc_file,
+	load_signing_key,
+	save_boc,
+	to_nanotons,
+)
 from mytoncore.models import (
     Wallet,
     Account,
@@ -23,6 +55,7 @@ from mytoncore.models import (
     Trans,
     Message,
     Pool,
+    ValidatorSet,
 )
 
 from mypylib.mypylib import (
@@ -47,6 +80,23 @@ class MyTonCore():
 		self.liteClient = LiteClient(self.local)
 		self.validatorConsole = ValidatorConsole(self.local)
 		self.fift = Fift(self.local)
+		# One registry for all the runners
+		self.callStats = CallStats(self.local)
+		self.liteClient.stats = self.callStats
+		self.validatorConsole.stats = self.callStats
+		self.fift.stats = self.callStats
+		self.syncState = SyncStateTracker(self.local, self.FetchValidatorStatus)
+		self.validatorSets = dict()
+		self.cache = FunctionCache()
+		self.cache.add_namespace("keyBlock", ttl=3600, max_size=64)
+		self.cache.add_namespace("masterchainBlock", ttl=60, max_size=16)
+		self.blockCache = None
+		self.chainCache = None
+		self.addressCodec = None
+
+		# local.save() writes only the changed keys of mytoncore.db
+		if self.local.db.get("useLocalStore") is not False:
+			attach_local_store(self.local, object_hook=Dict)
 
 		self.Refresh()
 		self.Init()
@@ -57,11 +107,20 @@ class MyTonCore():
 		os.makedirs(self.walletsDir, exist_ok=True)
 		os.makedirs(self.contractsDir, exist_ok=True)
 		os.makedirs(self.poolsDir, exist_ok=True)
+
+		# Contract versions added by the node operator: {"version": "code hash"}
+		codeHashesPath = self.local.db.get("codeHashesPath", self.local.buffer.my_work_dir + "code_hashes.json")
+		if os.path.isfile(codeHashesPath):
+			try:
+				code_hash_registry.register_file(codeHashesPath)
+			except Exception as ex:
+				self.local.add_log(f"Init warning: can not register code hashes from {codeHashesPath}: {ex}", "warning")
 	#end define
 
 	def Refresh(self):
 		if self.dbFile:
 			self.local.load_db(self.dbFile)
+		self.addressCodec = None # the lite-client config may point to another network
 
 		if not self.walletsDir:
 			self.walletsDir = self.local.buffer.my_work_dir + "wallets/"
@@ -124,40 +183,15 @@ class MyTonCore():
 	#end define
 
 	def GetVarFromWorkerOutput(self, text, search):
-		if ':' not in search:
-			search += ':'
-		if search is None or text is None:
-			return None
-		if search not in text:
-			return None
-		start = text.find(search) + len(search)
-		count = 0
-		bcount = 0
-		textLen = len(text)
-		end = textLen
-		for i in range(start, textLen):
-			letter = text[i]
-			if letter == '(':
-				count += 1
-				bcount += 1
-			elif letter == ')':
-				count -= 1
-			if letter == ')' and count < 1:
-				end = i + 1
-				break
-			elif letter == '\n' and count < 1:
-				end = i
-				break
-		result = text[start:end]
-		if count != 0 and bcount == 0:
-			result = result.replace(')', '')
-		return result
+		return get_worker_var(text, search)
 	#end define
 
-	def GetSeqno(self, wallet):
+	def GetSeqno(self, wallet, hedge=None):
 		self.local.add_log("start GetSeqno function", "debug")
+		if self.liteClient.IsNative():
+			return self.GetSeqnoNative(wallet)
 		cmd = "runmethodfull {addr} seqno".format(addr=wallet.addrB64)
-		result = self.liteClient.Run(cmd)
+		result = self.liteClient.Run(cmd, hedge=hedge)
 		if "cannot run any methods" in result:
 			return None
 		if "result" not in result:
@@ -169,40 +203,47 @@ class MyTonCore():
 		return seqno
 	#end define
 
-	def GetAccount(self, inputAddr):
+	def GetSeqnoNative(self, wallet):
+		workchain, addr = self.ParseInputAddr(wallet.addrB64)
+		data = self.liteClient.RunNative("run_smc_method", workchain, addr, "seqno", [])
+		if data["exit_code"] == -256:
+			# cannot run any methods
+			return None
+		if data["exit_code"] not in (0, 1) or not data["result"]:
+			return 0
+		return int(data["result"][0])
+	#end define
+
+	def GetAccount(self, inputAddr, hedge=None):
 		#self.local.add_log("start GetAccount function", "debug")
 		workchain, addr = self.ParseInputAddr(inputAddr)
 		account = Account(workchain, addr)
+		if self.liteClient.IsNative():
+			return self.GetAccountNative(account)
 		cmd = "getaccount {inputAddr}".format(inputAddr=inputAddr)
-		result = self.liteClient.Run(cmd)
-		storage = self.GetVarFromWorkerOutput(result, "storage")
-		if storage is None:
+		result = self.liteClient.Run(cmd, hedge=hedge)
+		data = parse_account(result)
+		return self.SetAccountData(account, data)
+	#end define
+
+	def GetAccountNative(self, account):
+		data = self.liteClient.RunNative("get_account_state", account.workchain, account.addr)
+		return self.SetAccountData(account, data)
+	#end define
+
+	def SetAccountData(self, account, data):
+		if data is None:
 			return account
-		addr = self.GetVarFromWorkerOutput(result, "addr")
-		workchain = self.GetVar(addr, "workchain_id")
-		address = self.GetVar(addr, "address")
-		addrFull = "{}:{}".format(workchain, xhex2hex(address))
-		balance = self.GetVarFromWorkerOutput(storage, "balance")
-		grams = self.GetVarFromWorkerOutput(balance, "grams")
-		value = self.GetVarFromWorkerOutput(grams, "value")
-		state = self.GetVarFromWorkerOutput(storage, "state")
-		code_buff = self.GetVarFromWorkerOutput(state, "code")
-		data_buff = self.GetVarFromWorkerOutput(state, "data")
-		code = self.GetVarFromWorkerOutput(code_buff, "value")
-		data = self.GetVarFromWorkerOutput(data_buff, "value")
-		code = self.GetBody(code)
-		data = self.GetBody(data)
-		codeHash = self.GetCodeHash(code)
-		status = parse(state, "account_", '\n')
-		account.workchain = int(workchain)
-		account.addr = xhex2hex(address)
+		addrFull = "{}:{}".format(data["workchain"], data["address"].lower())
+		account.workchain = data["workchain"]
+		account.addr = data["address"].lower()
 		account.addrB64 = self.AddrFull2AddrB64(addrFull)
 		account.addrFull = addrFull
-		account.status = status
-		account.balance = ng2g(value)
-		account.lt = parse(result, "lt = ", ' ')
-		account.hash = parse(result, "hash = ", '\n')
-		account.codeHash = codeHash
+		account.status = data["status"]
+		account.balance = ng2g(data["balance"])
+		account.lt = data["lt"]
+		account.hash = data["hash"]
+		account.codeHash = data["code_hash"]
 		return account
 	#end define
 
@@ -402,7 +443,14 @@ class MyTonCore():
 		return wallet
 	#end define
 
-	def GetWalletFromFile(self, filePath, version):
+	def GetLocalWallets(self, walletNames):
+		# GetLocalWallet for several wallets, the unknown versions are looked up together
+		wallets = [self.GetWalletFromFile(self.walletsDir + walletName, None, findVersion=False) for walletName in walletNames]
+		self.WalletsVersion2Wallets(wallets)
+		return wallets
+	#end define
+
+	def GetWalletFromFile(self, filePath, version, findVersion=True):
 		self.local.add_log("start GetWalletFromFile function", "debug")
 		# Check input args
 		if (".addr" in filePath):
@@ -417,7 +465,8 @@ class MyTonCore():
 		walletName = filePath[filePath.rfind('/')+1:]
 		wallet = Wallet(walletName, filePath, version)
 		self.AddrFile2Object(wallet)
-		self.WalletVersion2Wallet(wallet)
+		if findVersion:
+			self.WalletVersion2Wallet(wallet)
 		return wallet
 	#end define
 
@@ -455,19 +504,32 @@ class MyTonCore():
 	#end define
 
 	def WalletVersion2Wallet(self, wallet):
-		if wallet.version is not None:
+		self.WalletsVersion2Wallets([wallet])
+	#end define
+
+	def WalletsVersion2Wallets(self, wallets):
+		# Versions missing in walletsVersionList are taken from the code hashes in one pass and saved once
+		wallets = [wallet for wallet in wallets if wallet.version is None]
+		if len(wallets) == 0:
 			return
-		self.local.add_log("start WalletVersion2Wallet function", "debug")
+		self.local.add_log("start WalletsVersion2Wallets function", "debug")
 		walletsVersionList = self.GetWalletsVersionList()
-		version = walletsVersionList.get(wallet.addrB64)
-		if version is None:
-			account = self.GetAccount(wallet.addrB64)
-			version = self.GetVersionFromCodeHash(account.codeHash)
-			self.SetWalletVersion(wallet.addrB64, version)
-		if version is None:
-			self.local.add_log("Wallet version not found: " + wallet.addrB64, "warning")
-			return
-		wallet.version = version
+		unknown = [wallet for wallet in wallets if walletsVersionList.get(wallet.addrB64) is None]
+		if len(unknown) > 0:
+			accounts = [self.GetAccount(wallet.addrB64) for wallet in unknown]
+			versions = self.GetVersionsFromCodeHashes([account.codeHash for account in accounts])
+			for wallet, version in zip(unknown, versions):
+				walletsVersionList[wallet.addrB64] = version
+			self.local.save()
+		#end if
+
+		for wallet in wallets:
+			version = walletsVersionList.get(wallet.addrB64)
+			if version is None:
+				self.local.add_log("Wallet version not found: " + wallet.addrB64, "warning")
+				continue
+			wallet.version = version
+		#end for
 	#end define
 
 	def SetWalletVersion(self, addrB64, version):
@@ -477,32 +539,11 @@ class MyTonCore():
 	#end define
 
 	def GetVersionFromCodeHash(self, inputHash):
-		self.local.add_log("start GetVersionFromCodeHash function", "debug")
-		arr = dict()
-		arr["v1r1"] = "d670136510daff4fee1889b8872c4c1e89872ffa1fe58a23a5f5d99cef8edf32"
-		arr["v1r2"] = "2705a31a7ac162295c8aed0761cc6e031ab65521dd7b4a14631099e02de99e18"
-		arr["v1r3"] = "c3b9bb03936742cfbb9dcdd3a5e1f3204837f613ef141f273952aa41235d289e"
-		arr["v2r1"] = "fa44386e2c445f1edf64702e893e78c3f9a687a5a01397ad9e3994ee3d0efdbf"
-		arr["v2r2"] = "d5e63eff6fa268d612c0cf5b343c6674b7312c58dfd9ffa1b536f2014a919164"
-		arr["v3r1"] = "4505c335cb60f221e58448c71595bb6d7c980c01a798b392ebb53d86cb6061dc"
-		arr["v3r2"] = "8a6d73bdd8704894f17d8c76ce6139034b8a51b1802907ca36283417798a219b"
-		arr["v4"] = "7ae380664c513769eaa5c94f9cd5767356e3f7676163baab66a4b73d5edab0e5"
-		arr["hv1"] = "fc8e48ed7f9654ba76757f52cc6031b2214c02fab9e429ffa0340f5575f9f29c"
-		arr["pool"] = "399838da9489139680e90fd237382e96ba771fdf6ea27eb7d513965b355038b4"
-		arr["spool"] = "fc2ae44bcaedfa357d0091769aabbac824e1c28f14cc180c0b52a57d83d29054"
-		arr["spool_r2"] = "42bea8fea43bf803c652411976eb2981b9bdb10da84eb788a63ea7a01f2a044d"
-		arr["liquid_pool_r1"] = "82bc5760719c34395f80df76c42dc5d287f08f6562c643601ebed6944302dcc2"
-		arr["liquid_pool_r2"] = "95abec0a66ac63b0fbcf28466eb8240ddcd88f97300691511d9c9975d5521e4a"
-		arr["liquid_pool_r3"] = "22a023bc75b649ff2b5b183cd0d34cd413e6e27ee6d6ad0787f75ad39787ed4e"
-		arr["liquid_pool_r4"] = "77282b45fd7cfc72ca68fe97af33ad10078730ceaf55e20534c9526c48d602d2"
-		arr["controller_r1"] = "0949cf92963dd27bb1e6bf76487807f20409131b6110acbc18b7fbb90280ccf0"
-		arr["controller_r2"] = "01118b9553151fb9bc81704a4b3e0fc7b899871a527d44435a51574806863e2c"
-		arr["controller_r3"] = "e4d8ce8ff7b4b60c76b135eb8702ce3c86dc133fcee7d19c7aa18f71d9d91438"
-		arr["controller_r4"] = "dec125a4850c4ba24668d84252b04c6ad40abf5c9d413a429b56bfff09ea25d4"
-		for version, hash in arr.items():
-			if hash == inputHash:
-				return version
-		#end for
+		return code_hash_registry.get_version(inputHash)
+	#end define
+
+	def GetVersionsFromCodeHashes(self, codeHashes):
+		return code_hash_registry.get_versions(codeHashes)
 	#end define
 
 	def GetWalletsVersionList(self):
@@ -517,40 +558,56 @@ class MyTonCore():
 	def GetFullConfigAddr(self):
 		# Get buffer
 		bname = "fullConfigAddr"
-		buff = self.GetFunctionBuffer(bname, timeout=60)
+		tag = self.GetEpochTag("keyBlock", fetch=True)
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag) or self.GetChainBuffer(bname, tag)
 		if buff:
 			return buff
 		#end if
 
 		self.local.add_log("start GetFullConfigAddr function", "debug")
-		result = self.liteClient.Run("getconfig 0")
-		configAddr_hex = self.GetVarFromWorkerOutput(result, "config_addr:x")
+		if self.liteClient.IsNative():
+			configAddr_hex, seqno = self.GetConfigAddrNative(0)
+		else:
+			result = self.liteClient.Run("getconfig 0")
+			configAddr_hex = self.GetVarFromWorkerOutput(result, "config_addr:x")
+			seqno = parse_last_seqno(result)
 		fullConfigAddr = "-1:{configAddr_hex}".format(configAddr_hex=configAddr_hex)
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, fullConfigAddr)
+		self.SetChainBuffer(bname, fullConfigAddr, self.CheckEpochTag(tag, seqno))
 		return fullConfigAddr
 	#end define
 
 	def GetFullElectorAddr(self):
 		# Get buffer
 		bname = "fullElectorAddr"
-		buff = self.GetFunctionBuffer(bname, timeout=60)
+		tag = self.GetEpochTag("keyBlock", fetch=True)
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag) or self.GetChainBuffer(bname, tag)
 		if buff:
 			return buff
 		#end if
 
 		# Get data
 		self.local.add_log("start GetFullElectorAddr function", "debug")
-		result = self.liteClient.Run("getconfig 1")
-		electorAddr_hex = self.GetVarFromWorkerOutput(result, "elector_addr:x")
+		if self.liteClient.IsNative():
+			electorAddr_hex, seqno = self.GetConfigAddrNative(1)
+		else:
+			result = self.liteClient.Run("getconfig 1")
+			electorAddr_hex = self.GetVarFromWorkerOutput(result, "elector_addr:x")
+			seqno = parse_last_seqno(result)
 		fullElectorAddr = "-1:{electorAddr_hex}".format(electorAddr_hex=electorAddr_hex)
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, fullElectorAddr)
+		self.SetChainBuffer(bname, fullElectorAddr, self.CheckEpochTag(tag, seqno))
 		return fullElectorAddr
 	#end define
 
+	def GetConfigAddrNative(self, configId):
+		block, params = self.liteClient.RunNative("get_config_params", [configId])
+		cs = params[configId].begin_parse()
+		return cs.load_hex(256), block.seqno
+	#end define
+
 	def GetFullMinterAddr(self):
 		# Get buffer
 		bname = "fullMinterAddr"
@@ -587,24 +644,30 @@ class MyTonCore():
 		return fullDnsRootAddr
 	#end define
 
-	def GetActiveElectionId(self, fullElectorAddr):
+	def GetActiveElectionId(self, fullElectorAddr, hedge=None):
 		# Get buffer
 		bname = "activeElectionId"
-		buff = self.GetFunctionBuffer(bname)
+		tag = self.GetEpochTag("masterchainBlock")
+		buff = self.GetFunctionBuffer(bname, namespace="masterchainBlock", tag=tag)
 		if buff:
 			return buff
 		#end if
 
 		self.local.add_log("start GetActiveElectionId function", "debug")
-		cmd = "runmethodfull {fullElectorAddr} active_election_id".format(fullElectorAddr=fullElectorAddr)
-		result = self.liteClient.Run(cmd)
-		activeElectionId = self.GetVarFromWorkerOutput(result, "result")
-		activeElectionId = activeElectionId.replace(' ', '')
-		activeElectionId = parse(activeElectionId, '[', ']')
-		activeElectionId = int(activeElectionId)
+		if self.liteClient.IsNative():
+			workchain, addr = self.ParseAddrFull(fullElectorAddr)
+			data = self.liteClient.RunNative("run_smc_method", workchain, addr, "active_election_id", [])
+			activeElectionId = int(data["result"][0])
+		else:
+			cmd = "runmethodfull {fullElectorAddr} active_election_id".format(fullElectorAddr=fullElectorAddr)
+			result = self.liteClient.Run(cmd, hedge=hedge)
+			activeElectionId = self.GetVarFromWorkerOutput(result, "result")
+			activeElectionId = activeElectionId.replace(' ', '')
+			activeElectionId = parse(activeElectionId, '[', ']')
+			activeElectionId = int(activeElectionId)
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, activeElectionId)
+		self.SetFunctionBuffer(bname, activeElectionId, namespace="masterchainBlock", tag=tag)
 		return activeElectionId
 	#end define
 
@@ -621,9 +684,20 @@ class MyTonCore():
 	#end define
 
 	def GetRootWorkchainEnabledTime(self):
+		# Get buffer
+		bname = "rootWorkchainEnabledTime"
+		tag = self.GetEpochTag("keyBlock", fetch=True)
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag) or self.GetChainBuffer(bname, tag)
+		if buff:
+			return buff
+		#end if
+
 		self.local.add_log("start GetRootWorkchainEnabledTime function", "debug")
-		config12 = self.GetConfig(12)
+		config12, seqno = self.ReadConfig(12)
 		enabledTime = config12["workchains"]["root"]["node"]["value"]["enabled_since"]
+
+		# Set buffer
+		self.SetChainBuffer(bname, enabledTime, self.CheckEpochTag(tag, seqno))
 		return enabledTime
 	#end define
 
@@ -634,10 +708,13 @@ class MyTonCore():
 		return result
 	#end define
 
-	def GetLastBlock(self):
+	def GetLastBlock(self, hedge=None):
 		block = None
+		if self.liteClient.IsNative():
+			block_id = self.liteClient.RunNative("get_masterchain_info")
+			return Block(str(block_id))
 		cmd = "last"
-		result = self.liteClient.Run(cmd)
+		result = self.liteClient.Run(cmd, hedge=hedge)
 		lines = result.split('\n')
 		for line in lines:
 			if "latest masterchain block" in line:
@@ -669,6 +746,7 @@ class MyTonCore():
 	#end define
 
 	def GetInitBlock(self):
+		# The head of the last block is asked once, the key block itself is cached by GetBlock
 		block = self.GetLastBlock()
 		cmd = f"gethead {block}"
 		result = self.liteClient.Run(cmd)
@@ -687,38 +765,79 @@ class MyTonCore():
 	#end define
 
 	def GetBlock(self, workchain, shardchain, seqno):
-		cmd = "byseqno {workchain}:{shardchain} {seqno}"
-		cmd = cmd.format(workchain=workchain, shardchain=shardchain, seqno=seqno)
-		result = self.liteClient.Run(cmd)
-		block_str =  parse(result, "block header of ", ' ')
+		blockCache = self.GetBlockCache()
+		key = f"{workchain}:{str(shardchain).upper()}:{seqno}"
+		block_str = blockCache.get("byseqno", key)
+		if block_str is not None:
+			return Block(block_str)
+		if self.liteClient.IsNative():
+			block_id = self.liteClient.RunNative("lookup_block", int(workchain), int(str(shardchain), 16), int(seqno))
+			block_str = str(block_id)
+		else:
+			cmd = "byseqno {workchain}:{shardchain} {seqno}"
+			cmd = cmd.format(workchain=workchain, shardchain=shardchain, seqno=seqno)
+			result = self.liteClient.Run(cmd)
+			block_str =  parse(result, "block header of ", ' ')
+		if block_str is not None:
+			blockCache.set("byseqno", key, block_str)
 		block = Block(block_str)
 		return block
 	#end define
 
 	def GetTransactions(self, block):
+		blockCache = self.GetBlockCache()
+		items = blockCache.get("listblocktrans", block.rootHash)
+		if items is None:
+			items = self.ListBlockTransactions(block)
+			if len(items) > 0:
+				blockCache.set("listblocktrans", block.rootHash, items)
+		#end if
+
 		transactions = list()
+		for trans_addr, trans_lt, trans_hash in items:
+			trans = Trans(block, trans_addr, trans_lt, trans_hash)
+			transactions.append(trans)
+		return transactions
+	#end define
+
+	def ListBlockTransactions(self, block):
+		# [(account, lt, hash), ...]
+		if self.liteClient.IsNative():
+			block_id = self.Block2BlockIdExt(block)
+			items = self.liteClient.RunNative("list_block_transactions", block_id, 999999)
+			return [(item["account"], str(item["lt"]), item["hash"]) for item in items]
 		cmd = "listblocktrans {block} 999999".format(block=block)
 		result = self.liteClient.Run(cmd)
-		lines = result.split('\n')
-		for line in lines:
-			if "transaction #" in line:
-				buff = line.split(' ')
-				trans_id = buff[1]
-				trans_id = trans_id.replace('#', '')
-				trans_id = trans_id.replace(':', '')
-				trans_addr = buff[3]
-				trans_lt = buff[5]
-				trans_hash = buff[7]
-				trans = Trans(block, trans_addr, trans_lt, trans_hash)
-				transactions.append(trans)
-		return transactions
+		return parse_block_transactions(result)
 	#end define
 
 	def GetTrans(self, trans):
+		# Messages of a transaction never change, their fields are kept in the block cache
 		addr = f"{trans.block.workchain}:{trans.addr}"
-		messageList = list()
+		blockCache = self.GetBlockCache()
+		key = f"{trans.block.rootHash}:{addr}:{trans.lt}"
+		items = blockCache.get("transMessages", key)
+		if items is not None:
+			messageList = list()
+			for item in items:
+				message = Message()
+				message.__dict__.update(item)
+				message.trans = trans
+				messageList.append(message)
+			return messageList
+		#end if
+
 		cmd = f"dumptrans {trans.block} {addr} {trans.lt}"
 		result = self.liteClient.Run(cmd)
+		messageList = self.ParseTrans(result, trans)
+		if "transaction is" in result:
+			items = [{name: value for name, value in message.__dict__.items() if name != "trans"} for message in messageList]
+			blockCache.set("transMessages", key, items)
+		return messageList
+	#end define
+
+	def ParseTrans(self, result, trans):
+		messageList = list()
 		data = self.Result2Dict(result)
 		for key, item in data.items():
 			if "transaction is" not in key:
@@ -739,23 +858,120 @@ class MyTonCore():
 		return messageList
 	#end define
 
+	def Block2BlockIdExt(self, block):
+		from mytoncore.lite_api import BlockIdExt
+		return BlockIdExt(block.workchain, int(block.shardchain, 16), block.seqno, bytes.fromhex(block.rootHash), bytes.fromhex(block.fileHash))
+	#end define
+
 	def GetShards(self, block=None):
+		# Shards of a given block never change, the latest ones are not cached
+		blockCache = self.GetBlockCache()
+		items = None
+		if block:
+			items = blockCache.get("allshards", block.rootHash)
+		if items is None:
+			items = self.ListShards(block)
+			if block and len(items) > 0:
+				blockCache.set("allshards", block.rootHash, items)
+		#end if
+
 		shards = list()
+		for shard_id, shard_block in items:
+			shard = {"id": shard_id, "block": Block(shard_block)}
+			shards.append(shard)
+		return shards
+	#end define
+
+	def ListShards(self, block=None):
+		# [(shard id, block), ...]
+		if self.liteClient.IsNative():
+			block_id = self.Block2BlockIdExt(block) if block else None
+			items = self.liteClient.RunNative("get_all_shards_info", block_id)
+			return [(str(i), str(item)) for i, item in enumerate(items)]
 		if block:
 			cmd = "allshards {block}".format(block=block)
 		else:
 			cmd = "allshards"
 		result = self.liteClient.Run(cmd)
-		lines = result.split('\n')
-		for line in lines:
-			if "shard #" in line:
-				buff = line.split(' ')
-				shard_id = buff[1]
-				shard_id = shard_id.replace('#', '')
-				shard_block = Block(buff[3])
-				shard = {"id": shard_id, "block": shard_block}
-				shards.append(shard)
-		return shards
+		return parse_shards(result)
+	#end define
+
+	def GetCacheServerPath(self):
+		return self.local.buffer.my_work_dir + "mytoncore.sock"
+	#end define
+
+	def UseCacheServer(self):
+		# Serve the read-only queries from the mytoncore daemon, run them here when it is down
+		if self.local.db.get("useCacheServer") is False:
+			return
+		client = CacheClient(self.GetCacheServerPath(), object_hook=Dict)
+		for name in CACHE_SERVER_METHODS:
+			setattr(self, name, client.wrap(name, getattr(self, name)))
+
+		# Start with the liteserver scores collected by the daemon
+		try:
+			self.liteClient.get_router().load_snapshot(client.call("GetLiteClientStats")["router"])
+		except CacheServerError:
+			pass
+	#end define
+
+	def GetLiteClientStats(self):
+		# Kept in memory of the daemon, mytonctrl gets them through the cache server
+		result = dict()
+		result["router"] = self.liteClient.get_router().get_snapshot()
+		result["scan"] = self.liteClient.scan
+		result["hedge"] = dict(self.liteClient.hedge_stats)
+		result["singleflight"] = self.liteClient.singleflight.get_stats()
+		return result
+	#end define
+
+	def GetPerfStats(self):
+		# Call and cache statistics for mytonctrl perf, never written to local.db
+		result = dict()
+		result["callStats"] = self.callStats.get_snapshot()
+		result["functionCache"] = self.cache.get_stats()
+		result["blockCache"] = self.blockCache.get_stats() if self.blockCache else None
+		store = self.local.buffer.get("localStore")
+		result["localStore"] = store.get_stats() if store else None
+		return result
+	#end define
+
+	def GetBlockCache(self):
+		if self.blockCache is None:
+			path = self.local.buffer.my_work_dir + "block_cache.db"
+			max_size = self.local.db.get("blockCacheSize", 64 * 2**20)
+			self.blockCache = BlockCache(path, max_size)
+		return self.blockCache
+	#end define
+
+	def GetChainCache(self):
+		# Slow-changing chain data that survives restarts of mytoncore and mytonctrl
+		if self.chainCache is None:
+			path = self.local.buffer.my_work_dir + "chain_cache.db"
+			self.chainCache = BlockCache(path, max_size=4 * 2**20, object_hook=Dict)
+		return self.chainCache
+	#end define
+
+	def GetChainBuffer(self, name, tag):
+		# On-disk level of the "keyBlock" buffer, an entry is valid from the key block it was read at
+		# and for at most `chainCacheTtl` seconds
+		if tag is None:
+			return None
+		item = self.GetChainCache().get("keyBlock", name)
+		if item is None or item["seqno"] != tag:
+			return None
+		ttl = self.local.db.get("chainCacheTtl", 86400)
+		if get_timestamp() - item.get("time", 0) > ttl:
+			return None
+		self.SetFunctionBuffer(name, item["data"], namespace="keyBlock", tag=tag)
+		return item["data"]
+	#end define
+
+	def SetChainBuffer(self, name, data, tag):
+		# Only answers checked by CheckEpochTag have a tag and are kept on disk
+		self.SetFunctionBuffer(name, data, namespace="keyBlock", tag=tag)
+		if tag is not None:
+			self.GetChainCache().set("keyBlock", name, {"seqno": tag, "time": get_timestamp(), "data": data})
 	#end define
 
 	def GetShardsNumber(self, block=None):
@@ -765,6 +981,12 @@ class MyTonCore():
 	#end define
 
 	def GetValidatorStatus(self):
+		# Get snapshot of background watcher
+		status = self.syncState.get_fresh_status()
+		if status is not None:
+			return Dict(status)
+		#end if
+
 		# Get buffer
 		bname = "validator_status"
 		buff = self.GetFunctionBuffer(bname)
@@ -772,6 +994,14 @@ class MyTonCore():
 			return buff
 		#end if
 
+		status = self.FetchValidatorStatus()
+
+		# Set buffer
+		self.SetFunctionBuffer(bname, status)
+		return status
+	#end define
+
+	def FetchValidatorStatus(self):
 		self.local.add_log("start GetValidatorStatus function", "debug")
 		status = Dict()
 		try:
@@ -805,43 +1035,39 @@ class MyTonCore():
 		# old vars
 		status.outOfSync = status.out_of_sync
 		status.isWorking = status.is_working
-
-		# Set buffer
-		self.SetFunctionBuffer(bname, status)
 		return status
 	#end define
 
 	def GVS_GetItemFromBuff(self, buff):
-		buffList = buff.split(':')
-		buff2 = buffList[0]
-		buff2 = buff2.replace(' ', '')
-		buff2 = buff2.replace('(', '')
-		buff2 = buff2.replace(')', '')
-		buffList2 = buff2.split(',')
-		item = buffList2[2]
-		item = int(item)
-		return item
-	#end define
-
-	def GetConfig(self, configId):
+		return parse_block_seqno(buff)
+	#end define
+
+	def GetConfig(self, configId, hedge=None):
 		# Get buffer
-		bname = "config" + str(configId)
-		buff = self.GetFunctionBuffer(bname, timeout=60)
+		bname = "getconfig" + str(configId)
+		tag = self.GetEpochTag("keyBlock")
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag)
 		if buff:
 			return buff
 		#end if
 
 		text = "start GetConfig function ({})".format(configId)
 		self.local.add_log(text, "debug")
+		data, seqno = self.ReadConfig(configId, hedge)
+
+		# Set buffer
+		self.SetFunctionBuffer(bname, data, namespace="keyBlock", tag=self.CheckEpochTag(tag, seqno))
+		return data
+	#end define
+
+	def ReadConfig(self, configId, hedge=None):
+		# Returns the config param and the masterchain seqno it was read at
 		cmd = "getconfig {configId}".format(configId=configId)
-		result = self.liteClient.Run(cmd)
+		result = self.liteClient.Run(cmd, hedge=hedge)
 		start = result.find("ConfigParam")
 		text = result[start:]
 		data = self.Tlb2Json(text)
-
-		# Set buffer
-		self.SetFunctionBuffer(bname, data)
-		return data
+		return data, parse_last_seqno(result)
 	#end define
 
 	def GetConfig15(self):
@@ -866,115 +1092,100 @@ class MyTonCore():
 	def GetConfig32(self):
 		# Get buffer
 		bname = "config32"
-		buff = self.GetFunctionBuffer(bname, timeout=60)
+		tag = self.GetEpochTag("keyBlock", fetch=True)
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag) or self.GetChainBuffer(bname, tag)
 		if buff:
 			return buff
 		#end if
 
 		self.local.add_log("start GetConfig32 function", "debug")
-		config32 = Dict()
-		result = self.liteClient.Run("getconfig 32")
-		config32["totalValidators"] = int(parse(result, "total:", ' '))
-		config32["mainValidators"] = int(parse(result, "main:", ' '))
-		config32["startWorkTime"] = int(parse(result, "utime_since:", ' '))
-		config32["endWorkTime"] = int(parse(result, "utime_until:", ' '))
-		lines = result.split('\n')
-		validators = list()
-		for line in lines:
-			if "public_key:" in line:
-				validatorAdnlAddr = parse(line, "adnl_addr:x", ')')
-				pubkey = parse(line, "pubkey:x", ')')
-				try:
-					validatorWeight = int(parse(line, "weight:", ' '))
-				except ValueError:
-					validatorWeight = int(parse(line, "weight:", ')'))
-				buff = Dict()
-				buff["adnlAddr"] = validatorAdnlAddr
-				buff["pubkey"] = pubkey
-				buff["weight"] = validatorWeight
-				validators.append(buff)
-		config32["validators"] = validators
+		config32, seqno = self.GetValidatorSetConfig(32)
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, config32)
+		self.SetChainBuffer(bname, config32, self.CheckEpochTag(tag, seqno))
 		return config32
 	#end define
 
 	def GetConfig34(self):
 		# Get buffer
 		bname = "config34"
-		buff = self.GetFunctionBuffer(bname, timeout=60)
-		if buff:
+		tag = self.GetEpochTag("keyBlock", fetch=True)
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag) or self.GetChainBuffer(bname, tag)
+		if buff and buff["endWorkTime"] > get_timestamp():
+			return buff
+		if buff and self.GetFunctionBuffer(bname, timeout=10, namespace="keyBlock"):
+			# utime_until has passed, re-read until the next set is in
 			return buff
+		if buff:
+			self.cache.invalidate("config32", namespace="keyBlock")
+			self.cache.invalidate("config36", namespace="keyBlock")
 		#end if
 
 		self.local.add_log("start GetConfig34 function", "debug")
-		config34 = Dict()
-		result = self.liteClient.Run("getconfig 34")
-		config34["totalValidators"] = int(parse(result, "total:", ' '))
-		config34["mainValidators"] = int(parse(result, "main:", ' '))
-		config34["startWorkTime"] = int(parse(result, "utime_since:", ' '))
-		config34["endWorkTime"] = int(parse(result, "utime_until:", ' '))
-		config34["totalWeight"] = int(parse(result, "total_weight:", ' '))
-		lines = result.split('\n')
-		validators = list()
-		for line in lines:
-			if "public_key:" in line:
-				validatorAdnlAddr = parse(line, "adnl_addr:x", ')')
-				pubkey = parse(line, "pubkey:x", ')')
-				try:
-					validatorWeight = int(parse(line, "weight:", ' '))
-				except ValueError:
-					validatorWeight = int(parse(line, "weight:", ')'))
-				buff = Dict()
-				buff["adnlAddr"] = validatorAdnlAddr
-				buff["pubkey"] = pubkey
-				buff["weight"] = validatorWeight
-				validators.append(buff)
-		config34["validators"] = validators
+		config34, seqno = self.GetValidatorSetConfig(34)
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, config34)
+		self.SetChainBuffer(bname, config34, self.CheckEpochTag(tag, seqno))
 		return config34
 	#end define
 
 	def GetConfig36(self):
 		# Get buffer
 		bname = "config36"
-		buff = self.GetFunctionBuffer(bname, timeout=60)
-		if buff:
+		tag = self.GetEpochTag("keyBlock", fetch=True)
+		buff = self.GetFunctionBuffer(bname, timeout=60, namespace="keyBlock", tag=tag) or self.GetChainBuffer(bname, tag)
+		if buff and buff.get("startWorkTime", float("inf")) > get_timestamp():
 			return buff
 		#end if
 
 		self.local.add_log("start GetConfig36 function", "debug")
 		config36 = dict()
+		seqno = None
 		try:
-			result = self.liteClient.Run("getconfig 36")
-			config36["totalValidators"] = int(parse(result, "total:", ' '))
-			config36["startWorkTime"] = int(parse(result, "utime_since:", ' '))
-			config36["endWorkTime"] = int(parse(result, "utime_until:", ' '))
-			lines = result.split('\n')
-			validators = list()
-			for line in lines:
-				if "public_key:" in line:
-					validatorAdnlAddr = parse(line, "adnl_addr:x", ')')
-					pubkey = parse(line, "pubkey:x", ')')
-					validatorWeight = parse(line, "weight:", ' ')
-					buff = dict()
-					buff["adnlAddr"] = validatorAdnlAddr
-					buff["pubkey"] = pubkey
-					buff["weight"] = validatorWeight
-					validators.append(buff)
-			config36["validators"] = validators
+			config36, seqno = self.GetValidatorSetConfig(36)
 		except:
 			config36["validators"] = list()
 		#end try
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, config36)
+		self.SetChainBuffer(bname, config36, self.CheckEpochTag(tag, seqno))
 		return config36
 	#end define
 
+	def GetValidatorSetConfig(self, configId):
+		# Returns the validator set and the masterchain seqno it was read at
+		if self.liteClient.IsNative():
+			return self.GetValidatorSetNative(configId)
+		result = self.liteClient.Run(f"getconfig {configId}")
+		data = parse_validator_set(result)
+		config = Dict(data)
+		config["validators"] = [Dict(item) for item in data["validators"]]
+		return config, parse_last_seqno(result)
+	#end define
+
+	def GetValidatorSetNative(self, configId):
+		from mytoncore.lite_api import parse_validator_set as parse_validator_set_cell
+		block, params = self.liteClient.RunNative("get_config_params", [configId])
+		if params[configId] is None:
+			raise Exception(f"GetValidatorSetNative error: config param {configId} is empty")
+		data = parse_validator_set_cell(params[configId])
+		config = Dict(data)
+		config["validators"] = [Dict(item) for item in data["validators"]]
+		return config, block.seqno
+	#end define
+
+	def GetValidatorSet(self, configId):
+		# ValidatorSet of config 32, 34 or 36, indexes are built once per round
+		config = getattr(self, f"GetConfig{configId}")()
+		key = (configId, config.get("startWorkTime"))
+		validatorSet = self.validatorSets.get(key)
+		if validatorSet is None:
+			validatorSet = ValidatorSet(configId, config)
+			self.validatorSets = {item: value for item, value in self.validatorSets.items() if item[0] != configId}
+			self.validatorSets[key] = validatorSet
+		return validatorSet
+	#end define
+
 	def CreateNewKey(self):
 		self.local.add_log("start CreateNewKey function", "debug")
 		result = self.validatorConsole.Run("newkey")
@@ -1048,15 +1259,7 @@ class MyTonCore():
 		args = ["config-proposal-vote-req.fif", "-i", validatorIndex, offerHash, fileName]
 		result = self.fift.Run(args)
 		fileName = parse(result, "Saved to file ", '\n')
-		resultList = result.split('\n')
-		i = 0
-		start_index = 0
-		for item in resultList:
-			if "Creating a request to vote for configuration proposal" in item:
-				start_index = i
-			i += 1
-		var1 = resultList[start_index + 1]
-		var2 = resultList[start_index + 2] # var2 not using
+		var1 = parse_fift_request(result, "Creating a request to vote for configuration proposal")
 		return var1
 	#end define
 
@@ -1066,15 +1269,7 @@ class MyTonCore():
 		args = ["complaint-vote-req.fif", validatorIndex, electionId, complaintHash, fileName]
 		result = self.fift.Run(args)
 		fileName = parse(result, "Saved to file ", '\n')
-		resultList = result.split('\n')
-		i = 0
-		start_index = 0
-		for item in resultList:
-			if "Creating a request to vote for complaint" in item:
-				start_index = i
-			i += 1
-		var1 = resultList[start_index + 1]
-		var2 = resultList[start_index + 2] # var2 not using
+		var1 = parse_fift_request(result, "Creating a request to vote for complaint")
 		return var1
 	#end define
 
@@ -1102,15 +1297,7 @@ class MyTonCore():
 		args = ["validator-elect-req.fif", addrB64, startWorkTime, maxFactor, adnlAddr, fileName]
 		result = self.fift.Run(args)
 		fileName = parse(result, "Saved to file ", '\n')
-		resultList = result.split('\n')
-		i = 0
-		start_index = 0
-		for item in resultList:
-			if "Creating a request to participate in validator elections" in item:
-				start_index = i
-			i += 1
-		var1 = resultList[start_index + 1]
-		var2 = resultList[start_index + 2] # var2 not using
+		var1 = parse_fift_request(result, "Creating a request to participate in validator elections")
 		return var1
 	#end define
 
@@ -1156,6 +1343,16 @@ class MyTonCore():
 
 		seqno = self.GetSeqno(wallet)
 		result_file_path = self.tempDir + self.nodeName + wallet.name + "_wallet-query"
+		if self.IsNativeWalletMessages(wallet):
+			body, state_init = None, None
+			if boc_mode == "--with-init":
+				state_init = load_boc_file(boc_path)
+			else:
+				body = load_boc_file(boc_path)
+			signing_key = load_signing_key(wallet.privFilePath)
+			dest_addr = self.GetTransferDest(dest, flags)
+			boc = build_wallet_transfer(wallet, signing_key, dest_addr, to_nanotons(coins), seqno, body=body, state_init=state_init, subwallet=subwallet)
+			return save_boc(boc, result_file_path + ".boc")
 		if "v1" in wallet.version:
 			fift_script = "wallet.fif"
 			args = [fift_script, wallet.path, dest, seqno, coins, boc_mode, boc_path, result_file_path]
@@ -1174,6 +1371,25 @@ class MyTonCore():
 		return result_file_path
 	#end define
 
+	def IsNativeWalletMessages(self, wallet):
+		if self.local.db.get("native_wallet_messages", False) is False:
+			return False
+		return get_wallet_family(wallet.version) is not None
+	#end define
+
+	def GetTransferDest(self, dest, flags):
+		# Bounce flag the same way as wallet fift scripts choose it
+		workchain, addr = self.ParseInputAddr(dest)
+		bounce = True
+		if self.IsAddrB64(dest):
+			bounce = self.IsBounceableAddrB64(dest)
+		if "-b" in flags or "--force-bounce" in flags:
+			bounce = True
+		if "-n" in flags or "--no-bounce" in flags:
+			bounce = False
+		return workchain, addr, bounce
+	#end define
+
 	def SendFile(self, filePath, wallet=None, **kwargs):
 		self.local.add_log("start SendFile function: " + filePath, "debug")
 		timeout = kwargs.get("timeout", 30)
@@ -1229,7 +1445,7 @@ class MyTonCore():
 		for i in range(steps):
 			time.sleep(timesleep)
 			try:
-				seqno = self.GetSeqno(wallet)
+				seqno = self.GetSeqno(wallet, hedge=True)
 			except:
 				self.local.add_log("WaitTransaction error: Can't get seqno", "warning")
 				continue
@@ -1254,6 +1470,8 @@ class MyTonCore():
 	def ProcessRecoverStake(self):
 		self.local.add_log("start ProcessRecoverStake function", "debug")
 		resultFilePath = self.tempDir + self.nodeName + "recover-query"
+		if self.local.db.get("native_wallet_messages", False):
+			return save_boc(serialize_boc(build_recover_stake_body(), crc=True), resultFilePath)
 		args = ["recover-stake.fif", resultFilePath]
 		result = self.fift.Run(args)
 		resultFilePath = parse(result, "Saved to file ", '\n')
@@ -1357,7 +1575,7 @@ class MyTonCore():
 
 		# Get startWorkTime and endWorkTime
 		fullElectorAddr = self.GetFullElectorAddr()
-		startWorkTime = self.GetActiveElectionId(fullElectorAddr)
+		startWorkTime = self.GetActiveElectionId(fullElectorAddr, hedge=True)
 
 		# Check if elections started
 		if (startWorkTime == 0):
@@ -1869,6 +2087,16 @@ class MyTonCore():
 
 		seqno = self.GetSeqno(wallet)
 		resultFilePath = self.local.buffer.my_temp_dir + wallet.name + "_wallet-query"
+		if self.IsNativeWalletMessages(wallet):
+			if "v4" in wallet.version and subwallet is None:
+				subwallet = self.GetWalletId(wallet)
+			signing_key = load_signing_key(wallet.privFilePath)
+			dest_addr = self.GetTransferDest(dest, flags)
+			boc = build_wallet_transfer(wallet, signing_key, dest_addr, to_nanotons(coins), seqno, mode=mode, subwallet=subwallet)
+			savedFilePath = save_boc(boc, resultFilePath + ".boc")
+			self.SendFile(savedFilePath, wallet, timeout=timeout)
+			return
+		#end if
 		if "v1" in wallet.version:
 			fiftScript = "wallet.fif"
 			args = [fiftScript, wallet.path, dest, seqno, coins, "-m", mode, resultFilePath]
@@ -1899,6 +2127,19 @@ class MyTonCore():
 			return
 		#end if
 
+		if self.IsNativeWalletMessages(wallet):
+			orders = list()
+			for dest, coins in destList:
+				workchain, addr, bounce = self.GetTransferDest(dest, list())
+				orders.append((workchain, addr, bounce, to_nanotons(coins)))
+			seqno = self.GetSeqno(wallet) if "v1" in wallet.version else None
+			signing_key = load_signing_key(wallet.privFilePath)
+			boc = build_highload_transfer(wallet, signing_key, orders, seqno=seqno)
+			savedFilePath = save_boc(boc, self.local.buffer.my_temp_dir + wallet.name + "_wallet-query.boc")
+			self.SendFile(savedFilePath, wallet, timeout=timeout)
+			return
+		#end if
+
 		orderFilePath = self.local.buffer.my_temp_dir + wallet.name + "_order.txt"
 		lines = list()
 		for dest, coins in destList:
@@ -1938,7 +2179,8 @@ class MyTonCore():
 	def GetElectionEntries(self, past=False):
 		# Get buffer
 		bname = "electionEntries" + str(past)
-		buff = self.GetFunctionBuffer(bname)
+		tag = self.GetEpochTag("masterchainBlock")
+		buff = self.GetFunctionBuffer(bname, namespace="masterchainBlock", tag=tag)
 		if buff:
 			return buff
 		#end if
@@ -1989,12 +2231,15 @@ class MyTonCore():
 			item["stake"] = ng2g(entry[1][0])
 			item["maxFactor"] = round(entry[1][1] / 655.36) / 100.0
 			item["walletAddr_hex"] = Dec2HexAddr(entry[1][2])
-			item["walletAddr"] = self.AddrFull2AddrB64("-1:"+item["walletAddr_hex"])
 			entries[adnlAddr] = item
 		#end for
+		items = list(entries.values())
+		walletAddrs = self.AddrFull2AddrB64List(["-1:" + item["walletAddr_hex"] for item in items])
+		for item, walletAddr in zip(items, walletAddrs):
+			item["walletAddr"] = walletAddr
 
 		# Set buffer
-		self.SetFunctionBuffer(bname, entries)
+		self.SetFunctionBuffer(bname, entries, namespace="masterchainBlock", tag=tag)
 
 		# Save elections
 		electionId = str(electionId)
@@ -2112,6 +2357,7 @@ class MyTonCore():
 		rawComplaints = rawComplaints[0]
 		config34 = self.GetConfig34()
 		totalWeight = config34.get("totalWeight")
+		validatorSet = self.GetValidatorSet(32)
 
 		# Get json
 		for complaint in rawComplaints:
@@ -2128,7 +2374,7 @@ class MyTonCore():
 			item["hash"] = chash
 			item["hash_hex"] = dec2hex(chash)
 			pubkey = Dec2HexAddr(buff[0]) # *validator_pubkey*
-			adnl = self.GetAdnlFromPubkey(pubkey)
+			adnl = validatorSet.adnl_by_pubkey.get(pubkey)
 			item["pubkey"] = pubkey
 			item["adnl"] = adnl
 			item["description"] = buff[1] # *description*
@@ -2201,13 +2447,8 @@ class MyTonCore():
 	#end define
 
 	def GetAdnlFromPubkey(self, inputPubkey):
-		config32 = self.GetConfig32()
-		validators = config32["validators"]
-		for validator in validators:
-			adnl = validator["adnlAddr"]
-			pubkey = validator["pubkey"]
-			if pubkey == inputPubkey:
-				return adnl
+		validatorSet = self.GetValidatorSet(32)
+		return validatorSet.adnl_by_pubkey.get(inputPubkey)
 	#end define
 
 	def GetComplaintsNumber(self):
@@ -2397,71 +2638,8 @@ class MyTonCore():
 		else:
 			filePrefix = ""
 		cmd = f"checkloadall {start} {end} {filePrefix}"
-		result = self.liteClient.Run(cmd, timeout=30)
-		lines = result.split('\n')
-		data = dict()
-		for line in lines:
-			if "val" in line and "pubkey" in line:
-				buff = line.split(' ')
-				vid = buff[1]
-				vid = vid.replace('#', '')
-				vid = vid.replace(':', '')
-				vid = int(vid)
-				pubkey = buff[3]
-				pubkey = pubkey.replace(',', '')
-				blocksCreated_buff = buff[6]
-				blocksCreated_buff = blocksCreated_buff.replace('(', '')
-				blocksCreated_buff = blocksCreated_buff.replace(')', '')
-				blocksCreated_buff = blocksCreated_buff.split(',')
-				masterBlocksCreated = float(blocksCreated_buff[0])
-				workBlocksCreated = float(blocksCreated_buff[1])
-				blocksExpected_buff = buff[8]
-				blocksExpected_buff = blocksExpected_buff.replace('(', '')
-				blocksExpected_buff = blocksExpected_buff.replace(')', '')
-				blocksExpected_buff = blocksExpected_buff.split(',')
-				masterBlocksExpected = float(blocksExpected_buff[0])
-				workBlocksExpected = float(blocksExpected_buff[1])
-				if masterBlocksExpected == 0:
-					mr = 0
-				else:
-					mr = masterBlocksCreated / masterBlocksExpected
-				if workBlocksExpected == 0:
-					wr = 0
-				else:
-					wr = workBlocksCreated / workBlocksExpected
-				if masterBlocksExpected > 0:  # show only masterchain efficiency for masterchain validator
-					r = mr
-				else:
-					r = (mr + wr) / 2
-				efficiency = round(r * 100, 2)
-				if efficiency > 10:
-					online = True
-				else:
-					online = False
-				item = dict()
-				item["id"] = vid
-				item["pubkey"] = pubkey
-				item["masterBlocksCreated"] = masterBlocksCreated
-				item["workBlocksCreated"] = workBlocksCreated
-				item["masterBlocksExpected"] = masterBlocksExpected
-				item["workBlocksExpected"] = workBlocksExpected
-				item["mr"] = mr
-				item["wr"] = wr
-				item["efficiency"] = efficiency
-				item["online"] = online
-
-				# Get complaint file
-				index = lines.index(line)
-				nextIndex = index + 2
-				if nextIndex < len(lines):
-					nextLine = lines[nextIndex]
-					if "COMPLAINT_SAVED" in nextLine:
-						buff = nextLine.split('\t')
-						item["var1"] = buff[1]
-						item["var2"] = buff[2]
-						item["fileName"] = buff[3]
-				data[vid] = item
-		#end for
+		lines = self.liteClient.RunLines(cmd, timeout=30)
+		data = parse_checkloadall(lines)
 
 		# Set buffer
 		self.SetFunctionBuffer(bname, data)
@@ -2594,16 +2772,12 @@ class MyTonCore():
 	#end define
 
 	def GetValidatorIndex(self, adnlAddr=None):
-		config34 = self.GetConfig34()
-		validators = config34.get("validators")
+		validatorSet = self.GetValidatorSet(34)
 		if adnlAddr is None:
 			adnlAddr = self.GetAdnlAddr()
-		index = 0
-		for validator in validators:
-			searchAdnlAddr = validator.get("adnlAddr")
-			if adnlAddr == searchAdnlAddr:
-				return index
-			index += 1
+		index = validatorSet.index_by_adnl.get(adnlAddr)
+		if index is not None:
+			return index
 		self.local.add_log("GetValidatorIndex warning: index not found.", "warning")
 		return -1
 	#end define
@@ -2667,83 +2841,11 @@ class MyTonCore():
 		buff = parse(text, "result:", "\n")
 		if buff is None or "error" in buff:
 			return
-		buff = buff.replace(')', ']')
-		buff = buff.replace('(', '[')
-		buff = buff.replace(']', ' ] ')
-		buff = buff.replace('[', ' [ ')
-		buff = buff.replace('bits:', '')
-		buff = buff.replace('refs:', '')
-		buff = buff.replace('.', '')
-		buff = buff.replace(';', '')
-		arr = buff.split()
-
-		# Get good raw data
-		output = ""
-		arrLen = len(arr)
-		for i in range(arrLen):
-			item = arr[i]
-			if '{' in item or '}' in item:
-				item = f"\"{item}\""
-			# get next item
-			if i+1 < arrLen:
-				nextItem = arr[i+1]
-			else:
-				nextItem = None
-			# add item to output
-			if item == '[':
-				output += item
-			elif nextItem == ']':
-				output += item
-			elif i+1 == arrLen:
-				output += item
-			else:
-				output += item + ', '
-		#end for
-
-		data = json.loads(output)
-		return data
+		return parse_stack(buff)
 	#end define
 
 	def Result2Dict(self, result):
-		rawAny = False
-		data = dict()
-		tabSpaces = 2
-		parenElementsList = list()
-		lines = result.split('\n')
-		for line in lines:
-			firstSpacesCount = self.GetFirstSpacesCount(line)
-			deep = firstSpacesCount // tabSpaces
-			line = line.lstrip()
-			if "raw@Any" in line:
-				rawAny = True
-			if rawAny == True and ')' in line:
-				rawAny = False
-			if line[:2] == "x{" and rawAny == False:
-				continue
-			if deep == 0:
-				data[line] = dict()
-				parenElementsList = [line]
-			else:
-				buff = data
-				parenElementsList = parenElementsList[:deep]
-				for item in parenElementsList:
-					buff = buff[item]
-				buff[line] = dict()
-				parenElementsList.append(line)
-			#end if
-		#end for
-		return data
-	#end define
-
-	def GetFirstSpacesCount(self, line):
-		result = 0
-		for item in line:
-			if item == ' ':
-				result += 1
-			else:
-				break
-		#end for
-		return result
+		return parse_result_tree(result)
 	#end define
 
 	def GetVarFromDict(self, data, search):
@@ -2891,79 +2993,25 @@ class MyTonCore():
 		return destination
 	# end define
 
+	def GetAddressCodec(self):
+		# The network is resolved once, not on every conversion
+		if self.addressCodec is None:
+			warn = lambda text: self.local.add_log(text, "warning")
+			self.addressCodec = AddressCodec(self.IsTestnet(), warn=warn)
+		return self.addressCodec
+	#end define
+
 	def AddrFull2AddrB64(self, addrFull, bounceable=True):
-		if addrFull is None or "None" in addrFull:
-			return
-		testnet = self.IsTestnet()
-		buff = addrFull.split(':')
-		workchain = int(buff[0])
-		addr = buff[1]
-		if len(addr) != 64:
-			raise Exception("AddrFull2AddrB64 error: Invalid length of hexadecimal address")
-		#end if
+		return self.GetAddressCodec().full_to_b64(addrFull, bounceable)
+	#end define
 
-		# Create base64 address
-		b = bytearray(36)
-		b[0] = 0x51 - bounceable * 0x40 + testnet * 0x80
-		b[1] = workchain % 256
-		b[2:34] = bytearray.fromhex(addr)
-		buff = bytes(b[:34])
-		crc = crc16.xmodem(buff)
-		b[34] = crc >> 8
-		b[35] = crc & 0xff
-		result = base64.b64encode(b)
-		result = result.decode()
-		result = result.replace('+', '-')
-		result = result.replace('/', '_')
-		return result
+	def AddrFull2AddrB64List(self, addrs, bounceable=True):
+		return self.GetAddressCodec().full_list_to_b64(addrs, bounceable)
 	#end define
 
 	def ParseAddrB64(self, addrB64):
-		# Get buffer
-		fname = addrB64
-		buff = self.GetFunctionBuffer(fname, timeout=1)
-		if buff:
-			return buff
-		#end if
-
-		buff = addrB64.replace('-', '+')
-		buff = buff.replace('_', '/')
-		buff = buff.encode()
-		b = base64.b64decode(buff)
-		testnet_int = (b[0] & 0x80)
-		if testnet_int == 0:
-			testnet = False
-		else:
-			testnet = True
-		bounceable_int = (b[0] & 0x40)
-		if bounceable_int != 0:
-			bounceable = False
-		else:
-			bounceable = True
-		networkTestnet = self.IsTestnet()
-		if testnet != networkTestnet:
-			text = f"ParseAddrB64 warning: testnet flag do not match. Addr: {testnet}, Network: {networkTestnet}"
-			self.local.add_log(text, "warning")
-		#end if
-
-		# get wc and addr
-		workchain_bytes = b[1:2]
-		addr_bytes = b[2:34]
-		crc_bytes = b[34:36]
-		crc_data = bytes(b[:34])
-		crc = int.from_bytes(crc_bytes, "big")
-		check_crc = crc16.xmodem(crc_data)
-		if crc != check_crc:
-			raise Exception("ParseAddrB64 error: crc do not match")
-		#end if
-
-		workchain = int.from_bytes(workchain_bytes, "big", signed=True)
-		addr = addr_bytes.hex()
-
-		# Set buffer
-		data = (workchain, addr, bounceable)
-		self.SetFunctionBuffer(fname, data)
-		return data
+		workchain, addr, bounceable, testnet = self.GetAddressCodec().parse_b64(addrB64)
+		return workchain, addr, bounceable
 	#end define
 
 	def ParseAddrFull(self, addrFull):
@@ -3128,73 +3176,7 @@ class MyTonCore():
 		return self.get_mode_value('prometheus')
 
 	def Tlb2Json(self, text):
-		# Заменить скобки
-		start = 0
-		end = len(text)
-		if '=' in text:
-			start = text.find('=')+1
-		if "x{" in text:
-			end = text.find("x{")
-		text = text[start:end]
-		text = text.strip()
-		text = text.replace('(', '{')
-		text = text.replace(')', '}')
-
-		# Добавить кавычки к строкам (1 этап)
-		buff = text
-		buff = buff.replace('\r', ' ')
-		buff = buff.replace('\n', ' ')
-		buff = buff.replace('\t', ' ')
-		buff = buff.replace('{', ' ')
-		buff = buff.replace('}', ' ')
-		buff = buff.replace(':', ' ')
-
-		# Добавить кавычки к строкам (2 этап)
-		buff2 = ""
-		itemList = list()
-		for item in list(buff):
-			if item == ' ':
-				if len(buff2) > 0:
-					itemList.append(buff2)
-					buff2 = ""
-				itemList.append(item)
-			else:
-				buff2 += item
-		#end for
-
-		# Добавить кавычки к строкам (3 этап)
-		i = 0
-		for item in itemList:
-			l = len(item)
-			if item == ' ':
-				pass
-			elif item.isdigit() is False:
-				c = '"'
-				item2 = c + item + c
-				text = text[:i] + item2 + text[i+l:]
-				i += 2
-			#end if
-			i += l
-		#end for
-
-		# Обозначить тип объекта
-		text = text.replace('{"', '{"_":"')
-
-		# Расставить запятые
-		while True:
-			try:
-				data = json.loads(text)
-				break
-			except json.JSONDecodeError as err:
-				if "Expecting ',' delimiter" in err.msg:
-					text = text[:err.pos] + ',' + text[err.pos:]
-				elif "Expecting property name enclosed in double quotes" in err.msg:
-					text = text[:err.pos] + '"_":' + text[err.pos:]
-				else:
-					raise err
-		#end while
-
-		return data
+		return tlb2json(text)
 	#end define
 
 	def SignShardOverlayCert(self, adnl, pubkey):
@@ -3505,6 +3487,15 @@ class MyTonCore():
 		wallet = self.GetValidatorWallet()
 		addr_hash = HexAddr2Dec(wallet.addr)
 		liquid_pool_addr = self.GetLiquidPoolAddr()
+
+		# The address is derived from the pool and the owner, it does not change
+		chainCache = self.GetChainCache()
+		key = f"{liquid_pool_addr}:{controller_id}:{wallet.workchain}:{wallet.addr}"
+		controllerAddr = chainCache.get("controllerAddress", key)
+		if controllerAddr is not None:
+			return controllerAddr
+		#end if
+
 		cmd = f"runmethodfull {liquid_pool_addr} get_controller_address_legacy {controller_id} {wallet.workchain} {addr_hash}"
 		result = self.liteClient.Run(cmd)
 		buff = self.Result2List(result)
@@ -3512,6 +3503,7 @@ class MyTonCore():
 		addr_hash = Dec2HexAddr(buff[1])
 		addrFull = f"{wc}:{addr_hash}"
 		controllerAddr = self.AddrFull2AddrB64(addrFull)
+		chainCache.set("controllerAddress", key, controllerAddr)
 		return controllerAddr
 	#end define
 
@@ -3834,24 +3826,43 @@ class MyTonCore():
 	def get_validator_engine_ip(self):
 		return self.validatorConsole.addr.split(':')[0]
 
-	def GetFunctionBuffer(self, name, timeout=10):
-		timestamp = get_timestamp()
-		buff = self.local.buffer.get(name)
-		if buff is None:
-			return
-		buffTime = buff.get("time")
-		diffTime = timestamp - buffTime
-		if diffTime > timeout:
-			return
-		data = buff.get("data")
-		return data
+	def GetFunctionBuffer(self, name, timeout=10, namespace="default", tag=None):
+		return self.cache.get(name, timeout, namespace, tag)
 	#end define
 
-	def SetFunctionBuffer(self, name, data):
-		buff = dict()
-		buff["time"] = get_timestamp()
-		buff["data"] = data
-		self.local.buffer[name] = buff
+	def SetFunctionBuffer(self, name, data, namespace="default", tag=None):
+		self.cache.set(name, data, namespace, tag)
+	#end define
+
+	def GetEpochTag(self, level, fetch=False):
+		"""
+		Seqno of the last key block ("keyBlock") or masterchain block
+		("masterchainBlock") seen by the synced local validator, taken from
+		the status it already reports, or from a new getstats with `fetch`.
+		None means unknown, the caller falls back to its timeout.
+		"""
+		status = self.syncState.get_fresh_status()
+		if status is None:
+			status = self.GetFunctionBuffer("validator_status")
+		if status is None and fetch:
+			status = self.GetValidatorStatus()
+		if status is None or status.get("is_working") is not True:
+			return None
+		out_of_sync = status.get("out_of_sync")
+		if out_of_sync is None or out_of_sync >= 20:
+			return None
+		if level == "keyBlock":
+			return status.get("keymasterchainblock")
+		return status.get("masterchainblock")
+	#end define
+
+	def CheckEpochTag(self, tag, seqno):
+		# The tag for an answer read at masterchain `seqno`. A liteserver behind
+		# the local validator may answer from before the key block, such answer
+		# is not tagged and lives for the timeout of the buffer only.
+		if tag is None or seqno is None or seqno < tag:
+			return None
+		return tag
 	#end define
 
 	def IsTestnet(self):
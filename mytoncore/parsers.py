@@ -0,0 +1,408 @@
+import hashlib
+import re
+
+
+TLB_TOKEN = re.compile(r"[{}:]|[^\s{}:]+")
+TLB_BRACKETS = str.maketrans("()", "{}")
+
+
+def tlb2json(text):
+	"""
+	Parse TL-B pretty print of lite-client (`getconfig`, `runmethod` output)
+	in one pass. The type name of an object goes to the "_" key:
+	(hml_same v:0 n:16) -> {"_": "hml_same", "v": 0, "n": 16}
+	"""
+	start = 0
+	end = len(text)
+	if '=' in text:
+		start = text.find('=')+1
+	if "x{" in text:
+		end = text.find("x{")
+	text = text[start:end].translate(TLB_BRACKETS)
+	tokens = TLB_TOKEN.findall(text)
+
+	# stack items: [object, pending key]
+	stack = list()
+	result = None
+	done = False
+	i = 0
+	count = len(tokens)
+	while i < count:
+		token = tokens[i]
+		i += 1
+		if token == '{':
+			stack.append([dict(), None])
+			continue
+		elif token == '}':
+			if len(stack) == 0:
+				raise Exception("Tlb2Json error: unexpected '}'")
+			value = stack.pop()[0]
+		elif token == ':':
+			raise Exception("Tlb2Json error: unexpected ':'")
+		elif len(stack) > 0 and stack[-1][1] is None and i < count and tokens[i] == ':':
+			stack[-1][1] = token
+			i += 1
+			continue
+		else:
+			value = int(token) if token.isdigit() else token
+		#end if
+
+		if len(stack) == 0:
+			if done:
+				raise Exception("Tlb2Json error: extra data after the value")
+			result = value
+			done = True
+			continue
+		item = stack[-1]
+		key = item[1] if item[1] is not None else '_'
+		item[0][key] = value
+		item[1] = None
+	#end while
+
+	if len(stack) > 0:
+		raise Exception("Tlb2Json error: unexpected end of data")
+	if done is False:
+		raise Exception("Tlb2Json error: no data")
+	return result
+#end define
+
+
+STACK_TOKEN = re.compile(r"[\[\]()]|[^\s\[\](){}]+(?:\{(?:[^{}]|\{[^{}]*\})*\})?")
+STACK_CELL = re.compile(r"(\w+)\{(?:Cell\{)?([0-9A-Fa-f_]*)\}?(?: bits: (\d+)\.\.(\d+); refs: (\d+)\.\.(\d+))?")
+
+
+class StackCell(str):
+	"""
+	Cell, slice or builder of a TVM stack. Equal to its lite-client text,
+	C{...}, CS{Cell{...} bits: 0..267; refs: 0..0} or BC{...}
+	"""
+
+	def __new__(cls, text):
+		self = super().__new__(cls, text)
+		self.kind = None
+		self.hex = None
+		self.bits = None
+		self.refs = None
+		match = STACK_CELL.match(text)
+		if match is not None:
+			self.kind = match.group(1)
+			self.hex = match.group(2)
+			if match.group(3) is not None:
+				self.bits = (int(match.group(3)), int(match.group(4)))
+				self.refs = (int(match.group(5)), int(match.group(6)))
+		return self
+	#end define
+#end class
+
+
+def parse_stack(text):
+	"""
+	Parse `runmethodfull` stack, e.g. [ 1 (null) [ 2 C{AB} ] ], in one pass
+	over its tokens. Tuples and lists become lists, null becomes None,
+	numbers become int, cells and slices become StackCell.
+	"""
+	stack = list()
+	current = list()
+	append = current.append
+	for token in get_stack_tokens(text):
+		char = token[0]
+		if char == '[' or char == '(':
+			stack.append(current)
+			current = list()
+			append = current.append
+		elif char == ']' or char == ')':
+			if len(stack) == 0:
+				raise Exception(f"parse_stack error: unexpected '{token}'")
+			value = current
+			current = stack.pop()
+			append = current.append
+			append(value)
+		elif token[-1] == '}':
+			append(StackCell(token))
+		else:
+			try:
+				append(int(token))
+			except ValueError:
+				append(get_stack_value(token))
+	#end for
+
+	if len(stack) > 0:
+		raise Exception("parse_stack error: unexpected end of data")
+	if len(current) == 1:
+		return current[0]
+	return current
+#end define
+
+def get_stack_tokens(text):
+	# Cells have spaces and brackets inside, without them plain splitting is enough
+	if '{' in text:
+		return STACK_TOKEN.findall(text)
+	return text.replace('[', " [ ").replace(']', " ] ").replace('(', " ( ").replace(')', " ) ").split()
+#end define
+
+def get_stack_value(word):
+	if word == "null":
+		return None
+	if word == "NaN":
+		return float("nan")
+	return word
+#end define
+
+
+def parse_result_tree(text, tab_spaces=2):
+	"""
+	Indented lite-client output (`dumptrans`, `lasttransdump`) as a tree of
+	dicts, line -> child lines, built in one pass with a stack of parents.
+	Hex lines (x{...}) are skipped except inside raw@Any.
+	"""
+	root = dict()
+	stack = [root]
+	raw_any = False
+	for line in text.split('\n'):
+		stripped = line.lstrip(' ')
+		deep = (len(line) - len(stripped)) // tab_spaces
+		line = stripped.lstrip()
+		if "raw@Any" in line:
+			raw_any = True
+		if raw_any and ')' in line:
+			raw_any = False
+		if line[:2] == "x{" and raw_any is False:
+			continue
+		del stack[deep+1:]
+		child = dict()
+		stack[-1][line] = child
+		stack.append(child)
+	#end for
+	return root
+#end define
+
+
+ACCOUNT_TOKEN = re.compile(
+	r"workchain_id:(?P<workchain>-?\d+) address:x(?P<address>[0-9A-Fa-f]+)"
+	r"|grams:\(nanograms\s+amount:\(var_uint len:\d+ value:(?P<balance>\d+)\)"
+	r"|state:\(?account_(?P<status>[a-z]+)"
+	r"|(?P<cell>code|data):\(just\s+value:[^\n]*(?P<cells>(?:\s+x\{[0-9A-Fa-f_]*\})+)"
+	r"|lt = (?P<lt>\d+) hash = (?P<hash>[0-9A-Fa-f]+)"
+)
+PRINTED_CELL = re.compile(r"x\{([0-9A-Fa-f_]*)\}")
+
+
+def parse_account(text):
+	"""
+	Parse `getaccount` output in one scan. Returns None for an empty
+	account, otherwise the fields of `get_account_state` of the native
+	backend; code and data are hex of the printed cells, in order.
+	"""
+	if "storage:" not in text:
+		return None
+	account = {"status": None, "balance": None, "code": None, "data": None, "code_hash": None, "lt": None, "hash": None}
+	for match in ACCOUNT_TOKEN.finditer(text):
+		group = match.lastgroup
+		if group == "address" and "address" not in account:
+			account["workchain"] = int(match.group("workchain"))
+			account["address"] = match.group("address").lower()
+		elif group == "balance" and account["balance"] is None:
+			account["balance"] = int(match.group("balance"))
+		elif group == "status" and account["status"] is None:
+			account["status"] = match.group("status")
+		elif group == "cells" and account[match.group("cell")] is None:
+			account[match.group("cell")] = get_printed_cells_hex(match.group("cells"))
+		elif group == "hash" and account["lt"] is None:
+			account["lt"] = match.group("lt")
+			account["hash"] = match.group("hash")
+	#end for
+
+	if account["code"] is not None:
+		account["code_hash"] = hashlib.sha256(bytes.fromhex(account["code"])).hexdigest()
+	return account
+#end define
+
+def get_printed_cells_hex(text):
+	# Concatenated `x{...}` lines, the way MyTonCore.GetBody reads them
+	body = ""
+	for buff in PRINTED_CELL.findall(text):
+		buff = buff.replace('_', '')
+		if len(buff) % 2 == 1:
+			buff = "0" + buff
+		body += buff
+	if body == "":
+		return None
+	return body
+#end define
+
+
+def parse_checkloadall(lines):
+	"""
+	Validator records of `checkloadall` output by validator id, read line
+	by line. A COMPLAINT_SAVED line two lines below a record belongs to it.
+	"""
+	data = dict()
+	previous = None
+	before_previous = None
+	for line in lines:
+		if before_previous is not None and "COMPLAINT_SAVED" in line:
+			buff = line.split('\t')
+			before_previous["var1"] = buff[1]
+			before_previous["var2"] = buff[2]
+			before_previous["fileName"] = buff[3]
+		item = None
+		if "val" in line and "pubkey" in line:
+			item = parse_checkload_line(line)
+			data[item["id"]] = item
+		before_previous = previous
+		previous = item
+	#end for
+	return data
+#end define
+
+def parse_checkload_line(line):
+	# val #12: pubkey 7E5A...6C, blocks created (10,2113) expected (9.87,2100.0) ...
+	buff = line.split(' ')
+	vid = int(buff[1].replace('#', '').replace(':', ''))
+	pubkey = buff[3].replace(',', '')
+	blocksCreated = buff[6].replace('(', '').replace(')', '').split(',')
+	masterBlocksCreated = float(blocksCreated[0])
+	workBlocksCreated = float(blocksCreated[1])
+	blocksExpected = buff[8].replace('(', '').replace(')', '').split(',')
+	masterBlocksExpected = float(blocksExpected[0])
+	workBlocksExpected = float(blocksExpected[1])
+	if masterBlocksExpected == 0:
+		mr = 0
+	else:
+		mr = masterBlocksCreated / masterBlocksExpected
+	if workBlocksExpected == 0:
+		wr = 0
+	else:
+		wr = workBlocksCreated / workBlocksExpected
+	if masterBlocksExpected > 0:  # show only masterchain efficiency for masterchain validator
+		r = mr
+	else:
+		r = (mr + wr) / 2
+	efficiency = round(r * 100, 2)
+	item = dict()
+	item["id"] = vid
+	item["pubkey"] = pubkey
+	item["masterBlocksCreated"] = masterBlocksCreated
+	item["workBlocksCreated"] = workBlocksCreated
+	item["masterBlocksExpected"] = masterBlocksExpected
+	item["workBlocksExpected"] = workBlocksExpected
+	item["mr"] = mr
+	item["wr"] = wr
+	item["efficiency"] = efficiency
+	item["online"] = efficiency > 10
+	return item
+#end define
+
+
+VALIDATOR_SET_FIELD = re.compile(r"\b(utime_since|utime_until|total|main|total_weight):(\d+)")
+VALIDATOR_DESCR = re.compile(r"pubkey:x([0-9A-Fa-f]+)\) weight:(\d+)(?: adnl_addr:x([0-9A-Fa-f]+))?")
+VALIDATOR_SET_KEYS = {
+	"utime_since": "startWorkTime",
+	"utime_until": "endWorkTime",
+	"total": "totalValidators",
+	"main": "mainValidators",
+	"total_weight": "totalWeight",
+}
+
+
+def parse_validator_set(text):
+	"""
+	Parse `getconfig 32/34/36` output, the same fields as
+	lite_api.parse_validator_set of the native backend
+	"""
+	result = dict()
+	for name, value in VALIDATOR_SET_FIELD.findall(text):
+		key = VALIDATOR_SET_KEYS[name]
+		if key not in result:
+			result[key] = int(value)
+	if "startWorkTime" not in result:
+		raise Exception("parse_validator_set error: validator set not found")
+	validators = list()
+	for pubkey, weight, adnl in VALIDATOR_DESCR.findall(text):
+		validator = dict()
+		validator["adnlAddr"] = adnl or None
+		validator["pubkey"] = pubkey
+		validator["weight"] = int(weight)
+		validators.append(validator)
+	result["validators"] = validators
+	if "totalWeight" not in result:
+		result["totalWeight"] = sum(item["weight"] for item in validators)
+	return result
+#end define
+
+
+def get_worker_var(text, search):
+	"""
+	Value of `search:` in lite-client output up to the end of the line or
+	the closing bracket of the value, e.g. "(var_uint len:5 value:100)"
+	"""
+	if ':' not in search:
+		search += ':'
+	if search is None or text is None:
+		return None
+	if search not in text:
+		return None
+	start = text.find(search) + len(search)
+	count = 0
+	bcount = 0
+	textLen = len(text)
+	end = textLen
+	for i in range(start, textLen):
+		letter = text[i]
+		if letter == '(':
+			count += 1
+			bcount += 1
+		elif letter == ')':
+			count -= 1
+		if letter == ')' and count < 1:
+			end = i + 1
+			break
+		elif letter == '\n' and count < 1:
+			end = i
+			break
+	result = text[start:end]
+	if count != 0 and bcount == 0:
+		result = result.replace(')', '')
+	return result
+#end define
+
+def parse_block_transactions(text):
+	# `listblocktrans` output, returns [(account, lt, hash), ...]
+	transactions = list()
+	for line in text.split('\n'):
+		if "transaction #" in line:
+			buff = line.split(' ')
+			transactions.append((buff[3], buff[5], buff[7]))
+	return transactions
+#end define
+
+def parse_shards(text):
+	# `allshards` output, returns [(shard id, block), ...]
+	shards = list()
+	for line in text.split('\n'):
+		if "shard #" in line:
+			buff = line.split(' ')
+			shards.append((buff[1].replace('#', ''), buff[3]))
+	return shards
+#end define
+
+def parse_block_seqno(buff):
+	# Seqno of a block id from `getstats`: (-1,8000000000000000,123):...
+	buffList = buff.split(':')
+	buff2 = buffList[0]
+	buff2 = buff2.replace(' ', '')
+	buff2 = buff2.replace('(', '')
+	buff2 = buff2.replace(')', '')
+	buffList2 = buff2.split(',')
+	return int(buffList2[2])
+#end define
+
+def parse_fift_request(text, title):
+	# Fift request scripts print the request to sign on the line after the title
+	resultList = text.split('\n')
+	start_index = 0
+	for i, item in enumerate(resultList):
+		if title in item:
+			start_index = i
+	return resultList[start_index + 1]
+#end define
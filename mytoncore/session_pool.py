@@ -0,0 +1,284 @@
+import atexit
+import itertools
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+
+class Session:
+	"""
+	Long-lived interactive process (lite-client, validator-engine-console).
+	Every command is followed by a unique marker command, the tool answers it
+	with an `unknown command` line. Network answers may come after that line,
+	so the response ends with the line recognised by `is_complete` (or with
+	an error on stderr), then a closing marker is sent and its reply is
+	awaited. Output after the end of a response raises and closes the
+	session. Without `is_complete` (a handshake whose output is thrown away)
+	the response ends when the output is quiet for `settle_time`.
+	"""
+
+	def __init__(self, args, init_cmd=None, init_timeout=10):
+		self.args = args
+		self.marker_prefix = "mtc_marker_" + uuid.uuid4().hex[:12]
+		self.counter = itertools.count()
+		self.last_used = time.time()
+		self.broken = False
+		self.settle_time = 0.05
+		self.stdout_queue = queue.Queue()
+		self.stderr_lines = list()
+		self.stderr_lock = threading.Lock()
+		self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+		self.start_reader(self.read_stdout)
+		self.start_reader(self.read_stderr)
+
+		# Wait for the handshake so that its output does not get into the first response
+		if init_cmd is not None:
+			self.Run(init_cmd, timeout=init_timeout)
+	#end define
+
+	def start_reader(self, func):
+		threading.Thread(target=func, name=func.__name__, daemon=True).start()
+	#end define
+
+	def read_stdout(self):
+		for line in iter(self.process.stdout.readline, b''):
+			self.stdout_queue.put(line)
+		self.stdout_queue.put(None)
+	#end define
+
+	def read_stderr(self):
+		marker_prefix = self.marker_prefix.encode("utf-8")
+		for line in iter(self.process.stderr.readline, b''):
+			if marker_prefix in line:
+				# Some builds report unknown commands to stderr
+				self.stdout_queue.put(line)
+				continue
+			with self.stderr_lock:
+				self.stderr_lines.append(line)
+	#end define
+
+	def drain(self):
+		# Output that came after the previous response was closed
+		leftover = 0
+		while True:
+			try:
+				line = self.stdout_queue.get_nowait()
+			except queue.Empty:
+				break
+			if line is None:
+				self.close()
+				break
+			leftover += 1
+		with self.stderr_lock:
+			leftover += len(self.stderr_lines)
+			self.stderr_lines.clear()
+		return leftover
+	#end define
+
+	def has_stderr(self):
+		with self.stderr_lock:
+			return len(self.stderr_lines) > 0
+	#end define
+
+	def is_alive(self):
+		return self.broken is False and self.process.poll() is None
+	#end define
+
+	def close(self):
+		self.broken = True
+		if self.process.poll() is not None:
+			return
+		try:
+			self.process.stdin.close()
+		except Exception: pass
+		self.process.kill()
+		self.process.wait()
+	#end define
+
+	def write(self, text):
+		try:
+			self.process.stdin.write(text.encode("utf-8"))
+			self.process.stdin.flush()
+		except (BrokenPipeError, ValueError, OSError) as ex:
+			self.close()
+			raise Exception(f"Session error: process is not running: {ex}")
+	#end define
+
+	def Run(self, cmd, timeout, cancel=None, is_complete=None):
+		if not self.is_alive():
+			raise Exception("Session error: process is not running")
+		if self.drain() > 0:
+			self.close()
+			raise Exception("Session error: output of a previous command after its response")
+		marker = "{prefix}_{num}_".format(prefix=self.marker_prefix, num=next(self.counter))
+		closing_marker = None
+		self.write(f"{cmd}\n{marker}\n")
+
+		# Network queries are answered asynchronously, so the marker reply may come
+		# before the response itself. The response is over once its last line is seen
+		# and the marker is answered, then it is closed with the reply to a second marker.
+		lines = list()
+		marker_seen = False
+		complete = False
+		deadline = time.time() + timeout
+		while True:
+			if cancel is not None and cancel.is_set():
+				self.close()
+				raise Exception("Session error: command was cancelled")
+			wait = deadline - time.time()
+			if wait <= 0:
+				self.close()
+				raise subprocess.TimeoutExpired(self.args + [cmd], timeout)
+			if marker_seen and closing_marker is None:
+				wait = min(wait, self.settle_time if is_complete is None else 0.1)
+			elif cancel is not None:
+				wait = min(wait, 0.1)
+			try:
+				line = self.stdout_queue.get(timeout=wait)
+			except queue.Empty:
+				line = None
+				if is_complete is None:
+					complete = marker_seen and (len(lines) > 0 or self.has_stderr())
+			else:
+				if line is None:
+					self.close()
+					raise Exception("Session error: process exited unexpectedly")
+				line = line.decode("utf-8")
+				if closing_marker is not None and closing_marker in line:
+					break
+				if closing_marker is not None and is_complete is not None:
+					self.close()
+					raise Exception("Session error: output after the end of the response")
+				if marker in line:
+					marker_seen = True
+					line = None
+				else:
+					lines.append(line)
+			if is_complete is not None and not complete:
+				complete = (line is not None and is_complete(line)) or self.has_stderr()
+			if marker_seen and complete and closing_marker is None:
+				closing_marker = "{prefix}_{num}_".format(prefix=self.marker_prefix, num=next(self.counter))
+				self.write(f"{closing_marker}\n")
+		#end while
+
+		with self.stderr_lock:
+			err = b"".join(self.stderr_lines).decode("utf-8")
+			self.stderr_lines.clear()
+		# The closing marker is answered at once, anything queued behind it belongs to this response
+		if self.drain() > 0:
+			self.close()
+			raise Exception("Session error: output after the end of the response")
+		self.last_used = time.time()
+		output = "".join(lines)
+		return output, err
+	#end define
+#end class
+
+
+class SessionPool:
+	"""
+	Pool of sessions keyed by process arguments. Grows on demand up to
+	`max_size` processes, closes sessions idle for longer than
+	`idle_timeout` seconds and replaces the ones that died.
+	"""
+
+	def __init__(self, max_size=4, idle_timeout=300):
+		self.max_size = max_size
+		self.idle_timeout = idle_timeout
+		self.idle = dict()
+		self.busy = 0
+		self.condition = threading.Condition()
+		atexit.register(self.close_all)
+	#end define
+
+	def get_size(self):
+		return self.busy + sum(len(sessions) for sessions in self.idle.values())
+	#end define
+
+	def shrink(self):
+		# Called under self.condition
+		timestamp = time.time()
+		for key, sessions in list(self.idle.items()):
+			for session in list(sessions):
+				if session.is_alive() and timestamp - session.last_used < self.idle_timeout:
+					continue
+				sessions.remove(session)
+				session.close()
+			if len(sessions) == 0:
+				del self.idle[key]
+	#end define
+
+	def evict_one(self):
+		# Called under self.condition. Close the least recently used idle session of any key
+		oldest = None
+		for key, sessions in self.idle.items():
+			for session in sessions:
+				if oldest is None or session.last_used < oldest[1].last_used:
+					oldest = (key, session)
+		if oldest is None:
+			return False
+		key, session = oldest
+		self.idle[key].remove(session)
+		if len(self.idle[key]) == 0:
+			del self.idle[key]
+		session.close()
+		return True
+	#end define
+
+	def acquire(self, key, timeout):
+		deadline = time.time() + timeout
+		with self.condition:
+			while True:
+				self.shrink()
+				sessions = self.idle.get(key)
+				if sessions:
+					session = sessions.pop()
+					self.busy += 1
+					return session
+				if self.get_size() < self.max_size or self.evict_one():
+					self.busy += 1
+					return None
+				wait = deadline - time.time()
+				if wait <= 0:
+					raise Exception("SessionPool error: no free sessions")
+				self.condition.wait(wait)
+		#end with
+	#end define
+
+	def release(self, key, session):
+		with self.condition:
+			self.busy -= 1
+			if session is not None and session.is_alive():
+				self.idle.setdefault(key, list()).append(session)
+			self.condition.notify()
+	#end define
+
+	def Run(self, args, cmd, timeout, init_cmd=None, cancel=None, is_complete=None):
+		key = tuple(args)
+		session = self.acquire(key, timeout)
+		try:
+			if session is not None and session.drain() > 0:
+				# Late output of the previous command, start over with a new process
+				session.close()
+				session = None
+			if session is None:
+				session = Session(list(args), init_cmd=init_cmd, init_timeout=timeout)
+			return session.Run(cmd, timeout, cancel=cancel, is_complete=is_complete)
+		except:
+			if session is not None:
+				session.close()
+			raise
+		finally:
+			self.release(key, session)
+	#end define
+
+	def close_all(self):
+		with self.condition:
+			for sessions in self.idle.values():
+				for session in sessions:
+					session.close()
+			self.idle.clear()
+	#end define
+#end class
@@ -0,0 +1,63 @@
+import threading
+
+
+class Call:
+	def __init__(self):
+		self.event = threading.Event()
+		self.result = None
+		self.error = None
+	#end define
+#end class
+
+
+class SingleFlight:
+	"""
+	Concurrent calls with the same key share one execution and its result.
+	Nothing is cached: a call that starts after the execution is finished
+	runs again.
+	"""
+
+	def __init__(self):
+		self.calls = dict()
+		self.lock = threading.Lock()
+		self.stats = {"calls": 0, "executions": 0, "shared": 0}
+	#end define
+
+	def do(self, key, func):
+		with self.lock:
+			self.stats["calls"] += 1
+			call = self.calls.get(key)
+			if call is not None:
+				self.stats["shared"] += 1
+				leader = False
+			else:
+				call = Call()
+				self.calls[key] = call
+				self.stats["executions"] += 1
+				leader = True
+		#end with
+
+		if leader is False:
+			call.event.wait()
+			if call.error is not None:
+				raise call.error
+			return call.result
+		try:
+			call.result = func()
+			return call.result
+		except Exception as ex:
+			call.error = ex
+			raise
+		finally:
+			with self.lock:
+				del self.calls[key]
+			call.event.set()
+	#end define
+
+	def get_stats(self):
+		with self.lock:
+			result = dict(self.stats)
+			result["in_flight"] = len(self.calls)
+		return result
+	#end define
+#end class
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import namedtuple
+
+
+class SyncSnapshot(namedtuple("SyncSnapshot", ["status", "timestamp"])):
+	__slots__ = ()
+
+	def get_age(self):
+		return time.time() - self.timestamp
+	#end define
+
+	def is_stale(self, max_age):
+		return self.get_age() > max_age
+	#end define
+#end class
+
+
+class SyncStateTracker:
+	"""
+	Refreshes validator sync state in a background thread and publishes it
+	as an immutable snapshot. Readers never block on validator-engine-console.
+	Only the mytoncore daemon starts it, mytonctrl does not keep a watcher.
+	"""
+
+	def __init__(self, local, fetch, interval=5, stale_after=30):
+		self.local = local
+		self.fetch = fetch
+		self.interval = interval
+		self.stale_after = stale_after
+		self.snapshot = None
+		self.thread = None
+		self.lock = threading.Lock()
+	#end define
+
+	def start(self):
+		with self.lock:
+			if self.thread is not None and self.thread.is_alive():
+				return
+			self.thread = threading.Thread(target=self.loop, name="SyncStateTracker", daemon=True)
+			self.thread.start()
+	#end define
+
+	def is_running(self):
+		return self.thread is not None and self.thread.is_alive()
+	#end define
+
+	def loop(self):
+		while True:
+			self.refresh()
+			time.sleep(self.interval)
+	#end define
+
+	def refresh(self):
+		try:
+			status = self.fetch()
+			self.snapshot = SyncSnapshot(status, time.time())
+		except Exception as ex:
+			self.local.add_log(f"SyncStateTracker warning: {ex}", "warning")
+	#end define
+
+	def get_snapshot(self):
+		return self.snapshot
+	#end define
+
+	def get_fresh_status(self):
+		# Only the result of a running watcher
+		snapshot = self.snapshot
+		if snapshot is None or snapshot.is_stale(self.stale_after):
+			return None
+		return snapshot.status
+	#end define
+#end class
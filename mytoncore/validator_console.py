@@ -1,4 +1,24 @@
+import re
 import subprocess
+import time
+
+from mytoncore.call_stats import CallStats
+from mytoncore.session_pool import SessionPool
+from mytoncore.singleflight import SingleFlight
+
+
+READ_ONLY_VERBS = ("getstats", "getconfig", "exportpub")
+# Last line of the answer, only these verbs can run in a persistent session
+ANSWER_END = "|not ready|^got error|failed"
+RESPONSE_END = {
+	"newkey": re.compile("^created new key " + ANSWER_END),
+	"exportpub": re.compile("^got public key: " + ANSWER_END),
+	"sign": re.compile("^got signature " + ANSWER_END),
+	"addpermkey": re.compile("^success" + ANSWER_END),
+	"addtempkey": re.compile("^success" + ANSWER_END),
+	"addadnl": re.compile("^success" + ANSWER_END),
+	"addvalidatoraddr": re.compile("^success" + ANSWER_END),
+}
 
 
 class ValidatorConsole:
@@ -8,20 +28,59 @@ class ValidatorConsole:
 		self.privKeyPath = None
 		self.pubKeyPath = None
 		self.addr = None
+		self.singleflight = SingleFlight()
+		self.pool = None
+		self.stats = CallStats(local)
+	#end define
+
+	def get_pool(self):
+		if self.pool is None:
+			max_size = self.local.db.get("console_pool_size", 2)
+			self.pool = SessionPool(max_size=max_size)
+		return self.pool
 	#end define
 
 	def Run(self, cmd, **kwargs):
+		if cmd.split(' ')[0] not in READ_ONLY_VERBS:
+			return self.run_cmd(cmd, **kwargs)
+		# Only calls with the same deadline and way of running join, a short timeout must not fail a longer one
+		key = (cmd, kwargs.get("timeout"), kwargs.get("pooled"))
+		return self.singleflight.do(key, lambda: self.run_cmd(cmd, **kwargs))
+	#end define
+
+	def run_cmd(self, cmd, **kwargs):
 		console_timeout = self.local.db.console_timeout if self.local.db.console_timeout else 3
 		timeout = kwargs.get("timeout", console_timeout)
 		if self.appPath is None or self.privKeyPath is None or self.pubKeyPath is None:
 			raise Exception("ValidatorConsole error: Validator console is not settings")
-		args = [self.appPath, "-k", self.privKeyPath, "-p", self.pubKeyPath, "-a", self.addr, "-v", "0", "--cmd", cmd]
-		process = subprocess.run(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
-		output = process.stdout.decode("utf-8")
-		err = process.stderr.decode("utf-8")
-		if len(err) > 0:
-			self.local.add_log("args: {args}".format(args=args), "error")
-			raise Exception("ValidatorConsole error: {err}".format(err=err))
+		args = [self.appPath, "-k", self.privKeyPath, "-p", self.pubKeyPath, "-a", self.addr, "-v", "0"]
+		pooled = kwargs.get("pooled", self.local.db.get("console_pool", False))
+		pooled = pooled and cmd.split(' ')[0] in RESPONSE_END
+		with self.stats.trace("console", cmd) as call:
+			output, err = None, None
+			if pooled:
+				output, err = self.run_pooled(args, cmd, timeout)
+			if output is None:
+				process = subprocess.run(args + ["--cmd", cmd], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+				output = process.stdout.decode("utf-8")
+				err = process.stderr.decode("utf-8")
+			call.output = output
+			if len(err) > 0:
+				args = args + ["--cmd", cmd]
+				self.local.add_log("args: {args}".format(args=args), "error")
+				raise Exception("ValidatorConsole error: {err}".format(err=err))
 		return output
 	#end define
+
+	def run_pooled(self, args, cmd, timeout):
+		# The session connects asynchronously, a fresh session answers "not ready"
+		# until the handshake is done. Such command was not executed and is sent again.
+		for attempt in range(2):
+			is_complete = RESPONSE_END[cmd.split(' ')[0]].search
+			output, err = self.get_pool().Run(args, cmd, timeout, init_cmd="getstats", is_complete=is_complete)
+			if "not ready" not in output and "not ready" not in err:
+				return output, err
+			time.sleep(0.1)
+		return None, None
+	#end define
 #end class
@@ -0,0 +1,207 @@
+import time
+from decimal import Decimal
+
+from nacl.signing import SigningKey
+
+from mytoncore.boc import Builder, build_hashmap, deserialize_boc, serialize_boc
+
+
+WALLET_VERSIONS = ("v1", "v2", "v3", "v4")
+HIGHLOAD_VERSIONS = ("hv1", "hv2")
+DEFAULT_TIMEOUT = 60 # the same as -t of wallet scripts
+
+
+def load_signing_key(pk_path):
+	# <filename-base>.pk holds the 32 byte ed25519 private key, as `load-keypair` reads it
+	with open(pk_path, "rb") as file:
+		data = file.read()
+	if len(data) != 32:
+		raise Exception(f"load_signing_key error: wrong private key file {pk_path}")
+	return SigningKey(data)
+#end define
+
+def to_nanotons(coins):
+	return int(Decimal(str(coins)) * 10**9)
+#end define
+
+def get_wallet_family(version):
+	if version is None:
+		return None
+	for family in HIGHLOAD_VERSIONS + WALLET_VERSIONS:
+		if version.startswith(family):
+			return family
+	return None
+#end define
+
+def load_boc_file(path):
+	with open(path, "rb") as file:
+		return deserialize_boc(file.read())[0]
+#end define
+
+def build_comment_body(comment):
+	# simple-transfer-body of TonUtil.fif
+	builder = Builder()
+	if comment:
+		builder.store_uint(0, 32)
+		builder.store_bytes(comment.encode("utf-8"))
+	return builder.end_cell()
+#end define
+
+def store_cell_or_ref(builder, cell):
+	# Either:X, inline if it fits together with the flag bit
+	if builder.bits + 1 + cell.bits <= 1023 and len(builder.refs) + len(cell.refs) <= 4:
+		builder.store_bit(0)
+		store_slice(builder, cell)
+	else:
+		builder.store_bit(1)
+		builder.store_ref(cell)
+	return builder
+#end define
+
+def store_slice(builder, cell):
+	if cell.bits > 0:
+		value = int.from_bytes(cell.data, "big") >> (len(cell.data) * 8 - cell.bits)
+		builder.store_uint(value, cell.bits)
+	for ref in cell.refs:
+		builder.store_ref(ref)
+	return builder
+#end define
+
+def build_internal_message(workchain, addr, amount, bounce, body=None, state_init=None):
+	builder = Builder()
+	builder.store_uint(0b01, 2) # int_msg_info$0 ihr_disabled:Bool
+	builder.store_bit(bounce)
+	builder.store_uint(0b000, 3) # bounced:Bool src:addr_none
+	builder.store_address(workchain, addr)
+	builder.store_grams(amount)
+	builder.store_bit(0) # extra currencies
+	builder.store_uint(0, 4 + 4 + 64 + 32) # ihr_fee fwd_fee created_lt created_at
+	if state_init is None:
+		builder.store_bit(0)
+	else:
+		builder.store_uint(0b11, 2)
+		builder.store_ref(state_init)
+	if body is None:
+		body = Builder().end_cell()
+	store_cell_or_ref(builder, body)
+	return builder.end_cell()
+#end define
+
+def build_signing_message(family, seqno, messages, subwallet=None, valid_until=None):
+	"""
+	Wallet request without signature. messages: list of (mode, message cell)
+	"""
+	builder = Builder()
+	if family == "v1":
+		builder.store_uint(seqno, 32)
+	elif family == "v2":
+		builder.store_uint(seqno, 32)
+		builder.store_uint(valid_until, 32)
+	elif family in ("v3", "v4"):
+		builder.store_uint(subwallet, 32)
+		builder.store_uint(valid_until, 32)
+		builder.store_uint(seqno, 32)
+		if family == "v4":
+			builder.store_uint(0, 8) # simple send
+	else:
+		raise Exception(f"build_signing_message error: wallet version '{family}' is not supported")
+	for mode, message in messages:
+		builder.store_uint(mode, 8)
+		builder.store_ref(message)
+	return builder.end_cell()
+#end define
+
+def build_highload_signing_message(family, subwallet, orders, seqno=None, valid_until=None, query_id=None):
+	"""
+	Highload wallet request without signature. orders: list of (mode, message cell)
+	"""
+	items = dict()
+	for i, (mode, message) in enumerate(orders):
+		items[i] = lambda builder, mode=mode, message=message: builder.store_uint(mode, 8).store_ref(message)
+	messages = build_hashmap(items, 16)
+	builder = Builder()
+	builder.store_int(subwallet, 32)
+	if family == "hv1":
+		builder.store_uint(valid_until, 32)
+		builder.store_uint(seqno, 32)
+	elif family == "hv2":
+		if query_id is None:
+			query_id = (valid_until << 32) - 1
+		builder.store_uint(query_id, 64)
+	else:
+		raise Exception(f"build_highload_signing_message error: wallet version '{family}' is not supported")
+	builder.store_maybe_ref(messages)
+	return builder.end_cell()
+#end define
+
+def sign_message(signing_key, message):
+	signature = signing_key.sign(message.get_hash()).signature
+	builder = Builder()
+	builder.store_bytes(signature)
+	store_slice(builder, message)
+	return builder.end_cell()
+#end define
+
+def build_external_message(workchain, addr, body):
+	builder = Builder()
+	builder.store_uint(0b10, 2) # ext_in_msg_info$10
+	builder.store_uint(0b00, 2) # src:addr_none
+	builder.store_address(workchain, addr)
+	builder.store_grams(0) # import_fee
+	builder.store_bit(0) # no state init
+	store_cell_or_ref(builder, body)
+	return builder.end_cell()
+#end define
+
+def get_valid_until(valid_until=None, timeout=DEFAULT_TIMEOUT):
+	if valid_until is not None:
+		return valid_until
+	return int(time.time()) + timeout
+#end define
+
+def build_wallet_transfer(wallet, signing_key, dest, amount, seqno, mode=3, body=None, state_init=None, subwallet=None, valid_until=None):
+	"""
+	Signed external message of wallet v1-v4, the same BoC as wallet*.fif saves.
+	dest: (workchain, addr hex, bounce), amount in nanotons.
+	"""
+	family = get_wallet_family(wallet.version)
+	workchain, addr, bounce = dest
+	message = build_internal_message(workchain, addr, amount, bounce, body=body, state_init=state_init)
+	if subwallet is None:
+		subwallet = 698983191 + wallet.workchain # 0x29A9A317 + workchain
+	valid_until = get_valid_until(valid_until)
+	request = build_signing_message(family, seqno, [(mode, message)], subwallet=subwallet, valid_until=valid_until)
+	external = build_external_message(wallet.workchain, wallet.addr, sign_message(signing_key, request))
+	return serialize_boc(external, crc=True)
+#end define
+
+def build_highload_transfer(wallet, signing_key, orders, seqno=None, mode=3, valid_until=None, query_id=None):
+	"""
+	Signed external message of highload wallet v1/v2.
+	orders: list of (workchain, addr hex, bounce, amount in nanotons)
+	"""
+	family = get_wallet_family(wallet.version)
+	messages = list()
+	for workchain, addr, bounce, amount in orders:
+		messages.append((mode, build_internal_message(workchain, addr, amount, bounce)))
+	valid_until = get_valid_until(valid_until)
+	request = build_highload_signing_message(family, wallet.subwallet, messages, seqno=seqno, valid_until=valid_until, query_id=query_id)
+	external = build_external_message(wallet.workchain, wallet.addr, sign_message(signing_key, request))
+	return serialize_boc(external, crc=True)
+#end define
+
+def build_recover_stake_body(query_id=None):
+	# recover-stake.fif
+	if query_id is None:
+		query_id = int(time.time())
+	builder = Builder()
+	builder.store_uint(0x47657424, 32)
+	builder.store_uint(query_id, 64)
+	return builder.end_cell()
+#end define
+
+def save_boc(boc, path):
+	with open(path, "wb") as file:
+		file.write(boc)
+	return path
+#end define
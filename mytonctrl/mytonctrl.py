@@ -79,6 +79,8 @@ def Init(local, ton, console, argv):
 	console.AddItem("status", inject_globals(PrintStatus), local.translate("status_cmd"))
 	console.AddItem("status_modes", inject_globals(mode_status), local.translate("status_modes_cmd"))
 	console.AddItem("status_settings", inject_globals(settings_status), local.translate("settings_status_cmd"))
+	console.AddItem("status_liteservers", inject_globals(liteservers_status), local.translate("status_liteservers_cmd"))
+	console.AddItem("perf", inject_globals(print_perf), local.translate("perf_cmd"))
 	console.AddItem("enable_mode", inject_globals(enable_mode), local.translate("enable_mode_cmd"))
 	console.AddItem("disable_mode", inject_globals(disable_mode), local.translate("disable_mode_cmd"))
 	console.AddItem("about", inject_globals(about), local.translate("about_cmd"))
@@ -535,6 +537,74 @@ def settings_status(ton, args):
 #end define
 
 
+def liteservers_status(ton, args):
+	stats = ton.GetLiteClientStats()
+	data = stats["router"]
+	if not data:
+		color_print("{red}No liteserver statistics yet. Is mytoncore service running?{endc}")
+		return
+	max_seqno = max([item["last_seqno"] for item in data if item["last_seqno"] is not None], default=None)
+	table = [["Index", "Latency, ms", "Error rate", "Requests", "Errors", "Lag", "Breaker", "Last seen"]]
+	for item in data:
+		latency = round(item["latency"] * 1000, 1) if item["latency"] is not None else None
+		lag = max_seqno - item["last_seqno"] if item["last_seqno"] is not None else None
+		last_seen = timestamp2datetime(int(item["last_seen"]), "%d.%m.%Y %H:%M:%S") if item["last_seen"] else None
+		table.append([item["index"], latency, round(item["error_rate"], 2), item["requests"], item["errors"], lag, item["breaker"], last_seen])
+	print_table(table)
+	hedge = stats["hedge"]
+	if hedge["requests"]:
+		print(f"Hedged requests: {hedge['requests']}, hedges fired: {hedge['fired']}, hedges won: {hedge['won']}")
+	singleflight = stats["singleflight"]
+	if singleflight["calls"]:
+		print(f"Read-only calls: {singleflight['calls']}, deduplicated: {singleflight['shared']}")
+#end define
+
+
+def print_perf(ton, args):
+	# Usage: perf [local] [<rows>]
+	if "local" in args:
+		stats = MyTonCore.GetPerfStats(ton) # not the daemon's
+	else:
+		stats = ton.GetPerfStats()
+	data = stats["callStats"]
+	cache = stats["functionCache"]
+	block_cache = stats["blockCache"]
+	local_store = stats["localStore"]
+	if not data:
+		color_print("{red}No call statistics yet. Is mytoncore service running?{endc}")
+		return
+	rows = int(args[-1]) if args and args[-1].isdigit() else 15
+	started = timestamp2datetime(data["started"], "%d.%m.%Y %H:%M:%S")
+	color_print(f"{{cyan}}Subprocess calls since {started}{{endc}}")
+	print_perf_table(data["verbs"], "verb", rows)
+	print()
+	color_print("{cyan}Callers{endc}")
+	print_perf_table(data["callers"], "caller", rows)
+	if cache:
+		print()
+		color_print("{cyan}Function cache{endc}")
+		table = [["Namespace", "Size", "Max size", "TTL, s", "Hits", "Misses", "Evictions", "Expirations"]]
+		for name, item in cache.items():
+			table.append([name, item["size"], item["max_size"], item["ttl"], item["hits"], item["misses"], item["evictions"], item["expirations"]])
+		print_table(table)
+	if block_cache:
+		size = round(block_cache["size"] / 2**20, 1)
+		max_size = round(block_cache["max_size"] / 2**20, 1)
+		print(f"Block cache: {block_cache['hits']} hits, {block_cache['misses']} misses, {block_cache['evictions']} evictions, {block_cache['errors']} errors, {size} of {max_size} MB")
+	if local_store:
+		print(f"Local store: {local_store['saves']} saves, {local_store['writes']} keys written, {local_store['merges']} merged, {local_store['imports']} json imports, {local_store['errors']} errors")
+#end define
+
+def print_perf_table(items, name, rows):
+	to_ms = lambda value: round(value * 1000, 1) if value is not None else None
+	table = [["Tool", name.capitalize(), "Calls", "Errors", "Timeouts", "Total, s", "Avg, ms", "p50, ms", "p95, ms", "Max, ms", "Output, KB"]]
+	for item in items[:rows]:
+		avg = item["total"] / item["count"] if item["count"] else None
+		table.append([item["tool"], item[name], item["count"], item["errors"], item["timeouts"], item["total"], to_ms(avg), to_ms(item["p50"]), to_ms(item["p95"]), to_ms(item["max"]), round(item["bytes"] / 1024, 1)])
+	print_table(table)
+#end define
+
+
 def PrintStatus(local, ton, args):
 	opt = None
 	if len(args) == 1:
@@ -979,6 +1049,7 @@ def mytonctrl():
 	local = MyPyClass('mytonctrl.py')
 	mytoncore_local = MyPyClass('mytoncore.py')
 	ton = MyTonCore(mytoncore_local)
+	ton.UseCacheServer()
 	console = MyPyConsole()
 
 	# migrations
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# parse_account against the previous GetAccount parsing on the getaccount corpus, plus timings.
+# Run: python3 -m tests.account_parser
+
+import hashlib
+import os
+import time
+
+from mytoncore.parsers import parse_account
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "getaccount")
+CODE_HASHES = {
+	"wallet_v3r2.txt": "8a6d73bdd8704894f17d8c76ce6139034b8a51b1802907ca36283417798a219b",
+	"single_nominator.txt": "42bea8fea43bf803c652411976eb2981b9bdb10da84eb788a63ea7a01f2a044d",
+}
+
+
+def parse(text, search, search2=None):
+	# mypylib.parse
+	if search is None or text is None:
+		return None
+	if search not in text:
+		return None
+	text = text[text.find(search) + len(search):]
+	if search2 is not None and search2 in text:
+		text = text[:text.find(search2)]
+	return text
+#end define
+
+def get_var(text, search):
+	# MyTonCore.GetVar
+	if search is None or text is None:
+		return
+	if search not in text:
+		return
+	text = text[text.find(search) + len(search):]
+	if text[0] in [':', '=', ' ']:
+		text = text[1:]
+	if ')' in text:
+		text = text[:text.find(')')]
+	if ' ' in text:
+		text = text[:text.find(' ')]
+	return text
+#end define
+
+def get_var_from_worker_output(text, search):
+	# MyTonCore.GetVarFromWorkerOutput
+	if ':' not in search:
+		search += ':'
+	if search is None or text is None:
+		return None
+	if search not in text:
+		return None
+	start = text.find(search) + len(search)
+	count = 0
+	bcount = 0
+	textLen = len(text)
+	end = textLen
+	for i in range(start, textLen):
+		letter = text[i]
+		if letter == '(':
+			count += 1
+			bcount += 1
+		elif letter == ')':
+			count -= 1
+		if letter == ')' and count < 1:
+			end = i + 1
+			break
+		elif letter == '\n' and count < 1:
+			end = i
+			break
+	result = text[start:end]
+	if count != 0 and bcount == 0:
+		result = result.replace(')', '')
+	return result
+#end define
+
+def get_body(buff):
+	# MyTonCore.GetBody
+	if buff is None:
+		return
+	body = ""
+	for item in buff.split('\n'):
+		if "x{" not in item:
+			continue
+		buff = parse(item, '{', '}')
+		buff = buff.replace('_', '')
+		if len(buff)%2 == 1:
+			buff = "0" + buff
+		body += buff
+	if body == "":
+		body = None
+	return body
+#end define
+
+def legacy_get_account(result):
+	# MyTonCore.GetAccount before parse_account, as a dict of parse_account
+	storage = get_var_from_worker_output(result, "storage")
+	if storage is None:
+		return None
+	addr = get_var_from_worker_output(result, "addr")
+	balance = get_var_from_worker_output(storage, "balance")
+	grams = get_var_from_worker_output(balance, "grams")
+	value = get_var_from_worker_output(grams, "value")
+	state = get_var_from_worker_output(storage, "state")
+	code = get_body(get_var_from_worker_output(get_var_from_worker_output(state, "code"), "value"))
+	data = get_body(get_var_from_worker_output(get_var_from_worker_output(state, "data"), "value"))
+	return {
+		"workchain": int(get_var(addr, "workchain_id")),
+		"address": get_var(addr, "address")[1:].lower(),
+		"balance": int(value),
+		"status": parse(state, "account_", '\n'),
+		"code": code,
+		"data": data,
+		"code_hash": hashlib.sha256(bytes.fromhex(code)).hexdigest() if code else None,
+		"lt": parse(result, "lt = ", ' '),
+		"hash": parse(result, "hash = ", '\n'),
+	}
+#end define
+
+def load_corpus():
+	corpus = dict()
+	for name in sorted(os.listdir(FIXTURES_DIR)):
+		with open(os.path.join(FIXTURES_DIR, name)) as file:
+			corpus[name] = file.read()
+	return corpus
+#end define
+
+def measure(func, text, repeat):
+	start = time.time()
+	for i in range(repeat):
+		func(text)
+	return (time.time() - start) / repeat * 1000
+#end define
+
+def Test():
+	corpus = load_corpus()
+	for name, text in corpus.items():
+		account = parse_account(text)
+		legacy = legacy_get_account(text)
+		if legacy is None:
+			assert account is None, name
+			continue
+		if account["status"] == "frozen":
+			# the previous parser kept the rest of the line: "frozen state_hash:x...)"
+			assert legacy["status"].startswith("frozen "), name
+			legacy["status"] = "frozen"
+		assert account == legacy, name
+		if name in CODE_HASHES:
+			assert account["code_hash"] == CODE_HASHES[name], name
+	#end for
+	assert parse_account(corpus["uninit.txt"])["status"] == "uninit"
+
+	print(f"{'fixture':<24}{'legacy, ms':>12}{'parse_account, ms':>19}{'speedup':>10}")
+	for name, text in corpus.items():
+		legacy = measure(legacy_get_account, text, 200)
+		new = measure(parse_account, text, 200)
+		print(f"{name:<24}{legacy:>12.3f}{new:>19.3f}{legacy / new:>9.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# AddressCodec against the previous AddrFull2AddrB64 and ParseAddrB64, LRU bound, timings.
+# Run: python3 -m tests.address_codec
+
+import base64
+import hashlib
+import time
+
+from fastcrc import crc16
+
+from mytoncore.address_codec import AddressCodec
+
+
+def legacy_full_to_b64(addrFull, testnet, bounceable=True):
+	# MyTonCore.AddrFull2AddrB64 before the codec
+	if addrFull is None or "None" in addrFull:
+		return
+	buff = addrFull.split(':')
+	workchain = int(buff[0])
+	addr = buff[1]
+	if len(addr) != 64:
+		raise Exception("AddrFull2AddrB64 error: Invalid length of hexadecimal address")
+	b = bytearray(36)
+	b[0] = 0x51 - bounceable * 0x40 + testnet * 0x80
+	b[1] = workchain % 256
+	b[2:34] = bytearray.fromhex(addr)
+	crc = crc16.xmodem(bytes(b[:34]))
+	b[34] = crc >> 8
+	b[35] = crc & 0xff
+	result = base64.b64encode(b).decode()
+	return result.replace('+', '-').replace('/', '_')
+#end define
+
+def legacy_parse_b64(addrB64):
+	# MyTonCore.ParseAddrB64 before the codec, without the buffer and the network check
+	buff = addrB64.replace('-', '+').replace('_', '/').encode()
+	b = base64.b64decode(buff)
+	bounceable = (b[0] & 0x40) == 0
+	crc = int.from_bytes(b[34:36], "big")
+	if crc != crc16.xmodem(bytes(b[:34])):
+		raise Exception("ParseAddrB64 error: crc do not match")
+	workchain = int.from_bytes(b[1:2], "big", signed=True)
+	return workchain, b[2:34].hex(), bounceable
+#end define
+
+def make_addrs(count):
+	result = list()
+	for i in range(count):
+		workchain = -1 if i % 4 == 0 else 0
+		result.append(f"{workchain}:" + hashlib.sha256(str(i).encode()).hexdigest())
+	return result
+#end define
+
+def Test():
+	addrs = make_addrs(500)
+	for testnet in (False, True):
+		warnings = list()
+		codec = AddressCodec(testnet, warn=warnings.append)
+		for addrFull in addrs:
+			for bounceable in (True, False):
+				addrB64 = codec.full_to_b64(addrFull, bounceable)
+				assert addrB64 == legacy_full_to_b64(addrFull, testnet, bounceable), addrFull
+				assert codec.parse_b64(addrB64)[:3] == legacy_parse_b64(addrB64)
+				assert codec.parse_b64(addrB64) == (int(addrFull.split(':')[0]), addrFull.split(':')[1], bounceable, testnet)
+				# the standard base64 alphabet is accepted too
+				std = addrB64.replace('-', '+').replace('_', '/')
+				assert codec.parse_b64(std)[:3] == legacy_parse_b64(std)
+		assert warnings == list()
+		assert codec.full_to_b64(None) is None and codec.full_to_b64("None:None") is None
+	try:
+		codec.full_to_b64("0:abcd")
+		raise AssertionError("no error")
+	except Exception as ex:
+		assert "Invalid length" in str(ex)
+	bad = legacy_full_to_b64(addrs[0], False)
+	bad = bad[:-2] + ("AA" if bad[-2:] != "AA" else "AB")
+	try:
+		codec.parse_b64(bad)
+		raise AssertionError("no error")
+	except Exception as ex:
+		assert "crc do not match" in str(ex)
+
+	# mainnet address on a testnet node: one warning per address
+	warnings = list()
+	codec = AddressCodec(True, warn=warnings.append)
+	mainnet_addr = legacy_full_to_b64(addrs[1], False)
+	codec.parse_b64(mainnet_addr)
+	codec.parse_b64(mainnet_addr)
+	assert len(warnings) == 1 and "testnet flag do not match" in warnings[0]
+
+	codec = AddressCodec(False, max_size=100)
+	result = codec.full_list_to_b64(addrs)
+	assert result == [legacy_full_to_b64(item, False) for item in addrs]
+	assert [codec.parse_b64(item) for item in result[:3]] == [legacy_parse_b64(item) + (False,) for item in result[:3]]
+	stats = codec.get_stats()
+	assert stats["encoded"] == 100 and stats["decoded"] == 3, stats
+	assert codec.full_to_b64(addrs[-1]) == result[-1]
+	assert codec.get_stats()["hits"] == 1
+
+	# election entries and account history convert the same addresses again and again
+	addrs = make_addrs(400) * 10
+	start = time.time()
+	legacy = [legacy_full_to_b64(item, False) for item in addrs]
+	legacy_time = (time.time() - start) * 1000
+	codec = AddressCodec(False)
+	start = time.time()
+	result = codec.full_list_to_b64(addrs)
+	new_time = (time.time() - start) * 1000
+	assert result == legacy
+	start = time.time()
+	legacy_parsed = [legacy_parse_b64(item) for item in legacy]
+	legacy_parse_time = (time.time() - start) * 1000
+	start = time.time()
+	parsed = [codec.parse_b64(item) for item in legacy]
+	parse_time = (time.time() - start) * 1000
+	assert [item[:3] for item in parsed] == legacy_parsed
+	print(f"4000 conversions: legacy {legacy_time:.3f} ms, codec {new_time:.3f} ms, {legacy_time / new_time:.1f}x")
+	print(f"4000 parses: legacy {legacy_parse_time:.3f} ms, codec {parse_time:.3f} ms, {legacy_parse_time / parse_time:.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
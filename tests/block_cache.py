@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# BlockCache: persistence across instances, size-bounded eviction, chain data and timings of listblocktrans.
+# Run: python3 -m tests.block_cache
+
+import os
+import tempfile
+import time
+
+from mytoncore.block_cache import BlockCache
+from mytoncore.parsers import parse_block_transactions
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "listblocktrans", "shardchain.txt")
+
+
+def Test():
+	with open(FIXTURE) as file:
+		text = file.read()
+	items = parse_block_transactions(text)
+
+	with tempfile.TemporaryDirectory() as dir_name:
+		path = os.path.join(dir_name, "cache", "block_cache.db")
+		cache = BlockCache(path)
+		assert cache.get("listblocktrans", "AB" * 32) is None
+		cache.set("listblocktrans", "AB" * 32, items)
+		cache.set("byseqno", "-1:8000000000000000:40000000", "(-1,8000000000000000,40000000):AB:CD")
+		size = cache.get_stats()["size"]
+		assert 0 < size < len(text) / 3, size
+		cache.close()
+
+		# Another process after a restart
+		cache = BlockCache(path)
+		assert [tuple(item) for item in cache.get("listblocktrans", "AB" * 32)] == items
+		assert cache.get("byseqno", "-1:8000000000000000:40000000") == "(-1,8000000000000000,40000000):AB:CD"
+		assert cache.get_stats()["size"] == size
+
+		start = time.time()
+		for i in range(200):
+			cache.get("listblocktrans", "AB" * 32)
+		hit = (time.time() - start) / 200 * 1000
+		print(f"listblocktrans of 300 transactions: {len(text)} bytes of output, {size} bytes stored, {hit:.3f} ms per hit")
+
+		# Size limit, least recently used first
+		cache = BlockCache(os.path.join(dir_name, "small.db"), max_size=20000, touch_interval=0)
+		for i in range(50):
+			cache.set("dumptrans", f"{i}", os.urandom(500).hex())
+			if i >= 2:
+				assert cache.get("dumptrans", "0") is not None # keep the first one in use
+			time.sleep(0.001)
+		stats = cache.get_stats()
+		assert stats["size"] <= 20000 and stats["evictions"] > 0, stats
+		assert cache.get("dumptrans", "0") is not None
+		assert cache.get("dumptrans", "1") is None
+		assert cache.get("dumptrans", "49") is not None
+
+		# Chain data valid from a key block, read back with the caller's dict type
+		class Dict(dict):
+			__getattr__ = dict.get
+		cache = BlockCache(os.path.join(dir_name, "chain_cache.db"), object_hook=Dict)
+		cache.set("keyBlock", "config34", {"seqno": 40001234, "data": {"startWorkTime": 1729500000, "validators": [{"adnlAddr": "AB"}]}})
+		item = BlockCache(os.path.join(dir_name, "chain_cache.db"), object_hook=Dict).get("keyBlock", "config34")
+		assert item.seqno == 40001234 and item.data.validators[0].adnlAddr == "AB"
+
+		# A broken file is a miss, not an error of the query
+		broken = os.path.join(dir_name, "broken.db")
+		with open(broken, 'w') as file:
+			file.write("not a database" * 100)
+		cache = BlockCache(broken)
+		assert cache.get("byseqno", "x") is None
+		cache.set("byseqno", "x", "y")
+		assert cache.get_stats()["errors"] == 2
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# CacheServer and CacheClient over a Unix socket: served methods, fallback when the daemon is down, timings.
+# Run: python3 -m tests.cache_server
+
+import os
+import tempfile
+import time
+
+from mytoncore.cache_server import CacheServer, CacheClient, CacheServerError
+from tests.tlb2json import make_validator_set
+from mytoncore.parsers import parse_validator_set
+
+
+class FakeTon:
+	def __init__(self):
+		self.calls = 0
+		self.config34 = parse_validator_set(make_validator_set(400))
+	#end define
+
+	def GetConfig34(self):
+		self.calls += 1
+		return self.config34
+	#end define
+
+	def GetComplaints(self, past=False):
+		self.calls += 1
+		return {"past": past}
+	#end define
+
+	def GetOffers(self):
+		raise Exception("lite-client error")
+	#end define
+
+	def SendFile(self, path):
+		raise AssertionError("not served")
+	#end define
+#end class
+
+
+def Test():
+	daemon = FakeTon()
+	console = FakeTon()
+	with tempfile.TemporaryDirectory() as dir_name:
+		path = os.path.join(dir_name, "mytoncore.sock")
+		server = CacheServer(daemon, path)
+		server.start()
+		assert os.stat(path).st_mode & 0o777 == 0o600
+		client = CacheClient(path)
+
+		config34 = client.wrap("GetConfig34", console.GetConfig34)
+		assert config34() == daemon.config34
+		assert daemon.calls == 1 and console.calls == 0
+		assert client.wrap("GetComplaints", console.GetComplaints)(past=True) == {"past": True}
+
+		# Errors of the daemon and methods it does not serve fall back to a local call
+		try:
+			client.call("GetOffers")
+			raise AssertionError("no error")
+		except CacheServerError as ex:
+			assert "lite-client error" in str(ex)
+		try:
+			client.call("SendFile", ["/etc/passwd"])
+			raise AssertionError("no error")
+		except CacheServerError as ex:
+			assert "not served" in str(ex)
+		assert client.wrap("GetOffers", lambda: "local")() == "local"
+		assert client.down_since is None
+
+		repeat = 200
+		start = time.time()
+		for i in range(repeat):
+			config34()
+		print(f"config34 of 400 validators from the daemon: {(time.time() - start) / repeat * 1000:.3f} ms per call")
+
+		# Daemon is down
+		server.stop()
+		assert not os.path.exists(path)
+		calls = console.calls
+		assert config34() == console.config34 and console.calls == calls + 1
+		assert client.down_since is not None
+		start = time.time()
+		config34()
+		assert time.time() - start < 0.01 # not retried for retry_after seconds
+
+		# Restarted daemon, a stale socket file is replaced
+		open(path, 'w').close()
+		server = CacheServer(daemon, path)
+		server.start()
+		client.down_since = time.time() - client.retry_after
+		calls = console.calls
+		config34()
+		assert console.calls == calls
+		server.stop()
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
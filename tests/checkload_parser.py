@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# parse_checkloadall against the previous GetValidatorsLoad parsing, plus timings.
+# Run: python3 -m tests.checkload_parser
+
+import time
+
+from mytoncore.parsers import parse_checkloadall
+
+
+def legacy_get_validators_load(result):
+	# MyTonCore.GetValidatorsLoad before parse_checkloadall, without the lite-client call
+	lines = result.split('\n')
+	data = dict()
+	for line in lines:
+		if "val" in line and "pubkey" in line:
+			buff = line.split(' ')
+			vid = int(buff[1].replace('#', '').replace(':', ''))
+			pubkey = buff[3].replace(',', '')
+			blocksCreated_buff = buff[6].replace('(', '').replace(')', '').split(',')
+			masterBlocksCreated = float(blocksCreated_buff[0])
+			workBlocksCreated = float(blocksCreated_buff[1])
+			blocksExpected_buff = buff[8].replace('(', '').replace(')', '').split(',')
+			masterBlocksExpected = float(blocksExpected_buff[0])
+			workBlocksExpected = float(blocksExpected_buff[1])
+			mr = 0 if masterBlocksExpected == 0 else masterBlocksCreated / masterBlocksExpected
+			wr = 0 if workBlocksExpected == 0 else workBlocksCreated / workBlocksExpected
+			r = mr if masterBlocksExpected > 0 else (mr + wr) / 2
+			efficiency = round(r * 100, 2)
+			item = dict()
+			item["id"] = vid
+			item["pubkey"] = pubkey
+			item["masterBlocksCreated"] = masterBlocksCreated
+			item["workBlocksCreated"] = workBlocksCreated
+			item["masterBlocksExpected"] = masterBlocksExpected
+			item["workBlocksExpected"] = workBlocksExpected
+			item["mr"] = mr
+			item["wr"] = wr
+			item["efficiency"] = efficiency
+			item["online"] = efficiency > 10
+			index = lines.index(line)
+			nextIndex = index + 2
+			if nextIndex < len(lines):
+				nextLine = lines[nextIndex]
+				if "COMPLAINT_SAVED" in nextLine:
+					buff = nextLine.split('\t')
+					item["var1"] = buff[1]
+					item["var2"] = buff[2]
+					item["fileName"] = buff[3]
+			data[vid] = item
+	#end for
+	return data
+#end define
+
+def make_checkloadall(count):
+	# lite-client checkloadall output, every tenth validator is below the threshold
+	lines = [
+		"latest masterchain block known to server is (-1,8000000000000000,40000000):AB:CD",
+		"total: 40000 masterchain blocks, 3800000 shardchain blocks",
+	]
+	for i in range(count):
+		master = i < 100
+		expected = (52.1, 0.0) if master else (0.0, 2101.7)
+		created = (51 if i % 10 else 2, 0) if master else (0, 2100 if i % 10 else 31)
+		pubkey = format(10**70 + i * 7919, "064X")
+		lines.append(f"val #{i}: pubkey {pubkey}, blocks created ({created[0]},{created[1]}) expected ({expected[0]},{expected[1]})")
+		if i % 10 == 0:
+			lines.append(f"low blocks production by validator #{i}")
+			lines.append(f"COMPLAINT_SAVED\t{i * 3}\t{i * 5}\t/tmp/mytoncore/checkload_1_2_{i}.boc")
+		else:
+			lines.append(f"proof of validator #{i} load is ok")
+	return "\n".join(lines) + "\n"
+#end define
+
+def Test():
+	text = make_checkloadall(50)
+	data = parse_checkloadall(text.split('\n'))
+	assert data == legacy_get_validators_load(text)
+	assert data[10]["fileName"] == "/tmp/mytoncore/checkload_1_2_10.boc" and data[10]["online"] is False
+	assert "fileName" not in data[11] and data[11]["online"] is True
+
+	print(f"{'validators':<12}{'legacy, ms':>12}{'streaming, ms':>15}{'speedup':>10}")
+	for count in (100, 400, 1000):
+		text = make_checkloadall(count)
+		repeat = 5
+		start = time.time()
+		for i in range(repeat):
+			legacy_get_validators_load(text)
+		legacy = (time.time() - start) / repeat * 1000
+		start = time.time()
+		for i in range(repeat):
+			parse_checkloadall(text.split('\n'))
+		new = (time.time() - start) / repeat * 1000
+		print(f"{count:<12}{legacy:>12.3f}{new:>15.3f}{legacy / new:>9.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# CodeHashRegistry against the previous GetVersionFromCodeHash, registration from a file, timings.
+# Run: python3 -m tests.code_hashes
+
+import json
+import os
+import tempfile
+import time
+
+from mytoncore.code_hashes import CODE_HASHES, CodeHashRegistry
+
+
+def legacy_get_version(inputHash):
+	# MyTonCore.GetVersionFromCodeHash before the registry, without the log line
+	arr = dict(CODE_HASHES)
+	for version, hash in arr.items():
+		if hash == inputHash:
+			return version
+#end define
+
+def Test():
+	registry = CodeHashRegistry(CODE_HASHES)
+	unknown = "00" * 32
+	for code_hash in list(CODE_HASHES.values()) + [unknown, None]:
+		assert registry.get_version(code_hash) == legacy_get_version(code_hash), code_hash
+	assert registry.get_version(CODE_HASHES["v4"].upper()) == "v4"
+	assert registry.get_versions([CODE_HASHES["spool_r2"], unknown, None]) == ["spool_r2", None, None]
+
+	with tempfile.TemporaryDirectory() as dir_name:
+		path = os.path.join(dir_name, "code_hashes.json")
+		with open(path, 'w') as file:
+			json.dump({"custom_r1": "11" * 32}, file)
+		registry.register_file(path)
+		registry.register_file(path) # again at the next start
+	assert registry.get_version("11" * 32) == "custom_r1"
+	try:
+		registry.register({"v4r2": CODE_HASHES["v4"]})
+		raise AssertionError("no error")
+	except ValueError:
+		pass
+	assert registry.get_version(CODE_HASHES["v4"]) == "v4"
+	try:
+		registry.versions[unknown] = "x"
+		raise AssertionError("no error")
+	except TypeError:
+		pass
+
+	hashes = [list(CODE_HASHES.values())[i % len(CODE_HASHES)] if i % 3 else unknown for i in range(1000)]
+	start = time.time()
+	legacy = [legacy_get_version(item) for item in hashes]
+	legacy_time = (time.time() - start) * 1000
+	start = time.time()
+	versions = registry.get_versions(hashes)
+	new_time = (time.time() - start) * 1000
+	assert versions == legacy
+	print(f"1000 accounts: legacy {legacy_time:.3f} ms, registry {new_time:.3f} ms, {legacy_time / new_time:.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# FunctionCache: TTL, LRU limit, tags, invalidation and counters, plus a threaded smoke run.
+# Run: python3 -m tests.function_cache
+
+import threading
+
+from mytoncore.cache import FunctionCache
+
+
+class Clock:
+	def __init__(self):
+		self.now = 1000.0
+	#end define
+
+	def __call__(self):
+		return self.now
+	#end define
+#end class
+
+
+def Test():
+	clock = Clock()
+	cache = FunctionCache(ttl=60, max_size=3, clock=clock)
+	cache.set("config34", {"total": 4})
+	assert cache.get("config34") == {"total": 4}
+	clock.now += 20
+	assert cache.get("config34", timeout=10) is None # older than the caller allows
+	assert cache.get("config34", timeout=30) == {"total": 4}
+	clock.now += 50
+	assert cache.get("config34") is None # older than the namespace ttl
+	assert cache.get_stats()["default"]["expirations"] == 1
+
+	# LRU: a read refreshes the entry
+	for key in ("a", "b", "c"):
+		cache.set(key, key)
+	cache.get("a")
+	cache.set("d", "d")
+	assert cache.get("b") is None and cache.get("a") == "a"
+	assert cache.get_stats()["default"]["evictions"] == 1
+
+	# Namespaces are limited separately
+	cache.add_namespace("addrB64", ttl=3600, max_size=1000)
+	for i in range(5000):
+		cache.set(f"EQ{i}", i, namespace="addrB64")
+	stats = cache.get_stats()
+	assert stats["addrB64"]["size"] == 1000 and stats["addrB64"]["evictions"] == 4000
+	assert stats["default"]["size"] == 3
+	clock.now += 120
+	cache.purge()
+	assert cache.get_stats()["default"]["size"] == 0 and cache.get_stats()["addrB64"]["size"] == 1000
+
+	cache.invalidate("EQ4999", namespace="addrB64")
+	assert cache.get("EQ4999", namespace="addrB64") is None
+	assert cache.get("EQ4998", namespace="addrB64") == 4998
+	cache.invalidate(namespace="addrB64")
+	assert cache.get_stats()["addrB64"]["size"] == 0
+
+	# Tagged entries live until the tag changes, untagged reads fall back to the timeout
+	cache.add_namespace("keyBlock", ttl=3600, max_size=64)
+	cache.set("config34", "round 1", namespace="keyBlock", tag=40000000)
+	clock.now += 600
+	assert cache.get("config34", timeout=60, namespace="keyBlock", tag=40000000) == "round 1"
+	assert cache.get("config34", timeout=60, namespace="keyBlock") is None
+	assert cache.get("config34", timeout=60, namespace="keyBlock", tag=40001234) is None
+	assert cache.get("config34", timeout=3600, namespace="keyBlock", tag=40000000) is None # dropped on the new tag
+	clock.now += 3600
+	cache.set("config34", "round 2", namespace="keyBlock", tag=40001234)
+	clock.now += 3601
+	assert cache.get("config34", namespace="keyBlock", tag=40001234) is None # the namespace ttl still applies
+
+	# An answer that could predate the key block is stored untagged and kept for the timeout only
+	cache.set("config32", "unverified", namespace="keyBlock")
+	clock.now += 30
+	assert cache.get("config32", timeout=60, namespace="keyBlock", tag=40001234) == "unverified"
+	clock.now += 31
+	assert cache.get("config32", timeout=60, namespace="keyBlock", tag=40001234) is None
+
+	# Threads
+	cache = FunctionCache(ttl=60, max_size=100)
+	def worker(n):
+		for i in range(20000):
+			key = (n * 31 + i) % 500
+			if cache.get(key) is None:
+				cache.set(key, i)
+	threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	stats = cache.get_stats()["default"]
+	assert stats["size"] == 100
+	assert stats["hits"] + stats["misses"] == 8 * 20000
+	print(stats)
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# Local stand-in liteserver for the native lite-client backend.
+# Answers the hot query set with a small synthetic chain, proofs are not signed.
+# Run: python3 -m tests.liteserver_stub
+
+import asyncio
+import hashlib
+import struct
+import threading
+import time
+
+from nacl.signing import SigningKey
+
+from mytoncore.adnl import (
+	AdnlTcpConnection,
+	ADNL_MESSAGE_QUERY,
+	ADNL_MESSAGE_ANSWER,
+	TCP_PING,
+	TCP_PONG,
+	get_key_id,
+	get_shared_key,
+	get_handshake_cipher,
+	get_session_ciphers,
+	tl_id,
+	tl_pack_bytes,
+	tl_unpack_bytes,
+)
+from mytoncore.boc import Builder, Cell, serialize_boc, build_hashmap, CELL_MERKLE_PROOF
+from mytoncore.lite_api import (
+	LiteServerClient,
+	BlockIdExt,
+	LITE_SERVER_QUERY,
+	GET_MASTERCHAIN_INFO,
+	GET_ACCOUNT_STATE,
+	RUN_SMC_METHOD,
+	GET_ALL_SHARDS_INFO,
+	LOOKUP_BLOCK,
+	LIST_BLOCK_TRANSACTIONS,
+	GET_CONFIG_PARAMS,
+	BOOL_TRUE,
+	get_method_id,
+	parse_validator_set,
+)
+
+MASTERCHAIN_INFO = tl_id("liteServer.masterchainInfo last:tonNode.blockIdExt state_root_hash:int256 init:tonNode.zeroStateIdExt = liteServer.MasterchainInfo")
+ACCOUNT_STATE = tl_id("liteServer.accountState id:tonNode.blockIdExt shardblk:tonNode.blockIdExt shard_proof:bytes proof:bytes state:bytes = liteServer.AccountState")
+RUN_METHOD_RESULT = tl_id("liteServer.runMethodResult mode:# id:tonNode.blockIdExt shardblk:tonNode.blockIdExt shard_proof:mode.0?bytes proof:mode.0?bytes state_proof:mode.1?bytes init_c7:mode.3?bytes lib_extras:mode.4?bytes exit_code:int result:mode.2?bytes = liteServer.RunMethodResult")
+ALL_SHARDS_INFO = tl_id("liteServer.allShardsInfo id:tonNode.blockIdExt proof:bytes data:bytes = liteServer.AllShardsInfo")
+BLOCK_HEADER = tl_id("liteServer.blockHeader id:tonNode.blockIdExt mode:# header_proof:bytes = liteServer.BlockHeader")
+BLOCK_TRANSACTIONS = tl_id("liteServer.blockTransactions id:tonNode.blockIdExt req_count:# incomplete:Bool ids:vector liteServer.transactionId proof:bytes = liteServer.BlockTransactions")
+CONFIG_INFO = tl_id("liteServer.configInfo mode:# id:tonNode.blockIdExt state_proof:bytes config_proof:bytes = liteServer.ConfigInfo")
+BOOL_FALSE = tl_id("boolFalse = Bool")
+
+WALLET_ADDR = "83DFD552E63729B472FCBCC8C45EBCC6691702558B68EC7527E1BA403A0F31A8"
+ELECTOR_ADDR = "3" * 64
+CONFIG_ADDR = "5" * 64
+TRANS_HASH = "AB" * 32
+TRANS_LT = 46000000000003
+SEQNO = 42
+ELECTION_ID = 1700000000
+TRANSACTIONS_NUM = 300
+
+
+def get_hash(text):
+	return hashlib.sha256(text.encode("utf-8")).digest()
+#end define
+
+def make_block(workchain, shard, seqno):
+	return BlockIdExt(workchain, shard, seqno, get_hash(f"root{workchain}{shard}{seqno}"), get_hash(f"file{workchain}{shard}{seqno}"))
+#end define
+
+def make_proof(cell):
+	data = bytes([CELL_MERKLE_PROOF]) + bytes(32) + bytes(2)
+	return Cell(data, len(data) * 8, [cell], special=True)
+#end define
+
+def make_code():
+	leaf = Builder().store_uint(0xabc, 12).end_cell()
+	middle = Builder().store_uint(5, 7).store_ref(leaf).end_cell()
+	return Builder().store_uint(0xff00f4a413f4bcf2, 64).store_ref(middle).store_ref(leaf).end_cell()
+#end define
+
+def make_account():
+	data = Builder().store_uint(SEQNO, 32).end_cell()
+	builder = Builder().store_bit(1)
+	builder.store_address(0, WALLET_ADDR)
+	builder.store_var_uint(3, 3).store_var_uint(1000, 3).store_uint(0, 3) # storage used
+	builder.store_uint(int(time.time()), 32).store_bit(0)
+	builder.store_uint(TRANS_LT + 1, 64)
+	builder.store_grams(12345678900).store_bit(0)
+	builder.store_bit(1) # account_active
+	builder.store_bit(0).store_bit(0)
+	builder.store_maybe_ref(make_code()).store_maybe_ref(data).store_bit(0)
+	return builder.end_cell()
+#end define
+
+def make_state(accounts=None, custom=None):
+	empty = Builder().end_cell()
+	builder = Builder().store_uint(0x9023afe2, 32)
+	builder.store_ref(empty)
+	builder.store_ref(accounts if accounts is not None else Builder().store_bit(0).end_cell())
+	builder.store_ref(empty)
+	if custom is not None:
+		builder.store_maybe_ref(custom)
+	return builder.end_cell()
+#end define
+
+def make_account_proof(account):
+	def store(builder):
+		builder.store_uint(0, 5).store_grams(12345678900).store_bit(0)
+		builder.store_ref(account)
+		builder.store_uint(int(TRANS_HASH, 16), 256).store_uint(TRANS_LT, 64)
+	accounts_root = build_hashmap({int(WALLET_ADDR, 16): store}, 256)
+	accounts = Builder().store_maybe_ref(accounts_root).end_cell()
+	state = make_state(accounts=accounts)
+	return serialize_boc(make_proof(state))
+#end define
+
+def make_validator_set():
+	def validator(i):
+		def store(builder):
+			builder.store_uint(0x73, 8).store_uint(0x8e81278a, 32)
+			builder.store_uint(int(f"{i:02X}" * 32, 16), 256)
+			builder.store_uint(1000 + i, 64)
+			builder.store_uint(int(f"{i+0x10:02X}" * 32, 16), 256)
+		return store
+	validators = build_hashmap({i: validator(i) for i in range(3)}, 16)
+	builder = Builder().store_uint(0x12, 8)
+	builder.store_uint(1700000000, 32).store_uint(1700065536, 32)
+	builder.store_uint(3, 16).store_uint(3, 16)
+	builder.store_uint(3003, 64)
+	builder.store_maybe_ref(validators)
+	return builder.end_cell()
+#end define
+
+def make_config_proof():
+	params = dict()
+	params[0] = Builder().store_uint(int(CONFIG_ADDR, 16), 256).end_cell()
+	params[1] = Builder().store_uint(int(ELECTOR_ADDR, 16), 256).end_cell()
+	params[34] = make_validator_set()
+	config = build_hashmap({key: (lambda builder, cell=cell: builder.store_ref(cell)) for key, cell in params.items()}, 32)
+	extra = Builder().store_uint(0xcc26, 16).store_bit(0)
+	extra.store_uint(int(CONFIG_ADDR, 16), 256).store_ref(config)
+	state = make_state(custom=extra.end_cell())
+	return serialize_boc(make_proof(state))
+#end define
+
+def make_shard_hashes():
+	def descr(shard_block):
+		builder = Builder().store_bit(0).store_uint(0xb, 4)
+		builder.store_uint(shard_block.seqno, 32).store_uint(100, 32)
+		builder.store_uint(0, 64).store_uint(0, 64)
+		builder.store_bytes(shard_block.root_hash).store_bytes(shard_block.file_hash)
+		return builder.end_cell()
+	left = descr(make_block(0, 0x4000000000000000, 200))
+	right = descr(make_block(0, 0xc000000000000000, 201))
+	tree = Builder().store_bit(1).store_ref(left).store_ref(right).end_cell()
+	workchains = build_hashmap({0: lambda builder: builder.store_ref(tree)}, 32)
+	return serialize_boc(Builder().store_maybe_ref(workchains).end_cell())
+#end define
+
+def make_vm_stack(values):
+	rest = Builder().end_cell()
+	for value in values[:-1]:
+		rest = Builder().store_ref(rest).store_uint(1, 8).store_int(value, 64).end_cell()
+	root = Builder().store_uint(len(values), 24)
+	if values:
+		root.store_ref(rest).store_uint(1, 8).store_int(values[-1], 64)
+	return serialize_boc(root.end_cell())
+#end define
+
+
+class StubLiteServer:
+	def __init__(self, host="127.0.0.1", port=0):
+		self.host = host
+		self.port = port
+		self.signing_key = SigningKey.generate()
+		self.pubkey = bytes(self.signing_key.verify_key)
+		self.last = make_block(-1, 0x8000000000000000, 1000)
+		self.account = make_account()
+		self.server = None
+		self.queries = 0
+		self.connections = 0
+	#end define
+
+	async def start(self):
+		self.server = await asyncio.start_server(self.handle, self.host, self.port)
+		self.port = self.server.sockets[0].getsockname()[1]
+	#end define
+
+	async def handle(self, reader, writer):
+		handshake = await reader.readexactly(256)
+		if handshake[:32] != get_key_id(self.pubkey):
+			writer.close()
+			return
+		self.connections += 1
+		client_pubkey = handshake[32:64]
+		params_hash = handshake[64:96]
+		shared = get_shared_key(self.signing_key, client_pubkey)
+		params = get_handshake_cipher(shared, params_hash).update(handshake[96:256])
+		if hashlib.sha256(params).digest() != params_hash:
+			writer.close()
+			return
+		rx, tx = get_session_ciphers(params, server=True)
+		connection = AdnlTcpConnection(reader, writer, rx, tx)
+		connection.send_packet(b'')
+		try:
+			while True:
+				payload = await connection.read_packet()
+				if payload[:4] == TCP_PING:
+					connection.send_packet(TCP_PONG + payload[4:12])
+					continue
+				if payload[:4] != ADNL_MESSAGE_QUERY:
+					continue
+				query_id = payload[4:36]
+				query, offset = tl_unpack_bytes(payload, 36)
+				if query[:4] != LITE_SERVER_QUERY:
+					continue
+				data, offset = tl_unpack_bytes(query, 4)
+				self.queries += 1
+				answer = self.answer(data)
+				connection.send_packet(ADNL_MESSAGE_ANSWER + query_id + tl_pack_bytes(answer))
+		except asyncio.IncompleteReadError:
+			pass
+		finally:
+			writer.close()
+	#end define
+
+	def answer(self, data):
+		function = data[:4]
+		if function == GET_MASTERCHAIN_INFO:
+			zerostate = struct.pack("<i", -1) + bytes(64)
+			return MASTERCHAIN_INFO + self.last.pack() + bytes(32) + zerostate
+		if function == GET_ACCOUNT_STATE:
+			shard_block = make_block(0, 0x8000000000000000, 500)
+			result = ACCOUNT_STATE + self.last.pack() + shard_block.pack() + tl_pack_bytes(b'')
+			result += tl_pack_bytes(make_account_proof(self.account)) + tl_pack_bytes(serialize_boc(self.account))
+			return result
+		if function == RUN_SMC_METHOD:
+			method_id = struct.unpack_from("<q", data, 4 + 4 + 80 + 36)[0]
+			values = {get_method_id("seqno"): [SEQNO], get_method_id("active_election_id"): [ELECTION_ID]}
+			shard_block = make_block(-1, 0x8000000000000000, 1000)
+			result = RUN_METHOD_RESULT + struct.pack("<I", 4) + self.last.pack() + shard_block.pack()
+			result += struct.pack("<i", 0) + tl_pack_bytes(make_vm_stack(values.get(method_id, [])))
+			return result
+		if function == GET_CONFIG_PARAMS:
+			return CONFIG_INFO + struct.pack("<I", 0) + self.last.pack() + tl_pack_bytes(b'') + tl_pack_bytes(make_config_proof())
+		if function == GET_ALL_SHARDS_INFO:
+			return ALL_SHARDS_INFO + self.last.pack() + tl_pack_bytes(b'') + tl_pack_bytes(make_shard_hashes())
+		if function == LOOKUP_BLOCK:
+			workchain, shard, seqno = struct.unpack_from("<iqi", data, 8)
+			return BLOCK_HEADER + make_block(workchain, shard, seqno).pack() + struct.pack("<I", 0) + tl_pack_bytes(b'')
+		if function == LIST_BLOCK_TRANSACTIONS:
+			return self.answer_transactions(data)
+		return tl_id("liteServer.error code:int message:string = liteServer.Error") + struct.pack("<i", 400) + tl_pack_bytes(b"unknown query")
+	#end define
+
+	def answer_transactions(self, data):
+		offset = 4 + 80
+		mode, count = struct.unpack_from("<II", data, offset)
+		offset += 8
+		start = 0
+		if mode & 0x80:
+			after_lt = struct.unpack_from("<q", data, offset + 32)[0]
+			start = after_lt - TRANS_LT + 1
+		end = min(start + count, TRANSACTIONS_NUM)
+		result = BLOCK_TRANSACTIONS + self.last.pack() + struct.pack("<I", count)
+		result += BOOL_TRUE if end < TRANSACTIONS_NUM else BOOL_FALSE
+		result += struct.pack("<I", end - start)
+		for i in range(start, end):
+			result += struct.pack("<I", 7) + bytes.fromhex(WALLET_ADDR) + struct.pack("<q", TRANS_LT + i) + get_hash(str(i))
+		return result + tl_pack_bytes(b'')
+	#end define
+#end class
+
+
+def Test():
+	loop = asyncio.new_event_loop()
+	stub = StubLiteServer()
+	loop.run_until_complete(stub.start())
+	threading.Thread(target=loop.run_forever, daemon=True).start()
+
+	client = LiteServerClient()
+	server = (stub.host, stub.port, stub.pubkey)
+	run = lambda coro: client.run(coro, 3)
+
+	# Concurrent first queries share one connection
+	async def concurrent(count):
+		queries = [client.get_masterchain_info(server, timeout=3) for i in range(count)]
+		return await asyncio.gather(*queries)
+	#end define
+
+	blocks = run(concurrent(8))
+	assert [str(item) for item in blocks] == [str(stub.last)] * 8
+	assert stub.connections == 1, stub.connections
+	blocks = run(concurrent(32))
+	assert len(blocks) == 32 and stub.connections == 1
+
+	block = run(client.get_masterchain_info(server, timeout=3))
+	assert str(block) == str(stub.last)
+
+	account = run(client.get_account_state(server, 0, WALLET_ADDR, timeout=3))
+	assert account["status"] == "active"
+	assert account["balance"] == 12345678900
+	assert account["lt"] == str(TRANS_LT) and account["hash"] == TRANS_HASH
+	assert account["code_hash"] == hashlib.sha256(bytes.fromhex("FF00F4A413F4BCF2" + "0B" + "0ABC" + "0ABC")).hexdigest()
+
+	result = run(client.run_smc_method(server, 0, WALLET_ADDR, "seqno", [], timeout=3))
+	assert result["exit_code"] == 0 and result["result"] == [SEQNO]
+
+	block, params = run(client.get_config_params(server, [1, 34], timeout=3))
+	assert block.seqno == 1000
+	assert params[1].begin_parse().load_hex(256) == ELECTOR_ADDR
+	config34 = parse_validator_set(params[34])
+	assert config34["totalValidators"] == 3 and config34["totalWeight"] == 3003
+	assert config34["validators"][2]["adnlAddr"] == "12" * 32
+
+	shards = run(client.get_all_shards_info(server, None, timeout=3))
+	assert [str(item).split(':')[0] for item in shards] == ["(0,4000000000000000,200)", "(0,C000000000000000,201)"]
+
+	found = run(client.lookup_block(server, -1, 0x8000000000000000, 777, timeout=3))
+	assert found.seqno == 777
+
+	transactions = run(client.list_block_transactions(server, stub.last, 999999, timeout=3))
+	assert len(transactions) == TRANSACTIONS_NUM
+	assert transactions[-1]["lt"] == TRANS_LT + TRANSACTIONS_NUM - 1
+
+	# Latency of the multiplexed connection
+	count = 1000
+	start = time.time()
+	for i in range(count):
+		run(client.get_masterchain_info(server, timeout=3))
+	diff = (time.time() - start) / count * 1000
+	print(f"ok, queries: {stub.queries}, get_masterchain_info: {round(diff, 3)} ms")
+	client.close()
+#end define
+
+
+if __name__ == "__main__":
+	Test()
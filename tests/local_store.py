@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# LocalStore: incremental saves, two processes on one db, json snapshots, failed writes, timings.
+# Run: python3 -m tests.local_store
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from mytoncore.local_store import LocalStore
+
+
+def make_db():
+	db = dict()
+	db["config"] = {"logLevel": "info", "isLocaldbSaving": False}
+	db["saveElections"] = {str(1700000000 + i * 65536): {f"{j:064x}": {"stake": j, "maxFactor": 3.0} for j in range(400)} for i in range(10)}
+	db["saveComplaints"] = {str(i): {"hash": f"{i:064x}", "isPassed": False} for i in range(500)}
+	db["statistics"] = {"netLoadAvg": [1.0, 2.0, 3.0]}
+	db["bookmarks"] = list()
+	return db
+#end define
+
+def legacy_save(db, path):
+	# The whole db is rewritten on every save
+	with open(path, 'w') as file:
+		file.write(json.dumps(db, indent=4))
+#end define
+
+def Test():
+	with tempfile.TemporaryDirectory() as dir_name:
+		json_path = os.path.join(dir_name, "mytoncore.db")
+		path = os.path.join(dir_name, "mytoncore.sqlite")
+		db = make_db()
+		legacy_save(db, json_path)
+
+		# the json of the previous version is imported on the first start
+		store = LocalStore(path, json_path)
+		mytoncore_db = dict()
+		store.load(mytoncore_db)
+		assert mytoncore_db == db
+		store.save(mytoncore_db)
+		assert store.get_stats()["writes"] == 0
+		mytoncore_db["bookmarks"].append({"name": "a", "addr": "b"})
+		mytoncore_db["config"]["logLevel"] = "debug"
+		store.save(mytoncore_db)
+		assert store.get_stats()["writes"] == 2
+
+		# mytonctrl has its own copy
+		other = LocalStore(path, json_path)
+		mytonctrl_db = dict()
+		other.load(mytonctrl_db)
+		assert mytonctrl_db == mytoncore_db
+		mytonctrl_db["stake"] = 10000
+		del mytonctrl_db["statistics"]
+		other.save(mytonctrl_db)
+		mytoncore_db["saveComplaints"]["500"] = {"hash": "00", "isPassed": True}
+		store.save(mytoncore_db)
+		assert mytoncore_db["stake"] == 10000 and "statistics" not in mytoncore_db
+		assert mytoncore_db["saveComplaints"]["500"]["isPassed"] is True
+		other.save(mytonctrl_db)
+		assert mytonctrl_db == mytoncore_db
+
+		# a key changed by both keeps ours
+		mytoncore_db["stake"] = 1
+		mytonctrl_db["stake"] = 2
+		other.save(mytonctrl_db)
+		store.save(mytoncore_db)
+		assert mytoncore_db["stake"] == 1
+		other.save(mytonctrl_db)
+		assert mytonctrl_db["stake"] == 1
+
+		# a failed write leaves the previous state
+		mytoncore_db["stake"] = 3
+		store.connect().execute("CREATE TRIGGER fail BEFORE INSERT ON items BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+		try:
+			store.save(mytoncore_db)
+			raise AssertionError("no error")
+		except sqlite3.Error:
+			pass
+		store.connect().execute("DROP TRIGGER fail")
+		check = dict()
+		LocalStore(path, json_path).load(check)
+		assert check["stake"] == 1
+		store.save(mytoncore_db)
+		LocalStore(path, json_path).load(check)
+		assert check["stake"] == 3
+
+		# the json snapshot stays readable for the installer and backups
+		store.save(mytoncore_db, snapshot=True)
+		with open(json_path) as file:
+			assert json.load(file) == mytoncore_db
+
+		# a stale rewrite of the json does not roll the store back, a real edit is imported
+		stale = dict(mytoncore_db)
+		mytoncore_db["stake"] = 4
+		store.save(mytoncore_db)
+		stale["liteClient"] = {"configPath": "/tmp/global.config.json"}
+		legacy_save(stale, json_path)
+		LocalStore(path, json_path).load(check)
+		assert check["stake"] == 4 and check["liteClient"]["configPath"] == "/tmp/global.config.json"
+
+		# an edit of the json by the installer or by hand survives the next save of the daemon
+		store.save(mytoncore_db, snapshot=True)
+		with open(json_path) as file:
+			edited = json.load(file)
+		edited["liteClient"]["configPath"] = "/usr/bin/ton/global.config.json"
+		legacy_save(edited, json_path)
+		store.save(mytoncore_db, snapshot=True)
+		assert mytoncore_db["liteClient"]["configPath"] == "/usr/bin/ton/global.config.json"
+		with open(json_path) as file:
+			assert json.load(file)["liteClient"]["configPath"] == "/usr/bin/ton/global.config.json"
+		LocalStore(path, json_path).load(check)
+		assert check["liteClient"]["configPath"] == "/usr/bin/ton/global.config.json"
+		other.save(mytonctrl_db)
+		assert mytonctrl_db["liteClient"]["configPath"] == "/usr/bin/ton/global.config.json"
+
+		# a json cut by a crash of the old writer is ignored
+		with open(json_path, 'w') as file:
+			file.write('{"stake": ')
+		LocalStore(path, json_path).load(check)
+		assert check["stake"] == 4
+
+		# one small change in a db of several megabytes
+		mytoncore_db["saveElections"] = {str(i): {f"{j:064x}": {"stake": j} for j in range(400)} for i in range(100)}
+		store.save(mytoncore_db)
+		size = len(json.dumps(mytoncore_db, indent=4)) / 2**20
+		start = time.time()
+		for i in range(20):
+			mytoncore_db["stake"] = i
+			legacy_save(mytoncore_db, json_path + ".legacy")
+		legacy_time = (time.time() - start) * 1000 / 20
+		writes = store.get_stats()["writes"]
+		start = time.time()
+		for i in range(20):
+			mytoncore_db["stake"] = i
+			store.save(mytoncore_db)
+		new_time = (time.time() - start) * 1000 / 20
+		assert store.get_stats()["writes"] - writes == 20
+		print(f"save of a {size:.1f} MB db: full json {legacy_time:.1f} ms, store {new_time:.1f} ms, {legacy_time / new_time:.1f}x")
+		store.close()
+		other.close()
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# Golden outputs and benchmark of the lite-client, console and fift output parsers.
+# Run: python3 -m tests.parser_suite [--update] [--quick] [--save FILE] [--compare FILE]
+#      python3 -m tests.parser_suite --capture mainnet|testnet
+#
+# Every parser runs on its fixture corpus in tests/fixtures and the result is
+# compared with tests/fixtures/golden/<parser>.json, one line per fixture.
+# The golden files are written by --update with the parsers of the baseline
+# commit 4a57b00 (the legacy_* copies below and in the other tests), not with
+# the parsers under test, so the suite checks the current parsers against the
+# old behaviour. Intended differences are applied in the legacy wrappers.
+# --capture records the outputs of the local node and its liteserver into
+# tests/fixtures/<dir>/captured_<network>.txt, see tests/fixtures/README.md.
+# The benchmark reports calls per second, MB/s of input and tracemalloc
+# peak/retained memory of one call; --save writes it as json and --compare
+# prints the ratios against a file saved on another commit.
+
+import argparse
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+
+from mytoncore.parsers import (
+	tlb2json,
+	parse_stack,
+	parse_result_tree,
+	parse_account,
+	parse_checkloadall,
+	parse_validator_set,
+	get_worker_var,
+	parse_block_transactions,
+	parse_shards,
+	parse_block_seqno,
+	parse_fift_request,
+)
+from tests.account_parser import legacy_get_account, get_var_from_worker_output
+from tests.checkload_parser import legacy_get_validators_load
+from tests.result_tree import legacy_result2dict
+from tests.stack_parser import legacy_result2list
+from tests.tlb2json import legacy_tlb2json
+from tests.validator_set import legacy_get_config34
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+GOLDEN_DIR = os.path.join(FIXTURES_DIR, "golden")
+
+
+def parse(text, search, search2=None):
+	# mypylib.parse
+	if search is None or text is None:
+		return None
+	if search not in text:
+		return None
+	text = text[text.find(search) + len(search):]
+	if search2 is not None and search2 in text:
+		text = text[:text.find(search2)]
+	return text
+#end define
+
+def result2list(text):
+	# MyTonCore.Result2List
+	buff = parse(text, "result:", "\n")
+	if buff is None or "error" in buff:
+		return
+	return parse_stack(buff)
+#end define
+
+def config2json(text):
+	# MyTonCore.GetConfig
+	return tlb2json(text[text.find("ConfigParam"):])
+#end define
+
+def checkloadall(text):
+	# MyTonCore.GetValidatorsLoad, lines as yielded by LiteClient.RunLines
+	return parse_checkloadall(text.split('\n'))
+#end define
+
+def getstats_blocks(text):
+	# MyTonCore.FetchValidatorStatus
+	result = dict()
+	for name in ("masterchainblock", "gcmasterchainblock", "keymasterchainblock", "rotatemasterchainblock"):
+		result[name] = parse_block_seqno(parse(text, name, '\n'))
+	return result
+#end define
+
+def fift_request(text):
+	# MyTonCore.CreateComplaintRequest and the other request scripts
+	return parse_fift_request(text, "Creating a request to ")
+#end define
+
+def legacy_result2list_text(text):
+	# MyTonCore.Result2List of 4a57b00
+	buff = parse(text, "result:", "\n")
+	if buff is None or "error" in buff:
+		return
+	return legacy_result2list(buff)
+#end define
+
+def legacy_config2json(text):
+	# MyTonCore.GetConfig of 4a57b00
+	return legacy_tlb2json(text[text.find("ConfigParam"):])
+#end define
+
+def legacy_get_account_status(text):
+	# The old parser kept the rest of the line of a frozen account: "frozen state_hash:x...)",
+	# parse_account returns "frozen" as the other statuses
+	account = legacy_get_account(text)
+	if account is not None and account["status"].startswith("frozen "):
+		account["status"] = "frozen"
+	return account
+#end define
+
+def legacy_get_transactions(text):
+	# MyTonCore.GetTransactions of 4a57b00 without the lite-client call, Trans as (addr, lt, hash)
+	transactions = list()
+	lines = text.split('\n')
+	for line in lines:
+		if "transaction #" in line:
+			buff = line.split(' ')
+			trans_addr = buff[3]
+			trans_lt = buff[5]
+			trans_hash = buff[7]
+			transactions.append((trans_addr, trans_lt, trans_hash))
+	return transactions
+#end define
+
+def legacy_get_shards(text):
+	# MyTonCore.GetShards of 4a57b00 without the lite-client call, the Block as its string
+	shards = list()
+	lines = text.split('\n')
+	for line in lines:
+		if "shard #" in line:
+			buff = line.split(' ')
+			shard_id = buff[1]
+			shard_id = shard_id.replace('#', '')
+			shards.append((shard_id, buff[3]))
+	return shards
+#end define
+
+def legacy_gvs_get_item_from_buff(buff):
+	# MyTonCore.GVS_GetItemFromBuff of 4a57b00
+	buffList = buff.split(':')
+	buff2 = buffList[0]
+	buff2 = buff2.replace(' ', '')
+	buff2 = buff2.replace('(', '')
+	buff2 = buff2.replace(')', '')
+	buffList2 = buff2.split(',')
+	item = buffList2[2]
+	item = int(item)
+	return item
+#end define
+
+def legacy_getstats_blocks(text):
+	result = dict()
+	for name in ("masterchainblock", "gcmasterchainblock", "keymasterchainblock", "rotatemasterchainblock"):
+		result[name] = legacy_gvs_get_item_from_buff(parse(text, name, '\n'))
+	return result
+#end define
+
+def legacy_fift_request(result):
+	# MyTonCore.CreateComplaintRequest of 4a57b00 without the fift call
+	resultList = result.split('\n')
+	i = 0
+	start_index = 0
+	for item in resultList:
+		if "Creating a request to " in item:
+			start_index = i
+		i += 1
+	var1 = resultList[start_index + 1]
+	return var1
+#end define
+
+# name, fixture directories, parser, parser of the baseline commit for the golden files
+PARSERS = [
+	("Result2List", ["runmethodfull"], result2list, legacy_result2list_text),
+	("Result2Dict", ["lasttransdump"], parse_result_tree, legacy_result2dict),
+	("Tlb2Json", ["getconfig", "getconfig34"], config2json, legacy_config2json),
+	("GetValidatorSet", ["getconfig34"], parse_validator_set, legacy_get_config34),
+	("GetAccount", ["getaccount"], parse_account, legacy_get_account_status),
+	("GetVarFromWorkerOutput", ["runmethodfull"], lambda text: get_worker_var(text, "result"), lambda text: get_var_from_worker_output(text, "result")),
+	("GetTransactions", ["listblocktrans"], parse_block_transactions, legacy_get_transactions),
+	("GetShards", ["allshards"], parse_shards, legacy_get_shards),
+	("GetValidatorsLoad", ["checkloadall"], checkloadall, lambda text: legacy_get_validators_load(text)),
+	("GVS_GetItemFromBuff", ["getstats"], getstats_blocks, legacy_getstats_blocks),
+	("CreateRequest", ["fift"], fift_request, legacy_fift_request),
+]
+
+
+def load_fixtures(dirs):
+	fixtures = dict()
+	for dir_name in dirs:
+		path = os.path.join(FIXTURES_DIR, dir_name)
+		for name in sorted(os.listdir(path)):
+			with open(os.path.join(path, name)) as file:
+				fixtures[f"{dir_name}/{name}"] = file.read()
+	return fixtures
+#end define
+
+def normalize(value):
+	# Golden files are json: tuples become lists, int keys become strings
+	return json.loads(json.dumps(value))
+#end define
+
+def get_golden_path(name):
+	return os.path.join(GOLDEN_DIR, f"{name}.json")
+#end define
+
+def run_legacy(legacy, text):
+	# A fixture the baseline parser fails on is recorded with its error,
+	# the current parser only has to parse it
+	try:
+		return normalize(legacy(text))
+	except Exception as ex:
+		return {"baseline_error": type(ex).__name__}
+#end define
+
+def check_golden(name, func, legacy, fixtures, update=False):
+	path = get_golden_path(name)
+	if update:
+		outputs = {fixture: run_legacy(legacy, text) for fixture, text in fixtures.items()}
+		os.makedirs(GOLDEN_DIR, exist_ok=True)
+		lines = [f"{json.dumps(fixture)}: {json.dumps(outputs[fixture], sort_keys=True)}" for fixture in sorted(outputs)]
+		with open(path, 'w') as file:
+			file.write("{\n" + ",\n".join(lines) + "\n}\n")
+		return
+	outputs = {fixture: normalize(func(text)) for fixture, text in fixtures.items()}
+	with open(path) as file:
+		golden = json.load(file)
+	assert sorted(outputs) == sorted(golden), f"{name}: fixtures differ from {path}, run with --update"
+	for fixture, output in outputs.items():
+		if isinstance(golden[fixture], dict) and "baseline_error" in golden[fixture]:
+			continue
+		assert output == golden[fixture], f"{name}: {fixture} differs from the golden output"
+#end define
+
+def measure(func, text, min_time):
+	repeat = 0
+	start = time.perf_counter()
+	while True:
+		func(text)
+		repeat += 1
+		elapsed = time.perf_counter() - start
+		if elapsed >= min_time:
+			break
+	calls = repeat / elapsed
+	tracemalloc.start()
+	result = func(text)
+	retained, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del result
+	return {
+		"calls_per_s": round(calls, 1),
+		"mb_per_s": round(calls * len(text) / 1e6, 3),
+		"peak_kb": round(peak / 1024, 1),
+		"retained_kb": round(retained / 1024, 1),
+	}
+#end define
+
+def get_commit():
+	try:
+		args = ["git", "rev-parse", "--short", "HEAD"]
+		return subprocess.check_output(args, cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL).decode().strip()
+	except Exception:
+		return None
+#end define
+
+def print_results(results, baseline=None):
+	header = f"{'parser':<24}{'fixture':<44}{'calls/s':>11}{'MB/s':>9}{'peak KiB':>10}{'kept KiB':>10}"
+	if baseline is not None:
+		header += f"{'speed':>8}{'peak':>8}"
+	print(header)
+	for name, fixtures in results.items():
+		for fixture, item in fixtures.items():
+			line = f"{name:<24}{fixture:<44}{item['calls_per_s']:>11.1f}{item['mb_per_s']:>9.2f}{item['peak_kb']:>10.1f}{item['retained_kb']:>10.1f}"
+			old = None
+			if baseline is not None:
+				old = baseline.get(name, dict()).get(fixture)
+			if old is not None:
+				speed = item["calls_per_s"] / old["calls_per_s"]
+				peak = item["peak_kb"] / old["peak_kb"] if old["peak_kb"] else 1
+				line += f"{speed:>7.2f}x{peak:>7.2f}x"
+			print(line)
+	#end for
+#end define
+
+def Test(update=False, min_time=0.2, save=None, compare=None):
+	results = dict()
+	for name, dirs, func, legacy in PARSERS:
+		fixtures = load_fixtures(dirs)
+		check_golden(name, func, legacy, fixtures, update)
+		results[name] = {fixture: measure(func, text, min_time) for fixture, text in fixtures.items()}
+	#end for
+
+	baseline = None
+	if compare is not None:
+		with open(compare) as file:
+			data = json.load(file)
+		print(f"compared with {data.get('commit')}")
+		baseline = data["results"]
+	print_results(results, baseline)
+	if save is not None:
+		with open(save, 'w') as file:
+			json.dump({"commit": get_commit(), "results": results}, file, indent=1)
+	print("golden outputs updated" if update else "ok")
+#end define
+
+def capture(network):
+	# Real outputs of the local node for the fixture corpus, needs an installed mytoncore
+	from mypylib.mypylib import MyPyClass
+	from mytoncore.mytoncore import MyTonCore
+	ton = MyTonCore(MyPyClass("mytoncore.py"))
+	if ton.GetNetworkName() != network:
+		raise Exception(f"capture error: the node is on {ton.GetNetworkName()}, not {network}")
+	elector = ton.GetFullElectorAddr()
+	account = ton.GetAccount(elector)
+	block = ton.GetLastBlock()
+	timestamp = int(time.time())
+	outputs = dict()
+	outputs["runmethodfull"] = ton.liteClient.Run(f"runmethodfull {elector} participant_list")
+	outputs["getconfig"] = ton.liteClient.Run("getconfig 15")
+	outputs["getconfig34"] = ton.liteClient.Run("getconfig 34")
+	outputs["getaccount"] = ton.liteClient.Run(f"getaccount {elector}")
+	outputs["lasttransdump"] = ton.liteClient.Run(f"lasttransdump {elector} {account.lt} {account.hash} 10")
+	outputs["listblocktrans"] = ton.liteClient.Run(f"listblocktrans {block} 999999")
+	outputs["allshards"] = ton.liteClient.Run(f"allshards {block}")
+	outputs["checkloadall"] = "\n".join(ton.liteClient.RunLines(f"checkloadall {timestamp - 3600} {timestamp - 60}", timeout=30))
+	outputs["getstats"] = ton.validatorConsole.Run("getstats")
+	# fift request scripts need the validator keys of an election, they are not captured
+	for dir_name, text in outputs.items():
+		path = os.path.join(FIXTURES_DIR, dir_name, f"captured_{network}.txt")
+		with open(path, 'w') as file:
+			file.write(text)
+		print(f"{path}: {len(text)} bytes")
+	print("run with --update to write the golden outputs for the captured fixtures")
+#end define
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--update", action="store_true", help="rewrite the golden outputs")
+	parser.add_argument("--quick", action="store_true", help="short benchmark, for checking the outputs only")
+	parser.add_argument("--save", help="write the benchmark results to a json file")
+	parser.add_argument("--compare", help="json file of --save to compare with")
+	parser.add_argument("--capture", choices=["mainnet", "testnet"], help="record the fixtures from the local node")
+	args = parser.parse_args()
+	if args.capture is not None:
+		capture(args.capture)
+	else:
+		Test(args.update, 0.01 if args.quick else 0.2, args.save, args.compare)
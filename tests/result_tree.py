@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# parse_result_tree against the previous Result2Dict, plus timings.
+# Run: python3 -m tests.result_tree
+
+import time
+
+from mytoncore.parsers import parse_result_tree
+
+
+def legacy_result2dict(result):
+	# MyTonCore.Result2Dict before parse_result_tree
+	rawAny = False
+	data = dict()
+	tabSpaces = 2
+	parenElementsList = list()
+	lines = result.split('\n')
+	for line in lines:
+		firstSpacesCount = 0
+		for item in line:
+			if item == ' ':
+				firstSpacesCount += 1
+			else:
+				break
+		deep = firstSpacesCount // tabSpaces
+		line = line.lstrip()
+		if "raw@Any" in line:
+			rawAny = True
+		if rawAny == True and ')' in line:
+			rawAny = False
+		if line[:2] == "x{" and rawAny == False:
+			continue
+		if deep == 0:
+			data[line] = dict()
+			parenElementsList = [line]
+		else:
+			buff = data
+			parenElementsList = parenElementsList[:deep]
+			for item in parenElementsList:
+				buff = buff[item]
+			buff[line] = dict()
+			parenElementsList.append(line)
+		#end if
+	#end for
+	return data
+#end define
+
+def get_item(data, search):
+	# MyTonCore.GetItemFromDict
+	for key, item in data.items():
+		if search in key:
+			return item
+	return None
+#end define
+
+DESCRIPTION = """    description:(trans_ord credit_first:0
+      storage_ph:(just
+        value:(tr_phase_storage
+          storage_fees_collected:(nanograms
+            amount:(var_uint len:0 value:0))
+          storage_fees_due:nothing status_change:acst_unchanged))
+      credit_ph:(just
+        value:(tr_phase_credit
+          due_fees_collected:nothing
+          credit:(currencies
+            grams:(nanograms
+              amount:(var_uint len:5 value:1000000000))
+            other:(extra_currencies
+              dict:hme_empty))))
+      compute_ph:(tr_phase_compute_vm success:1 msg_state_used:0 account_activated:0
+        gas_fees:(nanograms
+          amount:(var_uint len:3 value:3308000))
+        ^[
+          gas_used:(var_uint len:2 value:3308)
+          gas_limit:(var_uint len:0 value:0)
+          gas_credit:(just
+            value:(var_uint len:2 value:10000))
+          mode:0 exit_code:0 exit_arg:nothing vm_steps:68
+          vm_init_state_hash:x0000000000000000000000000000000000000000000000000000000000000000
+          vm_final_state_hash:x0000000000000000000000000000000000000000000000000000000000000000
+          ])
+      action:(just
+        value:^(trans_action_phase success:1 valid:1 no_funds:0
+            status_change:acst_unchanged
+            total_fwd_fees:(just
+              value:(nanograms
+                amount:(var_uint len:3 value:1000000)))
+            total_action_fees:(just
+              value:(nanograms
+                amount:(var_uint len:3 value:333328)))
+            result_code:0 result_arg:nothing tot_actions:1 spec_actions:0 skipped_actions:0 msgs_created:1
+            action_list_hash:x0000000000000000000000000000000000000000000000000000000000000000
+            tot_msg_size:(storage_used_short
+              cells:(var_uint len:1 value:1)
+              bits:(var_uint len:2 value:705))))
+      aborted:0 bounce:nothing destroyed:0))
+"""
+
+def make_message(direction, i):
+	src = format(i * 7919, "064X")
+	dest = format(i * 104729, "064X")
+	return f"""  {direction} message
+    (message
+      info:(int_msg_info ihr_disabled:1 bounce:1 bounced:0
+        src:(addr_std
+          anycast:nothing workchain_id:0 address:x{src})
+        dest:(addr_std
+          anycast:nothing workchain_id:-1 address:x{dest})
+        value:(currencies
+          grams:(nanograms
+            amount:(var_uint len:5 value:{1000000000 + i}))
+          other:(extra_currencies
+            dict:hme_empty))
+        ihr_fee:(nanograms
+          amount:(var_uint len:0 value:0))
+        fwd_fee:(nanograms
+          amount:(var_uint len:3 value:{666672 + i}))
+        created_lt:{27000000000 + i} created_at:{1729500000 + i})
+      init:nothing
+      body:(either
+        value:raw@Any
+          x{{00000000{format(i, "08X")}}}
+        ))
+"""
+#end define
+
+def make_lasttransdump(count):
+	text = ""
+	for i in range(count):
+		text += f"transaction #{i} from block (0,8000000000000000,{40000000 + i}):AB:CD is\n"
+		text += f"  time={1729500000 + i} outmsg_cnt=1\n"
+		text += f"  (transaction account_addr:x{'A1' * 32} lt:{27000000000 + i} now:{1729500000 + i}\n"
+		text += f"    total_fees:(currencies\n      grams:(nanograms\n        amount:(var_uint len:3 value:{1000000 + i})))\n"
+		text += DESCRIPTION
+		text += "    x{DEADBEEF})\n"
+		text += make_message("inbound", i)
+		text += make_message("outbound", i + 1)
+	text += f"previous transaction has lt 26999999999 hash {'EF' * 32}\n"
+	return text
+#end define
+
+def Test():
+	text = make_lasttransdump(3)
+	tree = parse_result_tree(text)
+	assert tree == legacy_result2dict(text)
+	item = get_item(tree, "transaction #1")
+	message = get_item(get_item(item, "inbound message"), "message")
+	assert list(get_item(get_item(message, "body"), "value")) == ["x{0000000000000001}"]
+	assert "value:1000000001" in get_item(get_item(get_item(message, "info"), "value"), "grams").popitem()[0]
+	assert parse_result_tree("a\n    b\n  c\nd") == legacy_result2dict("a\n    b\n  c\nd")
+
+	print(f"{'transactions':<14}{'legacy, ms':>12}{'tree, ms':>12}{'speedup':>10}")
+	for count in (10, 100, 1000):
+		text = make_lasttransdump(count)
+		repeat = 5
+		start = time.time()
+		for i in range(repeat):
+			legacy_result2dict(text)
+		legacy = (time.time() - start) / repeat * 1000
+		start = time.time()
+		for i in range(repeat):
+			parse_result_tree(text)
+		new = (time.time() - start) / repeat * 1000
+		assert parse_result_tree(text) == legacy_result2dict(text)
+		print(f"{count:<14}{legacy:>12.3f}{new:>12.3f}{legacy / new:>9.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
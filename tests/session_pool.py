@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# Session framing against a fake interactive tool with slow, asynchronous answers.
+# Run: python3 -m tests.session_pool
+
+import sys
+import time
+
+from mytoncore.session_pool import Session, SessionPool
+
+
+# Answers `query <gap> <count>` from another thread: `count` lines `<gap>` seconds apart, then `end`.
+# `extra <gap>` answers `end` and one more line after it. Other commands are unknown, as in lite-client.
+FAKE_TOOL = r"""
+import sys, threading, time
+def out(text):
+	sys.stdout.write(text + "\n")
+	sys.stdout.flush()
+def answer(gap, count, extra):
+	for i in range(count):
+		time.sleep(gap)
+		out(f"line {i}")
+	out("end")
+	if extra:
+		time.sleep(gap)
+		out("late line")
+for line in sys.stdin:
+	words = line.split()
+	if words and words[0] in ("query", "extra"):
+		gap = float(words[1])
+		count = int(words[2]) if len(words) > 2 else 0
+		threading.Thread(target=answer, args=(gap, count, words[0] == "extra")).start()
+	elif words:
+		out(f"unknown command '{words[0]}'")
+"""
+
+def is_complete(line):
+	return line.startswith("end")
+#end define
+
+def Test():
+	args = [sys.executable, "-c", FAKE_TOOL]
+
+	# pauses longer than the old 50 ms quiet gap do not cut the answer
+	session = Session(args)
+	output, err = session.Run("query 0.15 3", timeout=5, is_complete=is_complete)
+	assert output == "line 0\nline 1\nline 2\nend\n", output
+	assert err == ""
+	output, err = session.Run("query 0 0", timeout=5, is_complete=is_complete)
+	assert output == "end\n", output
+
+	# the quiet gap alone would have returned a part of it
+	output, err = session.Run("query 0.15 3", timeout=5)
+	assert "end" not in output
+	session.close()
+
+	# output after the end of the response raises and closes the session
+	session = Session(args)
+	try:
+		session.Run("extra 0.02", timeout=5, is_complete=is_complete)
+		time.sleep(0.1)
+		session.Run("query 0 0", timeout=5, is_complete=is_complete)
+		raise AssertionError("no error")
+	except Exception as ex:
+		assert "output after the end of the response" in str(ex) or "output of a previous command" in str(ex), ex
+	assert session.is_alive() is False
+
+	# the pool replaces the closed session
+	pool = SessionPool(max_size=2)
+	for i in range(3):
+		output, err = pool.Run(args, "query 0.1 2", timeout=5, is_complete=is_complete)
+		assert output == "line 0\nline 1\nend\n", output
+	assert pool.get_size() == 1
+	pool.close_all()
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
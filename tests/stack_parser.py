@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# parse_stack against the previous Result2List implementation, plus timings.
+# Run: python3 -m tests.stack_parser
+
+import json
+import time
+
+from mytoncore.parsers import parse_stack, StackCell
+
+
+def legacy_result2list(buff):
+	# MyTonCore.Result2List before parse_stack, without the `result:` lookup
+	buff = buff.replace(')', ']')
+	buff = buff.replace('(', '[')
+	buff = buff.replace(']', ' ] ')
+	buff = buff.replace('[', ' [ ')
+	buff = buff.replace('bits:', '')
+	buff = buff.replace('refs:', '')
+	buff = buff.replace('.', '')
+	buff = buff.replace(';', '')
+	arr = buff.split()
+
+	output = ""
+	arrLen = len(arr)
+	for i in range(arrLen):
+		item = arr[i]
+		if '{' in item or '}' in item:
+			item = f"\"{item}\""
+		if i+1 < arrLen:
+			nextItem = arr[i+1]
+		else:
+			nextItem = None
+		if item == '[':
+			output += item
+		elif nextItem == ']':
+			output += item
+		elif i+1 == arrLen:
+			output += item
+		else:
+			output += item + ', '
+	#end for
+
+	return json.loads(output)
+#end define
+
+def make_participant_list(count):
+	# participant_list_extended of the elector: elect_at elect_close min_stake total_stake list failed finished
+	entries = list()
+	for i in range(count):
+		pubkey = 10**76 + i * 7919
+		adnl = 10**75 + i * 104729
+		entries.append(f"[{pubkey} [{300000000000000 + i} 196608 {10**70 + i} {adnl}]]")
+	participants = "(" + " ".join(entries) + ")"
+	return f" [ 1729565536 1729557344 300000000000000 {300000000000000 * count} {participants} 0 0 ] "
+#end define
+
+def get_best_time(func, text, repeat=20, rounds=7):
+	# Best of several rounds, ms per call, so that the numbers repeat between runs
+	best = None
+	for i in range(rounds):
+		start = time.perf_counter()
+		for j in range(repeat):
+			func(text)
+		result = (time.perf_counter() - start) / repeat * 1000
+		best = result if best is None else min(best, result)
+	return best
+#end define
+
+def Test():
+	text = make_participant_list(3)
+	assert parse_stack(text) == legacy_result2list(text)
+	assert parse_stack(" [ (null) () [ -1 0 ] ] ") == [[None], [], [-1, 0]]
+	assert parse_stack(" [ 5 ] ") == legacy_result2list(" [ 5 ] ")
+
+	# Slices broke the previous parser
+	value = parse_stack(" [ CS{Cell{0400F12A_} bits: 0..267; refs: 0..0} C{B5EE9C72} 7 ] ")
+	assert isinstance(value[0], StackCell) and value[0].kind == "CS"
+	assert value[0].hex == "0400F12A_" and value[0].bits == (0, 267) and value[0].refs == (0, 0)
+	assert value[1] == "C{B5EE9C72}" and value[1].kind == "C" and value[2] == 7
+	assert json.loads(json.dumps(value))[1] == "C{B5EE9C72}"
+	assert parse_stack(" [ 1 unknown ( NaN ) ] ")[1] == "unknown"
+	assert parse_stack("[1 [2(3)]]") == [1, [2, [3]]]
+	for text in (" [ 1 ] ] ", " [ [ 1 ] "):
+		try:
+			parse_stack(text)
+			raise AssertionError("no error")
+		except Exception as ex:
+			assert "parse_stack error" in str(ex)
+
+	print(f"{'participants':<14}{'legacy, ms':>12}{'parse_stack, ms':>17}{'speedup':>10}")
+	for count in (10, 100, 400, 1000):
+		text = make_participant_list(count)
+		legacy = get_best_time(legacy_result2list, text)
+		new = get_best_time(parse_stack, text)
+		assert parse_stack(text) == legacy_result2list(text)
+		print(f"{count:<14}{legacy:>12.3f}{new:>17.3f}{legacy / new:>9.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
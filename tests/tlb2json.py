@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# tlb2json against the previous Tlb2Json implementation on the getconfig corpus, plus timings.
+# Run: python3 -m tests.tlb2json
+
+import json
+import os
+import time
+
+from mytoncore.parsers import tlb2json
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "getconfig")
+
+
+def legacy_tlb2json(text):
+	# MyTonCore.Tlb2Json before the single-pass parser
+	start = 0
+	end = len(text)
+	if '=' in text:
+		start = text.find('=')+1
+	if "x{" in text:
+		end = text.find("x{")
+	text = text[start:end]
+	text = text.strip()
+	text = text.replace('(', '{')
+	text = text.replace(')', '}')
+
+	buff = text
+	buff = buff.replace('\r', ' ')
+	buff = buff.replace('\n', ' ')
+	buff = buff.replace('\t', ' ')
+	buff = buff.replace('{', ' ')
+	buff = buff.replace('}', ' ')
+	buff = buff.replace(':', ' ')
+
+	buff2 = ""
+	itemList = list()
+	for item in list(buff):
+		if item == ' ':
+			if len(buff2) > 0:
+				itemList.append(buff2)
+				buff2 = ""
+			itemList.append(item)
+		else:
+			buff2 += item
+	#end for
+
+	i = 0
+	for item in itemList:
+		l = len(item)
+		if item == ' ':
+			pass
+		elif item.isdigit() is False:
+			c = '"'
+			item2 = c + item + c
+			text = text[:i] + item2 + text[i+l:]
+			i += 2
+		#end if
+		i += l
+	#end for
+
+	text = text.replace('{"', '{"_":"')
+
+	while True:
+		try:
+			data = json.loads(text)
+			break
+		except json.JSONDecodeError as err:
+			if "Expecting ',' delimiter" in err.msg:
+				text = text[:err.pos] + ',' + text[err.pos:]
+			elif "Expecting property name enclosed in double quotes" in err.msg:
+				text = text[:err.pos] + '"_":' + text[err.pos:]
+			else:
+				raise err
+	#end while
+
+	return data
+#end define
+
+def load_corpus():
+	corpus = dict()
+	for name in sorted(os.listdir(FIXTURES_DIR)):
+		with open(os.path.join(FIXTURES_DIR, name)) as file:
+			result = file.read()
+		corpus[name] = result[result.find("ConfigParam"):]
+	corpus["config34_400.txt (generated)"] = make_validator_set(400)
+	return corpus
+#end define
+
+def make_validator_set(count):
+	# Complete binary tree of validator_addr leaves, the shape of config 34 on mainnet
+	def make_node(first, size):
+		if size == 1:
+			pubkey = format(first, "064X")
+			adnl = format(first * 7919, "064X")
+			return f"(hm_edge label:(hml_same v:0 n:0) node:(hmn_leaf\n value:(validator_addr public_key:(ed25519_pubkey pubkey:x{pubkey}) weight:{1000 + first} adnl_addr:x{adnl})))"
+		half = size // 2
+		return f"(hm_edge label:(hml_same v:0 n:0) node:(hmn_fork\n left:{make_node(first, half)}\n right:{make_node(first + half, size - half)}))"
+	#end define
+
+	text = f"ConfigParam(34) = (\n  cur_validators:(validators_ext utime_since:1729500000 utime_until:1729565536 total:{count} main:{count} total_weight:1152921504606846975\n    list:{make_node(0, count)}))\nx{{1267}}"
+	return text
+#end define
+
+def measure(func, text, repeat):
+	start = time.time()
+	for i in range(repeat):
+		func(text)
+	return (time.time() - start) / repeat * 1000
+#end define
+
+def Test():
+	corpus = load_corpus()
+	for name, text in corpus.items():
+		assert tlb2json(text) == legacy_tlb2json(text), name
+	#end for
+
+	config34 = tlb2json(corpus["config34.txt"])
+	assert config34["cur_validators"]["total"] == 4
+	config17 = tlb2json(corpus["config17.txt"])
+	assert config17["min_stake"]["amount"]["value"] == 300000000000000
+	config12 = tlb2json(corpus["config12.txt"])
+	assert config12["workchains"]["node"]["value"]["format"]["vm_version"] == "-1"
+
+	print(f"{'fixture':<32}{'legacy, ms':>12}{'tlb2json, ms':>14}{'speedup':>10}")
+	for name, text in corpus.items():
+		repeat = 3 if "generated" in name else 50
+		legacy = measure(legacy_tlb2json, text, repeat)
+		new = measure(tlb2json, text, repeat)
+		print(f"{name:<32}{legacy:>12.3f}{new:>14.3f}{legacy / new:>9.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# parse_validator_set and ValidatorSet against the previous GetConfig34 parsing and lookups, plus timings.
+# Run: python3 -m tests.validator_set
+
+import os
+import time
+
+from mytoncore.models import ValidatorSet
+from mytoncore.parsers import parse_validator_set
+from tests.tlb2json import FIXTURES_DIR, make_validator_set
+
+
+def parse(text, search, search2=None):
+	# mypylib.parse
+	if search is None or text is None:
+		return None
+	if search not in text:
+		return None
+	text = text[text.find(search) + len(search):]
+	if search2 is not None and search2 in text:
+		text = text[:text.find(search2)]
+	return text
+#end define
+
+def legacy_get_config34(result):
+	# MyTonCore.GetConfig34 before parse_validator_set, without the lite-client call
+	config34 = dict()
+	config34["totalValidators"] = int(parse(result, "total:", ' '))
+	config34["mainValidators"] = int(parse(result, "main:", ' '))
+	config34["startWorkTime"] = int(parse(result, "utime_since:", ' '))
+	config34["endWorkTime"] = int(parse(result, "utime_until:", ' '))
+	config34["totalWeight"] = int(parse(result, "total_weight:", ' '))
+	validators = list()
+	for line in result.split('\n'):
+		if "public_key:" in line:
+			validatorAdnlAddr = parse(line, "adnl_addr:x", ')')
+			pubkey = parse(line, "pubkey:x", ')')
+			try:
+				validatorWeight = int(parse(line, "weight:", ' '))
+			except ValueError:
+				validatorWeight = int(parse(line, "weight:", ')'))
+			buff = dict()
+			buff["adnlAddr"] = validatorAdnlAddr
+			buff["pubkey"] = pubkey
+			buff["weight"] = validatorWeight
+			validators.append(buff)
+	config34["validators"] = validators
+	return config34
+#end define
+
+def legacy_get_adnl_from_pubkey(config32, inputPubkey):
+	# MyTonCore.GetAdnlFromPubkey
+	for validator in config32["validators"]:
+		if validator["pubkey"] == inputPubkey:
+			return validator["adnlAddr"]
+#end define
+
+def Test():
+	corpus = dict()
+	for name in ("config32.txt", "config34.txt"):
+		with open(os.path.join(FIXTURES_DIR, name)) as file:
+			corpus[name] = file.read()
+	corpus["config34_400 (generated)"] = make_validator_set(400)
+	for name, text in corpus.items():
+		assert parse_validator_set(text) == legacy_get_config34(text), name
+	try:
+		parse_validator_set("ConfigParam(36) = (null)")
+		raise AssertionError("empty config 36 must raise")
+	except Exception as err:
+		assert "not found" in str(err)
+
+	config = parse_validator_set(corpus["config34_400 (generated)"])
+	validator_set = ValidatorSet(34, config)
+	assert len(validator_set) == 400 and validator_set.total_weight == 1152921504606846975
+	last = config["validators"][-1]
+	assert validator_set.index_by_adnl[last["adnlAddr"]] == 399
+	assert validator_set.adnl_by_pubkey[last["pubkey"]] == last["adnlAddr"]
+	assert validator_set.weights[399] == last["weight"]
+	try:
+		validator_set.validators[0]["weight"] = 0
+		raise AssertionError("ValidatorSet must be read-only")
+	except TypeError:
+		pass
+
+	# GetComplaints looks up the adnl of every complaint
+	pubkeys = [item["pubkey"] for item in config["validators"]]
+	print(f"{'complaints':<12}{'scan, ms':>10}{'index, ms':>11}{'speedup':>10}")
+	for count in (10, 100, 400):
+		start = time.time()
+		for pubkey in pubkeys[-count:]:
+			legacy_get_adnl_from_pubkey(config, pubkey)
+		legacy = (time.time() - start) * 1000
+		start = time.time()
+		for pubkey in pubkeys[-count:]:
+			validator_set.adnl_by_pubkey.get(pubkey)
+		new = (time.time() - start) * 1000
+		print(f"{count:<12}{legacy:>10.3f}{new:>11.3f}{legacy / new:>9.1f}x")
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()
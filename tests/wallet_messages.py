@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf_8 -*-
+
+# Native wallet messages against the Fift wallet scripts.
+# Without fift in PATH only the message structure and signatures are checked.
+# Run: FIFTPATH=/usr/src/ton/crypto/fift/lib:/usr/src/ton/crypto/smartcont python3 -m tests.wallet_messages
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from nacl.signing import SigningKey
+
+from mytoncore.boc import Builder, deserialize_boc
+from mytoncore.models import Wallet
+from mytoncore.wallet_messages import (
+	build_wallet_transfer,
+	build_highload_transfer,
+	build_comment_body,
+)
+
+
+WORKCHAIN = 0
+WALLET_ADDR = "A1" * 32
+DEST_ADDR = "B2" * 32
+DEST_RAW = f"{WORKCHAIN}:{DEST_ADDR}"
+SUBWALLET = 698983191
+SEQNO = 17
+AMOUNT = 1500000000
+SCRIPTS = {"v1": "wallet.fif", "v2": "wallet-v2.fif", "v3": "wallet-v3.fif"}
+
+
+def make_wallet(dir_path, version):
+	path = os.path.join(dir_path, "test_wallet")
+	with open(path + ".pk", "wb") as file:
+		file.write(bytes(range(32)))
+	with open(path + ".addr", "wb") as file:
+		file.write(bytes.fromhex(WALLET_ADDR) + WORKCHAIN.to_bytes(4, "big", signed=True))
+	wallet = Wallet("test_wallet", path, version)
+	wallet.workchain = WORKCHAIN
+	wallet.addr = WALLET_ADDR
+	wallet.subwallet = SUBWALLET
+	return wallet
+#end define
+
+def parse_transfer(boc):
+	# Returns (signature, signing message cell)
+	root = deserialize_boc(boc)[0]
+	cs = root.begin_parse()
+	assert cs.load_uint(2) == 0b10
+	assert cs.load_uint(2) == 0
+	assert cs.load_address() == (WORKCHAIN, WALLET_ADDR)
+	assert cs.load_grams() == 0
+	assert cs.load_uint(2) == 0
+	signature = cs.load_bytes(64)
+	builder = Builder()
+	builder.store_uint(*reversed(cs.load_remaining_bits()))
+	for ref in root.refs:
+		builder.store_ref(ref)
+	return signature, builder.end_cell()
+#end define
+
+def run_fift(wallet, version, dir_path):
+	result_path = os.path.join(dir_path, "fift-query")
+	args = [SCRIPTS[version], wallet.path, DEST_RAW]
+	if version == "v3":
+		args += [SUBWALLET]
+	args += [SEQNO, AMOUNT / 10**9, result_path]
+	args = ["fift", "-s"] + [str(item) for item in args]
+	subprocess.run(args, check=True, stdout=subprocess.PIPE, cwd=dir_path)
+	with open(result_path + ".boc", "rb") as file:
+		return file.read()
+#end define
+
+def get_valid_until(boc, version):
+	signature, message = parse_transfer(boc)
+	cs = message.begin_parse()
+	if version == "v1":
+		return None
+	cs.load_uint(32) # seqno or subwallet
+	return cs.load_uint(32)
+#end define
+
+def Test():
+	signing_key = SigningKey(bytes(range(32)))
+	dest = (WORKCHAIN, DEST_ADDR, True)
+	with tempfile.TemporaryDirectory() as dir_path:
+		for version in ("v1", "v2", "v3", "v4"):
+			wallet = make_wallet(dir_path, version + "r2")
+			boc = build_wallet_transfer(wallet, signing_key, dest, AMOUNT, SEQNO, subwallet=SUBWALLET, valid_until=1700000000)
+			signature, message = parse_transfer(boc)
+			signing_key.verify_key.verify(message.get_hash(), signature)
+			assert message.refs[0].begin_parse().load_uint(2) == 0b01
+			if shutil.which("fift") and version in SCRIPTS:
+				fift_boc = run_fift(wallet, version, dir_path)
+				valid_until = get_valid_until(fift_boc, version)
+				boc = build_wallet_transfer(wallet, signing_key, dest, AMOUNT, SEQNO, subwallet=SUBWALLET, valid_until=valid_until)
+				assert boc == fift_boc, f"{version}: {boc.hex()} != {fift_boc.hex()}"
+				print(f"{version}: equal to {SCRIPTS[version]}")
+		#end for
+
+		wallet = make_wallet(dir_path, "hv1")
+		orders = [(WORKCHAIN, DEST_ADDR, True, AMOUNT + i) for i in range(5)]
+		boc = build_highload_transfer(wallet, signing_key, orders, seqno=SEQNO, valid_until=1700000000)
+		signature, message = parse_transfer(boc)
+		signing_key.verify_key.verify(message.get_hash(), signature)
+		cs = message.begin_parse()
+		assert (cs.load_int(32), cs.load_uint(32), cs.load_uint(32)) == (SUBWALLET, 1700000000, SEQNO)
+	#end with
+	assert build_comment_body("").bits == 0
+	assert build_comment_body("hi").bits == 48
+	print("ok")
+#end define
+
+
+if __name__ == "__main__":
+	Test()